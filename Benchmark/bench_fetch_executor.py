@@ -0,0 +1,92 @@
+import pandas as pd
+import numpy as np
+import threading
+import os
+import sys
+import time
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils import fetch_executor
+from Utils.fetch_executor import iter_map, call
+
+"""
+并发请求执行器性能对比
+旧做法: 逐日顺序请求
+新实现: iter_map 并发请求 + call 全局并发上限与令牌桶限速，结果按交易日顺序产出
+使用注入网络延迟的模拟 jq 客户端（每次请求延迟 latency ± jitter 秒），不依赖 jqdatasdk 与本地 Database 目录，
+同时记录实际的最大并发请求数与任意 1 秒窗口内的最大请求数，校验是否遵守限制
+"""
+
+class FakeJQClient:
+    """模拟 jq 客户端：get_price 按延迟返回当日全部股票的数据，并记录请求时间与并发数"""
+
+    def __init__(self, n_codes, latency, jitter, seed=0):
+        self.codes = [f"{i:06d}.XSHE" for i in range(n_codes)]
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.start_times = []
+
+    def get_price(self, security, start_date, end_date, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.start_times.append(time.monotonic())
+            delay = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+        time.sleep(max(delay, 0))
+        with self._lock:
+            self.active -= 1
+        return pd.DataFrame({'date': pd.Timestamp(start_date), 'code': security,
+                             'close': np.arange(len(security), dtype=float)})
+
+    def max_rate(self):
+        """任意 1 秒窗口内发起的最大请求数"""
+        times = np.sort(self.start_times)
+        return int((np.searchsorted(times, times + 1.0, side='left') - np.arange(len(times))).max())
+
+def benchmark_fetch_executor(n_days=40, n_codes=5000, latency=0.5, jitter=0.1,
+                             max_concurrency=3, requests_per_second=5):
+    """
+    Args:
+        n_days (int): 请求的交易日数（每个交易日一次请求）
+        n_codes (int): 每次请求的股票数
+        latency (float): 模拟的单次请求延迟（秒）
+        jitter (float): 延迟的随机波动（秒），使请求完成顺序与提交顺序不同
+        max_concurrency (int): 并发上限
+        requests_per_second (float): 每秒请求数上限
+    """
+    dates = [d.strftime('%Y-%m-%d') for d in pd.bdate_range('2025-01-01', periods=n_days)]
+    print(f"模拟请求: {n_days} 个交易日 × {n_codes} 只股票，延迟 {latency}±{jitter}s，"
+          f"并发上限 {max_concurrency}，限速 {requests_per_second} 次/秒")
+
+    client = FakeJQClient(n_codes, latency, jitter)
+    start = time.perf_counter()
+    sequential = [client.get_price(client.codes, start_date=date, end_date=date) for date in dates]
+    sequential_s = time.perf_counter() - start
+
+    fetch_executor.configure(max_concurrency=max_concurrency, requests_per_second=requests_per_second,
+                             burst=max_concurrency)
+    client = FakeJQClient(n_codes, latency, jitter)
+    start = time.perf_counter()
+    results = []
+    for date, df, error in iter_map(lambda d: call(client.get_price, client.codes, start_date=d, end_date=d), dates):
+        results.append((date, df))
+    concurrent_s = time.perf_counter() - start
+
+    # 校验结果按交易日顺序产出，且与顺序请求一致
+    ordered = [date for date, _ in results] == dates
+    match = all(df.equals(expected) for (_, df), expected in zip(results, sequential))
+
+    print(f"\n顺序请求: {sequential_s:.2f}s")
+    print(f"并发请求: {concurrent_s:.2f}s，加速 {sequential_s / concurrent_s:.1f}x"
+          f"（理论下限 {max(n_days / requests_per_second, n_days * latency / max_concurrency):.2f}s）")
+    print(f"最大并发请求数: {client.max_active}（上限 {max_concurrency}），"
+          f"任意 1 秒内最大请求数: {client.max_rate()}（限速 {requests_per_second} 次/秒，桶容量 {max_concurrency}）")
+    print(f"结果按交易日顺序产出: {ordered}，与顺序请求一致: {match}")
+
+if __name__ == "__main__":
+    benchmark_fetch_executor()
@@ -0,0 +1,81 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.fetch_pipeline import run_pipeline
+
+"""
+获取 - 转换 - 写入 流水线性能对比
+旧做法: 逐日顺序执行 请求 -> 整理 -> 写 CSV，等待网络时磁盘空闲，写文件时网络空闲
+新实现: run_pipeline 让 fetch(N+1)、transform(N)、write(N-1) 同时进行
+使用注入网络延迟的模拟请求（每次 latency 秒，返回 n_codes 行日线数据），写入临时目录，
+fetch_workers=1 时与顺序执行的请求数相同，总耗时应接近纯网络时间 n_days × latency
+"""
+
+def _fake_fetch(n_codes, latency):
+    """模拟 get_price：等待 latency 秒后返回一天的数据（time 为索引，需整理）"""
+    codes = [f"{i:06d}.XSHE" for i in range(n_codes)]
+    rng = np.random.default_rng(0)
+    values = rng.random((n_codes, 8))
+
+    def fetch(trading_date):
+        time.sleep(latency)
+        df = pd.DataFrame(values, columns=['open', 'close', 'high', 'low', 'volume', 'money', 'factor', 'avg'])
+        df.insert(0, 'code', codes)
+        df.index = pd.DatetimeIndex([trading_date] * n_codes, name='time')
+        return df
+    return fetch
+
+def _transform(trading_date, df):
+    return df.reset_index().rename(columns={'time': 'date'})
+
+def _writer(save_dir):
+    def write(trading_date, df):
+        df.to_csv(os.path.join(save_dir, f"{trading_date}.csv"), index=False, encoding='utf-8-sig')
+    return write
+
+def benchmark_fetch_pipeline(n_days=250, n_codes=5000, latency=0.1):
+    """
+    Args:
+        n_days (int): 回补的交易日数
+        n_codes (int): 每个交易日的股票数
+        latency (float): 模拟的单次请求延迟（秒）
+    """
+    dates = [d.strftime('%Y-%m-%d') for d in pd.bdate_range('2024-01-01', periods=n_days)]
+    fetch = _fake_fetch(n_codes, latency)
+    print(f"模拟回补: {n_days} 个交易日 × {n_codes} 只股票，单次请求延迟 {latency}s，"
+          f"纯网络时间 {n_days * latency:.1f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sequential_dir = os.path.join(tmp, 'sequential')
+        pipeline_dir = os.path.join(tmp, 'pipeline')
+        os.makedirs(sequential_dir)
+        os.makedirs(pipeline_dir)
+
+        write = _writer(sequential_dir)
+        start = time.perf_counter()
+        for trading_date in dates:
+            write(trading_date, _transform(trading_date, fetch(trading_date)))
+        sequential_s = time.perf_counter() - start
+
+        print("\n流水线（fetch_workers=1）:")
+        stats = run_pipeline(dates, fetch, _transform, _writer(pipeline_dir), fetch_workers=1)
+
+        # 校验输出文件一致
+        sample = dates[::max(1, n_days // 10)]
+        match = sorted(os.listdir(sequential_dir)) == sorted(os.listdir(pipeline_dir)) and all(
+            pd.read_csv(os.path.join(sequential_dir, f"{d}.csv")).equals(pd.read_csv(os.path.join(pipeline_dir, f"{d}.csv")))
+            for d in sample)
+
+    print(f"\n顺序执行: {sequential_s:.2f}s")
+    print(f"流水线:   {stats['wall_seconds']:.2f}s（纯网络时间 {n_days * latency:.2f}s，"
+          f"整理 {stats['transform']['seconds']:.2f}s、写入 {stats['write']['seconds']:.2f}s 与请求重叠）")
+    print(f"输出文件一致: {match}")
+
+if __name__ == "__main__":
+    benchmark_fetch_pipeline()
@@ -0,0 +1,90 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Config.data_path as data_path
+from Utils.get_trading_date import get_trading_calendar
+from Utils.partition_manifest import MANIFEST_FILE
+from Utils.gap_scanner import scan_gaps, GAP_DATASETS
+
+"""
+缺口扫描性能
+在临时目录中生成 20 年的模拟交易日历、n_codes 只股票的证券信息，以及 GAP_DATASETS 各数据集的空分区文件与完成清单，
+随机删除部分分区、把部分清单记录的行数改小，检查 scan_gaps 找到的缺口与注入的一致，并记录整棵目录的扫描耗时（目标远小于 1 秒）
+"""
+
+def _build_tree(tmp, trade_dates, n_codes, missing_ratio, short_ratio, rng):
+    """生成模拟目录，返回 {数据集: (注入的缺失日期, 注入的行数不足日期)}"""
+    pd.DataFrame({'trade_date': trade_dates}).to_pickle(os.path.join(tmp, 'date.pkl'))
+    data_path.DATABASE_PATHS['trading_days'] = os.path.join(tmp, 'date.pkl')
+
+    # 一半股票从第一天上市，另一半在区间内陆续上市
+    starts = np.concatenate([np.repeat(trade_dates[0], n_codes // 2),
+                             rng.choice(trade_dates, n_codes - n_codes // 2)])
+    instruments_dir = os.path.join(tmp, 'cn_stock_instruments')
+    os.makedirs(instruments_dir)
+    pd.DataFrame({'code': [f"{i:06d}.XSHE" for i in range(n_codes)], 'start_date': pd.DatetimeIndex(starts).strftime('%Y-%m-%d'),
+                  'end_date': '2200-01-01', 'type': 'stock'}).to_csv(os.path.join(instruments_dir, 'all_securities_stock.csv'), index=False)
+    data_path.DATABASE_PATHS['cn_stock_instruments'] = instruments_dir
+
+    date_strs = trade_dates.strftime('%Y-%m-%d')
+    counts = np.searchsorted(np.sort(starts), trade_dates.values, side='right')
+    injected = {}
+    for dataset in GAP_DATASETS:
+        save_dir = os.path.join(tmp, dataset)
+        os.makedirs(save_dir)
+        data_path.DATABASE_PATHS[dataset] = save_dir
+        # 首尾日期保留，扫描范围与模拟日历一致
+        missing = set(rng.choice(date_strs[1:-1], int(len(date_strs) * missing_ratio), replace=False))
+        short = set(rng.choice([d for d in date_strs[1:-1] if d not in missing], int(len(date_strs) * short_ratio), replace=False))
+        with open(os.path.join(save_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            for date, count in zip(date_strs, counts):
+                if date in missing:
+                    continue
+                open(os.path.join(save_dir, f"{date}.csv"), 'w').close()
+                rows = int(count) // 2 if date in short else int(count)
+                f.write(json.dumps({'dataset': dataset, 'date': date, 'rows': rows, 'checksum': '',
+                                    'path': f"{date}.csv", 'columns': None, 'completed_at': ''}) + '\n')
+        injected[dataset] = (missing, short if dataset != 'mtss_info' else set())
+    return injected
+
+def benchmark_gap_scanner(n_codes=5000, missing_ratio=0.01, short_ratio=0.005):
+    """
+    Args:
+        n_codes (int): 模拟股票数
+        missing_ratio (float): 每个数据集删除的分区比例
+        short_ratio (float): 每个数据集行数不足的分区比例
+    """
+    rng = np.random.default_rng(0)
+    trade_dates = pd.bdate_range('2005-01-04', '2024-12-31')
+    saved_paths = dict(data_path.DATABASE_PATHS)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            injected = _build_tree(tmp, trade_dates, n_codes, missing_ratio, short_ratio, rng)
+            get_trading_calendar(reload=True)
+            print(f"模拟目录: {len(GAP_DATASETS)} 个数据集 × {len(trade_dates)} 个交易日，{n_codes} 只股票")
+
+            start = time.perf_counter()
+            reports = scan_gaps(end_date=trade_dates[-1].strftime('%Y-%m-%d'), verbose=False)
+            scan_s = time.perf_counter() - start
+
+            match = all(set(reports[d]['missing']) == missing and set(reports[d]['incomplete']) == short
+                        for d, (missing, short) in injected.items())
+            n_requests = sum(len(r['requests']) for r in reports.values())
+            n_gaps = sum(len(r['missing']) + len(r['incomplete']) for r in reports.values())
+    finally:
+        data_path.DATABASE_PATHS.update(saved_paths)
+        get_trading_calendar(reload=False)
+
+    print(f"扫描耗时: {scan_s * 1000:.1f}ms")
+    print(f"缺口 {n_gaps} 个交易日，合并为 {n_requests} 个请求")
+    print(f"与注入的缺口一致: {match}")
+
+if __name__ == "__main__":
+    benchmark_gap_scanner()
@@ -0,0 +1,85 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import time
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.get_quarterly_financial_data import derive_quarterly
+
+"""
+单季度 / TTM / 同比 / 环比衍生计算性能对比
+旧做法: 按股票 groupby-apply，每只股票内按年 diff 得到单季度，再 rolling(4) 求 TTM、pct_change 求同比环比
+新实现: 所有股票一次性计算，前 n 个季度的位置由 (股票, 季度) 合并键 searchsorted 得到
+使用模拟的年初至今累计数据（约 2% 的报告期缺失），不依赖本地 Database 目录
+"""
+
+def _legacy_derive(code_df, fields):
+    """旧做法：单只股票的衍生计算（要求季度连续，缺失季度需先补齐）"""
+    code_df = code_df.set_index('statDate').asfreq('QE')
+    year = code_df.index.year
+    single = code_df[fields].groupby(year).diff()
+    single[code_df.index.month == 3] = code_df.loc[code_df.index.month == 3, fields]
+    result = {}
+    for field in fields:
+        result[f"{field}_sq"] = single[field]
+        result[f"{field}_ttm"] = single[field].rolling(4).sum()
+        previous = single[field].shift(4)
+        result[f"{field}_yoy"] = (single[field] - previous) / previous.abs().replace(0, np.nan)
+        previous = single[field].shift(1)
+        result[f"{field}_qoq"] = (single[field] - previous) / previous.abs().replace(0, np.nan)
+    return pd.DataFrame(result, index=code_df.index).dropna(how='all')
+
+def _make_statements(n_codes, n_quarters, n_fields, rng):
+    """生成模拟的累计季度报表"""
+    stat_dates = pd.date_range('2005-03-31', periods=n_quarters, freq='QE')
+    codes = np.array([f"{i:06d}.XSHE" for i in range(n_codes)])
+    single = rng.normal(1e8, 5e7, (n_codes, n_quarters, n_fields))
+    # 按年累计
+    year = stat_dates.year.to_numpy()
+    cumulative = np.empty_like(single)
+    for y in np.unique(year):
+        cols = np.nonzero(year == y)[0]
+        cumulative[:, cols, :] = np.cumsum(single[:, cols, :], axis=1)
+    fields = [f"field_{i}" for i in range(n_fields)]
+    df = pd.DataFrame(cumulative.reshape(-1, n_fields), columns=fields)
+    df.insert(0, 'code', np.repeat(codes, n_quarters))
+    df.insert(1, 'statDate', np.tile(stat_dates, n_codes))
+    df.insert(1, 'pubDate', df['statDate'] + pd.Timedelta(days=30))
+    keep = rng.random(len(df)) > 0.02
+    return df[keep].reset_index(drop=True), fields
+
+def benchmark_derivation(n_codes=5000, n_quarters=80, n_fields=50, legacy_codes=200):
+    """
+    Args:
+        n_codes (int): 模拟股票数
+        n_quarters (int): 每只股票的报告期数
+        n_fields (int): 数值字段数
+        legacy_codes (int): 旧做法测试的股票数
+    """
+    rng = np.random.default_rng(0)
+    df, fields = _make_statements(n_codes, n_quarters, n_fields, rng)
+    print(f"模拟数据: {n_codes} 只股票 × {n_quarters} 个报告期 × {n_fields} 个字段，共 {len(df)} 行")
+
+    start = time.perf_counter()
+    derived = derive_quarterly(df, fields)
+    new_s = time.perf_counter() - start
+
+    legacy_df = df[df['code'].isin(df['code'].unique()[:legacy_codes])]
+    start = time.perf_counter()
+    legacy = legacy_df.groupby('code').apply(lambda x: _legacy_derive(x, fields), include_groups=False)
+    legacy_s = time.perf_counter() - start
+
+    # 校验结果一致
+    legacy = legacy.reset_index()
+    merged = derived.merge(legacy, on=['code', 'statDate'], suffixes=('', '_legacy'))
+    columns = [f"{field}{suffix}" for field in fields[:5] for suffix in ['_sq', '_ttm', '_yoy', '_qoq']]
+    match = all(np.allclose(merged[c].to_numpy(), merged[f"{c}_legacy"].to_numpy(), equal_nan=True) for c in columns)
+
+    print(f"\n新实现: {n_codes} 只股票 {new_s:.2f}s（{len(derived)} 行 × {derived.shape[1]} 列）")
+    print(f"旧做法: {legacy_codes} 只股票 {legacy_s:.2f}s，按此估算全部股票约 {legacy_s * n_codes / legacy_codes:.0f}s")
+    print(f"结果与 groupby-apply 一致: {match}")
+
+if __name__ == "__main__":
+    benchmark_derivation()
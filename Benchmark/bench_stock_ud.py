@@ -0,0 +1,98 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import time
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.get_stock_ud import compute_limit_panel, panel_to_frame, summarize_panel
+
+"""
+涨跌停计算性能对比
+旧实现: 逐行 iterrows，每只股票 pd.concat 一行，单个交易日耗时随股票数平方增长
+新实现: 整个日期区间按 (日期 × 股票) 面板一次性计算，含封板、开板标记、连板数及按日汇总
+使用模拟行情（约 3% 涨停、1% 跌停、2% 停牌），不依赖本地 Database 目录
+"""
+
+def _legacy_stock_ud(df, trading_date):
+    """旧版 get_stock_ud 的单日计算部分"""
+    result_df = pd.DataFrame(columns=['date', 'code', 'zt', 'dt'])
+    for _, row in df.iterrows():
+        high, low = row['high'], row['low']
+        high_limit, low_limit = row['high_limit'], row['low_limit']
+        if pd.isna(high) or pd.isna(low) or pd.isna(high_limit) or pd.isna(low_limit):
+            continue
+        zt = 1 if abs(high - high_limit) < 1e-6 else 0
+        dt = 1 if abs(low - low_limit) < 1e-6 else 0
+        result_row = {'date': trading_date, 'code': row['code'], 'zt': zt, 'dt': dt}
+        result_df = pd.concat([result_df, pd.DataFrame([result_row])], ignore_index=True)
+    return result_df
+
+def _make_panel(n_days, n_codes, rng):
+    """生成模拟行情面板"""
+    pre_close = rng.uniform(2, 200, (n_days, n_codes)).round(2)
+    high_limit = (pre_close * 1.1).round(2)
+    low_limit = (pre_close * 0.9).round(2)
+    close = (pre_close * rng.uniform(0.92, 1.08, (n_days, n_codes))).round(2)
+    high = np.maximum(close, (pre_close * rng.uniform(1.0, 1.08, (n_days, n_codes))).round(2))
+    low = np.minimum(close, (pre_close * rng.uniform(0.92, 1.0, (n_days, n_codes))).round(2))
+
+    draw = rng.random((n_days, n_codes))
+    touch_up = draw < 0.03
+    high[touch_up] = high_limit[touch_up]
+    close[touch_up & (draw < 0.02)] = high_limit[touch_up & (draw < 0.02)]
+    touch_down = (draw >= 0.03) & (draw < 0.04)
+    low[touch_down] = low_limit[touch_down]
+    paused = draw > 0.98
+    for values in (high, low, close, high_limit, low_limit):
+        values[paused] = np.nan
+    return high, low, close, high_limit, low_limit
+
+def benchmark_stock_ud(n_years=10, n_codes=5000, legacy_codes=5000):
+    """
+    Args:
+        n_years (int): 模拟年数（每年 244 个交易日）
+        n_codes (int): 模拟股票数
+        legacy_codes (int): 旧实现单日测试的股票数
+    """
+    rng = np.random.default_rng(0)
+    n_days = n_years * 244
+    dates = pd.bdate_range('2015-01-01', periods=n_days).values
+    codes = np.array([f"{i:06d}.XSHE" for i in range(n_codes)])
+    high, low, close, high_limit, low_limit = _make_panel(n_days, n_codes, rng)
+    print(f"模拟数据: {n_days} 个交易日 × {n_codes} 只股票")
+
+    # 旧实现：单个交易日
+    day_df = pd.DataFrame({'code': codes[:legacy_codes], 'high': high[0, :legacy_codes], 'low': low[0, :legacy_codes],
+                           'high_limit': high_limit[0, :legacy_codes], 'low_limit': low_limit[0, :legacy_codes]})
+    start = time.perf_counter()
+    legacy = _legacy_stock_ud(day_df, '2015-01-01')
+    legacy_s = time.perf_counter() - start
+
+    # 新实现：整个区间
+    start = time.perf_counter()
+    result = compute_limit_panel(high, low, close, high_limit, low_limit)
+    compute_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result_df = panel_to_frame(dates, codes, result)
+    frame_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    summary = summarize_panel(dates, result)
+    summary_s = time.perf_counter() - start
+
+    # 校验首日结果与旧实现一致
+    first_day = result_df[result_df['date'] == result_df['date'].iloc[0]].head(len(legacy))
+    match = (first_day['zt'].to_numpy() == legacy['zt'].to_numpy().astype(int)).all() and \
+            (first_day['dt'].to_numpy() == legacy['dt'].to_numpy().astype(int)).all()
+
+    print(f"\n旧实现（iterrows）: 1 个交易日 × {legacy_codes} 只股票 {legacy_s:.2f}s，"
+          f"按此估算 {n_days} 个交易日约 {legacy_s * n_days / 3600:.1f} 小时")
+    print(f"新实现: 面板计算 {compute_s:.2f}s，转换长表 {frame_s:.2f}s（{len(result_df)} 行），按日汇总 {summary_s:.3f}s")
+    print(f"首日结果与旧实现一致: {match}")
+    print(f"最高连板数: {summary['max_zt_streak'].max()}，日均涨停 {summary['zt'].mean():.0f} 只，日均炸板 {summary['zt_open'].mean():.0f} 只")
+
+if __name__ == "__main__":
+    benchmark_stock_ud()
@@ -0,0 +1,97 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Config.data_path as data_path
+from Utils.data_store import save_partition, read_partition, load
+
+"""
+CSV 与 Parquet 存储对比
+模拟一年（250 个交易日 × 5000 只股票）的 stock_price 分区，比较：
+- 磁盘占用
+- 读取全年全部列的耗时
+- 只读取 2 列（列裁剪）的耗时
+- 只读取 50 只股票的耗时：分散在全部代码中（每个行组都要读取）与连续的 50 个代码（行组统计信息可跳过其余行组）
+- 通过 load() 一次读取全年 2 列 × 50 只股票的耗时
+"""
+
+FIELDS = ['open', 'close', 'low', 'high', 'volume', 'money', 'factor', 'high_limit', 'low_limit', 'avg', 'pre_close', 'paused']
+
+def _make_day(date, codes, rng):
+    """生成一个交易日的模拟行情数据"""
+    n = len(codes)
+    close = rng.uniform(2, 200, n).round(2)
+    df = pd.DataFrame({'date': date, 'code': codes})
+    for field in ['open', 'close', 'low', 'high', 'avg', 'pre_close']:
+        df[field] = (close * rng.uniform(0.9, 1.1, n)).round(2)
+    df['high_limit'] = (close * 1.1).round(2)
+    df['low_limit'] = (close * 0.9).round(2)
+    df['volume'] = rng.integers(1e4, 1e8, n).astype(float)
+    df['money'] = (df['volume'] * close).round(2)
+    df['factor'] = 1.0
+    df['paused'] = 0.0
+    return df[['date', 'code'] + FIELDS]
+
+def _dir_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path))
+
+def _time_load(dates, **kwargs):
+    start = time.perf_counter()
+    frames = [read_partition('stock_price', date, **kwargs) for date in dates]
+    df = pd.concat(frames, ignore_index=True)
+    return time.perf_counter() - start, len(df)
+
+def benchmark_storage(n_days=250, n_codes=5000):
+    """
+    Args:
+        n_days (int): 模拟交易日数
+        n_codes (int): 模拟股票数
+    """
+    rng = np.random.default_rng(0)
+    codes = [f"{i:06d}.XSHE" for i in range(n_codes)]
+    dates = pd.bdate_range('2024-01-01', periods=n_days).strftime('%Y-%m-%d').tolist()
+    sample_codes = codes[::n_codes // 50][:50]
+    clustered_codes = codes[n_codes // 2:n_codes // 2 + 50]
+
+    original_path = data_path.DATABASE_PATHS['stock_price']
+    original_format = data_path.STORAGE_FORMAT
+    print(f"模拟数据: {n_days} 个交易日 × {n_codes} 只股票 × {len(FIELDS)} 个字段")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results = {}
+            for storage_format in ['csv', 'parquet']:
+                data_path.DATABASE_PATHS['stock_price'] = os.path.join(tmp_dir, storage_format)
+                data_path.STORAGE_FORMAT = storage_format
+
+                start = time.perf_counter()
+                for date in dates:
+                    save_partition(_make_day(date, codes, rng), 'stock_price', date)
+                write_s = time.perf_counter() - start
+
+                full_s, rows = _time_load(dates)
+                cols_s, _ = _time_load(dates, columns=['date', 'code', 'close'])
+                codes_s, code_rows = _time_load(dates, codes=sample_codes)
+                clustered_s, _ = _time_load(dates, codes=clustered_codes)
+                start = time.perf_counter()
+                load('stock_price', dates[0], dates[-1], codes=sample_codes, fields=['close', 'volume'])
+                api_s = time.perf_counter() - start
+                size_mb = _dir_size(data_path.DATABASE_PATHS['stock_price']) / 1024 / 1024
+                results[storage_format] = (size_mb, write_s, full_s, cols_s, codes_s, clustered_s, api_s)
+                print(f"{storage_format}: 读取 {rows} 行，按股票过滤 {code_rows} 行")
+
+            print(f"\n{'格式':<10}{'磁盘(MB)':>12}{'写入(s)':>10}{'全部列(s)':>12}{'2列(s)':>10}{'50只分散(s)':>14}{'50只连续(s)':>14}{'load(s)':>10}")
+            for storage_format, (size_mb, write_s, full_s, cols_s, codes_s, clustered_s, api_s) in results.items():
+                print(f"{storage_format:<10}{size_mb:>12.1f}{write_s:>10.2f}{full_s:>12.2f}{cols_s:>10.2f}{codes_s:>14.2f}"
+                      f"{clustered_s:>14.2f}{api_s:>10.2f}")
+    finally:
+        data_path.DATABASE_PATHS['stock_price'] = original_path
+        data_path.STORAGE_FORMAT = original_format
+
+if __name__ == "__main__":
+    benchmark_storage()
@@ -0,0 +1,108 @@
+import pandas as pd
+import pickle
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.get_trading_date import TradingCalendar
+
+"""
+交易日历查询性能对比
+旧实现: 每次调用都重新打开并反序列化 date.pkl，再用 pandas 布尔索引查找
+新实现: 进程内只加载一次，基于有序数组二分查找
+使用 20 年的模拟交易日历（工作日），不依赖本地 Database 目录
+"""
+
+def _legacy_get_trading_dates(file_path, start_date, end_date=None, count=None):
+    """旧版 get_trading_dates（每次读取 pkl）"""
+    with open(file_path, 'rb') as f:
+        df = pickle.load(f)
+    mask = df['trade_date'] >= pd.to_datetime(start_date)
+    if end_date:
+        mask = mask & (df['trade_date'] <= pd.to_datetime(end_date))
+    filtered_df = df[mask]
+    if count:
+        filtered_df = filtered_df.head(count)
+    return filtered_df['trade_date'].dt.strftime('%Y-%m-%d').tolist()
+
+def _legacy_get_previous_trading_date(file_path, date, offset=1):
+    """旧版 get_previous_trading_date（每次读取 pkl）"""
+    with open(file_path, 'rb') as f:
+        df = pickle.load(f)
+    target_dt = pd.to_datetime(date)
+    if target_dt in df['trade_date'].values:
+        target_index = df[df['trade_date'] == target_dt].index[0]
+    else:
+        past_dates = df[df['trade_date'] < target_dt]
+        if past_dates.empty:
+            return None
+        target_index = past_dates.index[-1]
+    new_index = target_index - offset
+    if 0 <= new_index < len(df):
+        return df.iloc[new_index]['trade_date'].strftime('%Y-%m-%d')
+    return None
+
+def _legacy_is_trading_day(file_path, date):
+    """旧版 is_trading_day（每次读取 pkl）"""
+    with open(file_path, 'rb') as f:
+        df = pickle.load(f)
+    return pd.to_datetime(date) in df['trade_date'].values
+
+def _time_per_call(func, args_list):
+    """返回单次调用平均耗时（微秒）"""
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list) * 1e6
+
+def benchmark_trading_calendar(n_calls=500):
+    """
+    对比新旧实现的单次调用延迟
+
+    Args:
+        n_calls (int): 每种查询的调用次数
+    """
+    trade_dates = pd.bdate_range('2005-01-01', '2024-12-31')
+    df = pd.DataFrame({'trade_date': trade_dates})
+    print(f"模拟交易日历: {len(df)} 个交易日 ({trade_dates[0].date()} ~ {trade_dates[-1].date()})")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, 'date.pkl')
+        df.to_pickle(file_path)
+
+        # 随机抽取查询日期（包含非交易日）
+        sample = pd.date_range('2005-01-01', '2024-12-31').to_series().sample(n_calls, random_state=0)
+        dates = sample.dt.strftime('%Y-%m-%d').tolist()
+
+        start = time.perf_counter()
+        calendar = TradingCalendar.from_pickle(file_path)
+        load_us = (time.perf_counter() - start) * 1e6
+
+        cases = [
+            ('区间查询(1个月)',
+             lambda d: _legacy_get_trading_dates(file_path, d, (pd.Timestamp(d) + pd.Timedelta(days=30)).strftime('%Y-%m-%d')),
+             lambda d: calendar.get_range(d, (pd.Timestamp(d) + pd.Timedelta(days=30)).strftime('%Y-%m-%d'))),
+            ('向前偏移(T-5)',
+             lambda d: _legacy_get_previous_trading_date(file_path, d, 5),
+             lambda d: calendar.get_previous(d, 5)),
+            ('是否交易日',
+             lambda d: _legacy_is_trading_day(file_path, d),
+             lambda d: calendar.is_trading_day(d)),
+        ]
+
+        print(f"\n新实现一次性加载耗时: {load_us:.0f} us")
+        print(f"\n{'查询':<16}{'旧实现(us/次)':>16}{'新实现(us/次)':>16}{'加速比':>10}")
+        for name, legacy_func, new_func in cases:
+            args_list = [(d,) for d in dates]
+            # 校验结果一致
+            for d in dates[:50]:
+                assert legacy_func(d) == new_func(d), f"{name} 结果不一致: {d}"
+            legacy_us = _time_per_call(legacy_func, args_list)
+            new_us = _time_per_call(new_func, args_list)
+            print(f"{name:<16}{legacy_us:>16.1f}{new_us:>16.1f}{legacy_us / new_us:>9.0f}x")
+
+if __name__ == "__main__":
+    benchmark_trading_calendar()
@@ -21,6 +21,7 @@ DATABASE_PATHS = {
     'stock_post_factor': os.path.join(DATABASE_ROOT, 'stock_post_factor'),
     'stock_valuation': os.path.join(DATABASE_ROOT, 'stock_valuation'),
     'stock_industry': os.path.join(DATABASE_ROOT, 'stock_industry'),
+    'stock_sector': os.path.join(DATABASE_ROOT, 'stock_sector'),
     'stock_concept': os.path.join(DATABASE_ROOT, 'stock_concept'),
     'stock_ud': os.path.join(DATABASE_ROOT, 'stock_ud'),
     'is_st': os.path.join(DATABASE_ROOT, 'is_st'),
@@ -30,6 +31,9 @@ DATABASE_PATHS = {
     'dividend': os.path.join(DATABASE_ROOT, 'dividend'),
     # 财务数据
     'financial_data': os.path.join(DATABASE_ROOT, 'financial_data'),
+    'financial_pit': os.path.join(DATABASE_ROOT, 'financial_pit'),
+    'financial_derived': os.path.join(DATABASE_ROOT, 'financial_derived'),
+    'financial_snapshot': os.path.join(DATABASE_ROOT, 'financial_snapshot'),
     # 因子数据
     'factor_list': os.path.join(DATABASE_ROOT, 'factor_list'),
     'factor_data': os.path.join(DATABASE_ROOT, 'factor_data'),
@@ -40,6 +44,33 @@ DATABASE_PATHS = {
     'cn_stock_instruments': os.path.join(DATABASE_ROOT, 'cn_stock_instruments'),
     'cn_index_instruments': os.path.join(DATABASE_ROOT, 'cn_index_instruments'),
     'cn_etf_instruments': os.path.join(DATABASE_ROOT, 'cn_etf_instruments'),
+    'stock_listing_matrix': os.path.join(DATABASE_ROOT, 'stock_listing_matrix'),
+    # 接口响应缓存
+    'jq_cache': os.path.join(DATABASE_ROOT, 'jq_cache'),
+    # 每日额度消耗记录
+    'quota_usage': os.path.join(DATABASE_ROOT, 'quota_usage'),
+}
+
+# 按日期分区存储的数据集，每个交易日一个文件（文件名为 YYYY-MM-DD + 扩展名）
+PARTITIONED_DATASETS = [
+    'stock_price',
+    'stock_post_factor',
+    'stock_valuation',
+    'stock_ud',
+    'is_st',
+    'mtss_info',
+    'money_flow',
+    'factor_data',
+    'financial_snapshot',
+]
+
+# 分区数据的存储格式: 'csv' 或 'parquet'（需要安装 pyarrow）
+STORAGE_FORMAT = 'csv'
+
+# 存储格式对应的文件扩展名
+STORAGE_EXTENSIONS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
 }
 
 def get_path(data_type, filename=None):
@@ -63,6 +94,23 @@ def get_path(data_type, filename=None):
     
     return path
 
+def get_partition_path(data_type, date, storage_format=None):
+    """
+    获取日期分区数据文件路径
+    
+    Args:
+        data_type (str): 数据类型，对应DATABASE_PATHS中的key
+        date (str): 日期，格式：'YYYY-MM-DD'
+        storage_format (str, optional): 存储格式，默认为 STORAGE_FORMAT
+    
+    Returns:
+        str: 完整的文件路径
+    """
+    storage_format = storage_format or STORAGE_FORMAT
+    if storage_format not in STORAGE_EXTENSIONS:
+        raise ValueError(f"未知的存储格式: {storage_format}")
+    return get_path(data_type, f"{date}{STORAGE_EXTENSIONS[storage_format]}")
+
 def ensure_directories():
     """确保所有配置的目录都存在"""
     for path in DATABASE_PATHS.values():
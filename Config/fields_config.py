@@ -456,6 +456,69 @@ FINANCIAL_FIELDS = {
     'insurance_indicator_annual': INSURANCE_INDICATOR_FIELDS_ANNUAL
 }
 
+# 表的保存目录（Database/financial_data 下）及中文名称: {字段配置名: (保存目录名, 中文名称)}
+TABLE_OUTPUTS = {
+    'balance_quarter': ('balance_sheet_quarter', '资产负债表'),
+    'income_quarter': ('income_statement_quarter', '利润表'),
+    'cash_flow_quarter': ('cash_flow_quarter', '现金流量表'),
+    'indicator_quarter': ('indicator_quarter', '财务指标'),
+    'balance_annual': ('balance_sheet_annual', '资产负债表'),
+    'income_annual': ('income_statement_annual', '利润表'),
+    'cash_flow_annual': ('cash_flow_annual', '现金流量表'),
+    'indicator_annual': ('indicator_annual', '财务指标'),
+    'bank_indicator_annual': ('bank_indicator_annual', '银行财务指标'),
+    'security_indicator_annual': ('security_indicator_annual', '券商财务指标'),
+    'insurance_indicator_annual': ('insurance_indicator_annual', '保险财务指标'),
+}
+
+# 由季度报表生成年度报表: {年度表: (季度表, 口径)}
+# 'stock': 时点值，年度值即第四季度（statDate 为 12-31）的数值
+# 'flow':  期间值，年度值为第四季度的年初至今累计值（季度数据为单季度口径时为四个季度之和）
+# 生成的列与年度表字段配置一致，需要的年度字段须在上面的 *_FIELDS_ANNUAL 中列出
+ANNUAL_FROM_QUARTER = {
+    'balance_annual': ('balance_quarter', 'stock'),
+    'income_annual': ('income_quarter', 'flow'),
+    'cash_flow_annual': ('cash_flow_quarter', 'flow'),
+    'indicator_annual': ('indicator_quarter', 'flow'),
+}
+
+# 比率、增长率字段：不能由季度数据相加得到，年度值取第四季度（statDate 为 12-31）的数值，不按 'flow' 口径求和
+ANNUAL_RATIO_FIELDS = {
+    'indicator_annual': [
+        'indicator.roe',
+        'indicator.inc_return',
+        'indicator.roa',
+        'indicator.net_profit_margin',
+        'indicator.gross_profit_margin',
+        'indicator.expense_to_total_revenue',
+        'indicator.operation_profit_to_total_revenue',
+        'indicator.net_profit_to_total_revenue',
+        'indicator.operating_expense_to_total_revenue',
+        'indicator.ga_expense_to_total_revenue',
+        'indicator.financing_expense_to_total_revenue',
+        'indicator.operating_profit_to_profit',
+        'indicator.invesment_profit_to_profit',
+        'indicator.adjusted_profit_to_profit',
+        'indicator.goods_sale_and_service_to_revenue',
+        'indicator.ocf_to_revenue',
+        'indicator.ocf_to_operating_profit',
+        'indicator.inc_total_revenue_year_on_year',
+        'indicator.inc_total_revenue_annual',
+        'indicator.inc_revenue_year_on_year',
+        'indicator.inc_revenue_annual',
+        'indicator.inc_operation_profit_year_on_year',
+        'indicator.inc_operation_profit_annual',
+        'indicator.inc_net_profit_year_on_year',
+        'indicator.inc_net_profit_annual',
+        'indicator.inc_net_profit_to_shareholders_year_on_year',
+        'indicator.inc_net_profit_to_shareholders_annual',
+    ],
+}
+
+# 季度表中没有对应字段、年度值只能通过接口获取的字段
+# 年度表字段配置中有、而对应季度表中没有的字段会自动通过接口获取，无需在此列出
+ANNUAL_API_FIELDS = {}
+
 # 获取字段配置的函数
 def get_fields(table_name):
     """
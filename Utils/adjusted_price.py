@@ -0,0 +1,109 @@
+import os
+import sys
+from collections import OrderedDict
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.get_trading_date import get_previous_trading_date
+from Utils.data_store import load
+
+"""
+本地复权价格计算
+基于不复权行情 stock_price 与后复权因子 stock_post_factor 计算前复权、后复权价格，不调用任何接口
+
+后复权: 价格 × factor，成交量 ÷ factor
+前复权: 价格 × factor / factor(锚定日)，成交量 × factor(锚定日) / factor
+"""
+
+# 需要乘以复权因子的价格字段
+PRICE_FIELDS = ['open', 'close', 'high', 'low', 'avg', 'high_limit', 'low_limit']
+# 需要除以复权因子的数量字段
+VOLUME_FIELDS = ['volume']
+# 默认返回字段
+DEFAULT_FIELDS = ['open', 'close', 'high', 'low', 'volume']
+
+# 计算结果缓存 {(codes, start_date, end_date, fq, anchor_date, fields): DataFrame}
+_CACHE = OrderedDict()
+CACHE_SIZE = 16
+
+def _anchor_factor(anchor_date, factor_df):
+    """
+    获取锚定日的后复权因子 {code: factor}
+    锚定日不是交易日时取之前最近的交易日；锚定日无因子的股票取区间内最后一个因子
+    """
+    anchor_trade_date = get_previous_trading_date(anchor_date, 0)
+    anchor_df = load('stock_post_factor', anchor_trade_date, anchor_trade_date,
+                     codes=factor_df['code'].unique(), fields=['factor'])
+    last_in_range = factor_df.sort_values('date').groupby('code')['factor'].last()
+    anchor = anchor_df.dropna(subset=['factor']).set_index('code')['factor']
+    return anchor.combine_first(last_in_range)
+
+def _compute_adjusted_price(codes, start_date, end_date, fq, anchor_date, fields):
+    """计算复权价格（不使用缓存）"""
+    price_df = load('stock_price', start_date, end_date, codes=codes, fields=list(fields))
+    factor_df = load('stock_post_factor', start_date, end_date, codes=codes, fields=['factor'])
+
+    df = price_df.merge(factor_df, on=['date', 'code'], how='left')
+    factor = df['factor'].to_numpy(dtype=float)
+    if fq == 'pre':
+        anchor = _anchor_factor(anchor_date or end_date, factor_df)
+        factor = factor / df['code'].map(anchor).to_numpy(dtype=float)
+
+    for field in fields:
+        if field in PRICE_FIELDS:
+            df[field] = df[field].to_numpy(dtype=float) * factor
+        elif field in VOLUME_FIELDS:
+            df[field] = df[field].to_numpy(dtype=float) / factor
+
+    return df[['date', 'code'] + list(fields)].sort_values(['date', 'code'], ignore_index=True)
+
+def get_adjusted_price(codes=None, start_date=None, end_date=None, fq='post', anchor_date=None, fields=None):
+    """
+    获取复权价格
+
+    Args:
+        codes (list, optional): 股票代码列表，默认为全部股票
+        start_date (str): 开始日期，格式：'YYYY-MM-DD'
+        end_date (str): 结束日期，格式：'YYYY-MM-DD'
+        fq (str): 复权方式，'post' 后复权，'pre' 前复权，None 不复权
+        anchor_date (str, optional): 前复权锚定日，该日价格与不复权价格一致，默认为end_date
+        fields (list, optional): 字段列表，默认为 ['open', 'close', 'high', 'low', 'volume']
+
+    Returns:
+        DataFrame: 包含 date, code 及所选字段的长表，按 (date, code) 排序
+    """
+    if fq not in ('post', 'pre', None):
+        raise ValueError(f"未知的复权方式: {fq}")
+    fields = tuple(fields or DEFAULT_FIELDS)
+    key = (tuple(sorted(codes)) if codes is not None else None, start_date, end_date, fq,
+           anchor_date if fq == 'pre' else None, fields)
+
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _CACHE[key].copy()
+
+    if fq is None:
+        df = load('stock_price', start_date, end_date, codes=codes, fields=list(fields))
+        df = df.sort_values(['date', 'code'], ignore_index=True)
+    else:
+        df = _compute_adjusted_price(codes, start_date, end_date, fq, anchor_date, fields)
+
+    _CACHE[key] = df
+    if len(_CACHE) > CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return df.copy()
+
+def clear_cache():
+    """清空复权价格缓存（行情或复权因子文件更新后调用）"""
+    _CACHE.clear()
+
+if __name__ == "__main__":
+    start_date = '2025-08-01'
+    end_date = '2025-08-28'
+    codes = ['000001.XSHE', '600519.XSHG']
+
+    print("=== 后复权价格 ===")
+    print(get_adjusted_price(codes, start_date, end_date, fq='post').head(10))
+
+    print("\n=== 前复权价格（锚定end_date） ===")
+    print(get_adjusted_price(codes, start_date, end_date, fq='pre').head(10))
@@ -0,0 +1,205 @@
+import pandas as pd
+import os
+import sys
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Config.data_path import get_path
+from Config.fields_config import FINANCIAL_FIELDS, TABLE_OUTPUTS, ANNUAL_FROM_QUARTER, ANNUAL_API_FIELDS, \
+    ANNUAL_RATIO_FIELDS
+from Utils.pit_store import read_statement_files
+from Utils.get_quarterly_financial_data import derive_quarterly
+from Utils.statement_fetcher import fetch_statements, _save_by_code, _short_name, KEY_FIELDS, \
+    HISTORY_FUNDAMENTALS_MAX_ROWS
+
+"""
+由季度财务数据生成年度财务数据
+资产负债表、利润表、现金流量表及财务指标的年度值即第四季度（statDate 为 12-31）的数据，
+直接由本地季度数据（financial_data/<季度表目录>/{code}.csv）生成，不再单独请求 interval='1y' 的年度数据；
+ROE、增长率等比率字段（Config/fields_config.py 中的 ANNUAL_RATIO_FIELDS）同样取第四季度的数值，不参与求和；
+只有季度表中没有对应字段的年度字段（ANNUAL_API_FIELDS 及年度配置中多出的字段）仍通过接口获取
+年度表的列与通过接口获取时相同，即年度表字段配置（FINANCIAL_FIELDS 中的 *_annual）中列出的字段；
+需要更多年度字段时在年度表字段配置中添加，季度表中有对应字段的由季度数据生成
+期间值口径（cumulative）为年初至今累计时，会检查第四季度不小于第三季度，不符合的表不生成
+需要先运行季度财务数据的获取或更新
+"""
+
+# cumulative=True 时，同时有第三、四季度正值的 (股票, 年度) 中第四季度小于第三季度的比例上限，
+# 超过时认为季度数据不是年初至今累计值（单季度数据约有一半的年度第四季度小于第三季度）
+CUMULATIVE_TOLERANCE = 0.2
+
+def quarter_fields(table):
+    """年度表字段配置中可由季度数据生成的字段（短字段名，不含 code/pubDate/statDate）"""
+    quarter_names = {_short_name(f) for f in FINANCIAL_FIELDS[ANNUAL_FROM_QUARTER[table][0]]}
+    api_names = {_short_name(f) for f in api_fields(table)}
+    return [_short_name(f) for f in FINANCIAL_FIELDS[table]
+            if _short_name(f) not in KEY_FIELDS and _short_name(f) in quarter_names and _short_name(f) not in api_names]
+
+def api_fields(table):
+    """年度表中需要通过接口获取的字段（完整字段名，不含 code/pubDate/statDate）"""
+    quarter_names = {_short_name(f) for f in FINANCIAL_FIELDS[ANNUAL_FROM_QUARTER[table][0]]}
+    fields = list(ANNUAL_API_FIELDS.get(table, []))
+    fields += [f for f in FINANCIAL_FIELDS[table]
+               if _short_name(f) not in KEY_FIELDS and _short_name(f) not in quarter_names and f not in fields]
+    return fields
+
+def _stale_codes(table):
+    """季度文件比年度文件新（或尚无年度文件）的股票"""
+    quarter_dir = os.path.join(get_path('financial_data'), TABLE_OUTPUTS[ANNUAL_FROM_QUARTER[table][0]][0])
+    annual_dir = os.path.join(get_path('financial_data'), TABLE_OUTPUTS[table][0])
+    if not os.path.isdir(quarter_dir):
+        return []
+    annual_mtime = {}
+    if os.path.isdir(annual_dir):
+        with os.scandir(annual_dir) as entries:
+            annual_mtime = {entry.name: entry.stat().st_mtime for entry in entries if entry.name.endswith('.csv')}
+    with os.scandir(quarter_dir) as entries:
+        return sorted(entry.name[:-4] for entry in entries
+                      if entry.name.endswith('.csv') and entry.stat().st_mtime > annual_mtime.get(entry.name, 0))
+
+def _latest_rows(df):
+    """季度长表中每个 (code, statDate) 最后发布的一行，pubDate/statDate 转为 datetime64"""
+    df = df.dropna(subset=['code', 'statDate']).copy()
+    df['pubDate'] = pd.to_datetime(df['pubDate'])
+    df['statDate'] = pd.to_datetime(df['statDate'])
+    df = df.sort_values(['code', 'statDate', 'pubDate'], kind='stable')
+    return df.drop_duplicates(subset=['code', 'statDate'], keep='last')
+
+def _fourth_quarter_rows(df, names):
+    """季度长表中第四季度的数据，同一 (code, statDate) 取最后发布的一行"""
+    df = _latest_rows(df)
+    return df.loc[df['statDate'].dt.month == 12, KEY_FIELDS + names]
+
+def _decreasing_share(df, table):
+    """
+    期间值字段中第四季度小于第三季度的比例，用于检查季度数据是否为年初至今累计值
+
+    Returns:
+        float: 同一股票同一年度第三、四季度均为正值的数值中，第四季度较小的比例；没有可比较的数值时为 None
+    """
+    ratio_names = {_short_name(f) for f in ANNUAL_RATIO_FIELDS.get(table, [])}
+    names = [_short_name(f) for f in FINANCIAL_FIELDS[ANNUAL_FROM_QUARTER[table][0]]
+             if _short_name(f) not in KEY_FIELDS and _short_name(f) not in ratio_names and _short_name(f) in df.columns]
+    if not names:
+        return None
+    df = _latest_rows(df)
+    df['year'] = df['statDate'].dt.year
+    q3 = df[df['statDate'].dt.month == 9].set_index(['code', 'year'])[names]
+    q4 = df[df['statDate'].dt.month == 12].set_index(['code', 'year'])[names]
+    q3, q4 = q3.align(q4, join='inner')
+    q3 = q3.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    q4 = q4.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    comparable = (q3 > 0) & (q4 > 0)
+    if not comparable.any():
+        return None
+    return float((q4[comparable] < q3[comparable]).mean())
+
+def _annual_rows(df, table, cumulative):
+    """
+    由季度长表取出年度数据
+
+    Args:
+        df (DataFrame): 季度表原始数据
+        cumulative (bool): 季度数据中的期间值是否为年初至今累计值；为 False 时年度值为四个季度之和，
+            比率字段（ANNUAL_RATIO_FIELDS）不求和，仍取第四季度的数值
+
+    Returns:
+        DataFrame: 每个 (code, 年度) 一行，statDate 为 datetime64
+    """
+    kind = ANNUAL_FROM_QUARTER[table][1]
+    names = [name for name in quarter_fields(table) if name in df.columns]
+    if kind == 'flow' and not cumulative:
+        ratio_names = {_short_name(f) for f in ANNUAL_RATIO_FIELDS.get(table, [])}
+        sums = [name for name in names if name not in ratio_names]
+        ratios = [name for name in names if name in ratio_names]
+        derived = derive_quarterly(df, sums, cumulative=False)
+        annual = derived[derived['statDate'].dt.month == 12]
+        annual = annual[KEY_FIELDS + [f"{name}_ttm" for name in sums]]
+        annual.columns = KEY_FIELDS + sums
+        if ratios:
+            fourth = _fourth_quarter_rows(df, ratios).drop(columns='pubDate')
+            annual = annual.merge(fourth, on=['code', 'statDate'], how='left')
+        annual = annual[KEY_FIELDS + names]
+    else:
+        annual = _fourth_quarter_rows(df, names)
+    return annual.reset_index(drop=True)
+
+def _merge_api_fields(annual, fetched):
+    """合并接口获取的字段，pubDate 以季度数据为准，季度数据中没有的年度以接口数据补充"""
+    if fetched.empty:
+        return annual
+    fetched = fetched.copy()
+    fetched['pubDate'] = pd.to_datetime(fetched['pubDate'])
+    fetched['statDate'] = pd.to_datetime(fetched['statDate'])
+    merged = annual.merge(fetched, on=['code', 'statDate'], how='outer', suffixes=('', '_api'))
+    merged['pubDate'] = merged['pubDate'].fillna(merged.pop('pubDate_api'))
+    return merged.sort_values(['code', 'statDate'], kind='stable', ignore_index=True)
+
+def build_annual_statements(end_date, tables=None, codes=None, incremental=False, lookback=2, cumulative=True,
+                            fetch_missing=True, max_rows=HISTORY_FUNDAMENTALS_MAX_ROWS, save=True):
+    """
+    由本地季度数据生成年度财务数据，并按股票保存为与接口获取相同的 {code}.csv
+
+    Args:
+        end_date (str): 截至日期，格式为 'YYYY-MM-DD'，只生成 statDate 不晚于该日期的年度
+        tables (list, optional): 年度表字段配置名列表，默认为 ANNUAL_FROM_QUARTER 中的全部表
+        codes (list, optional): 股票代码列表，默认为季度数据中的全部股票
+        incremental (bool): 只处理季度文件在上次生成之后有更新的股票，且只更新最近 lookback 个年度
+        lookback (int): 增量模式下更新的最近年度数
+        cumulative (bool): 季度数据中的期间值是否为年初至今累计值；为 True 时检查第四季度不小于第三季度
+            （允许 CUMULATIVE_TOLERANCE 的例外，如第四季度亏损），不符合的表打印提示并跳过
+        fetch_missing (bool): 是否通过接口获取季度数据中没有对应年度值的字段
+        max_rows (int): 接口请求的单次最大行数
+        save (bool): 是否保存
+
+    Returns:
+        dict: {字段配置名: DataFrame}
+    """
+    results = {}
+    wanted = set(codes or [])
+    for table in tables or list(ANNUAL_FROM_QUARTER):
+        name = TABLE_OUTPUTS[table][1]
+        table_codes = codes
+        if incremental:
+            table_codes = [code for code in _stale_codes(table) if codes is None or code in wanted]
+            if not table_codes:
+                print(f"年度{name}: 季度数据没有更新")
+                results[table] = pd.DataFrame()
+                continue
+
+        source = read_statement_files(ANNUAL_FROM_QUARTER[table][0], table_codes)
+        if source is None:
+            print(f"年度{name}: 没有季度数据，请先获取季度财务数据")
+            results[table] = pd.DataFrame()
+            continue
+        if cumulative and ANNUAL_FROM_QUARTER[table][1] == 'flow':
+            share = _decreasing_share(source, table)
+            if share is not None and share > CUMULATIVE_TOLERANCE:
+                print(f"年度{name}: 季度数据中 {share:.0%} 的期间值第四季度小于第三季度，不像年初至今累计值，"
+                      f"跳过；单季度口径的数据请使用 cumulative=False")
+                results[table] = pd.DataFrame()
+                continue
+        annual = _annual_rows(source, table, cumulative)
+        annual = annual[annual['statDate'] <= pd.Timestamp(end_date)]
+        if incremental:
+            annual = annual[annual['statDate'].dt.year > pd.Timestamp(end_date).year - lookback]
+        print(f"年度{name}: 由季度数据生成 {len(annual)} 行（{annual['code'].nunique()} 只股票）")
+
+        extra = api_fields(table)
+        if extra and fetch_missing and not annual.empty:
+            prefix = FINANCIAL_FIELDS[table][0].split('.', 1)[0]
+            fetched = fetch_statements([table], sorted(annual['code'].unique()), end_date,
+                                       count=lookback if incremental else None, max_rows=max_rows, save=False,
+                                       fields={table: [f"{prefix}.{key}" for key in KEY_FIELDS] + extra})[table]
+            annual = _merge_api_fields(annual, fetched)
+
+        annual = annual.assign(pubDate=annual['pubDate'].dt.strftime('%Y-%m-%d'),
+                               statDate=annual['statDate'].dt.strftime('%Y-%m-%d'))
+        if save and not annual.empty:
+            _save_by_code(annual, table, upsert=incremental)
+        results[table] = annual
+    return results
+
+if __name__ == "__main__":
+    end_date = '2025-08-27'
+    build_annual_statements(end_date, codes=['000001.XSHE', '600519.XSHG'])
@@ -0,0 +1,175 @@
+from Utils import jq_cache as jq
+from sqlalchemy import and_, or_
+import pandas as pd
+import bisect
+import os
+import sys
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.fetch_executor import call
+
+"""
+finance.run_query 批量查询
+run_query 单次最多返回 RUN_QUERY_MAX_ROWS 行，超出部分被直接截断且不报错。本模块：
+- 用 code.in_(一批股票) 代替逐只股票查询，每批股票数根据已观察到的每只股票平均行数自动调整
+- 按 (code, 日期列, id) 排序，返回满页时以最后一行为游标继续查询（keyset 分页），不会漏行
+- 逐页产出结果，只产出已完整取完的股票，调用方可以边取边按股票写入文件
+- 单只股票仍查询失败时，在全部股票取完后重新查询（最多 RETRY_ROUNDS 轮），仍失败的股票通过 failed 返回给调用方
+
+调用前需先完成 jqdatasdk 认证
+"""
+
+# finance.run_query 单次返回的最大行数
+RUN_QUERY_MAX_ROWS = 5000
+# 单次 code.in_ 中的最大股票数
+MAX_BATCH_CODES = 1000
+# 首批请求假设的每只股票行数，之后按实际返回结果调整
+INITIAL_ROWS_PER_CODE = 50
+# 查询失败的股票重新查询的轮数
+RETRY_ROUNDS = 1
+
+def _batch_size(rows_per_code, page_size):
+    """按每只股票的平均行数估算一页能容纳的股票数"""
+    return int(max(1, min(MAX_BATCH_CODES, page_size // max(rows_per_code, 1))))
+
+def _after(table, row, date_column, id_column):
+    """keyset 游标条件: (code, 日期, id) 大于 row；日期为空时无法比较，抛出 ValueError"""
+    code_col, date_col, id_col = table.code, getattr(table, date_column), getattr(table, id_column)
+    if pd.isna(row[date_column]):
+        raise ValueError(f"{row['code']} 的 {date_column} 为空，无法作为分页游标")
+    # 转换为 Python 原生类型，避免 numpy 类型无法绑定到查询参数
+    last_code, last_date, last_id = str(row['code']), str(row[date_column])[:10], int(row[id_column])
+    return or_(code_col > last_code,
+               and_(code_col == last_code,
+                    or_(date_col > last_date, and_(date_col == last_date, id_col > last_id))))
+
+def iter_query_pages(table, codes, filters=(), date_column='pub_date', id_column='id',
+                     page_size=RUN_QUERY_MAX_ROWS, rows_per_code=INITIAL_ROWS_PER_CODE, failed=None,
+                     retries=RETRY_ROUNDS):
+    """
+    分批、分页执行 finance.run_query，查询失败的股票在最后重新查询
+
+    Args:
+        table: finance 表对象，如 finance.STK_XR_XD
+        codes (list): 股票代码列表
+        filters (iterable): 除股票代码外的其他过滤条件，如 [finance.STK_XR_XD.report_date <= end_date]
+        date_column (str): 排序及分页使用的日期列名，如 'pub_date'、'report_date'
+        id_column (str): 唯一标识列名，保证排序稳定
+        page_size (int): 单次请求的最大行数，须不大于 run_query 的返回上限
+        rows_per_code (int): 首批请求假设的每只股票行数
+        failed (list, optional): 传入列表时追加重试后仍查询失败的股票代码，调用方据此报告，不计入无数据的股票
+        retries (int): 查询失败的股票重新查询的轮数
+
+    Yields:
+        DataFrame: 按 (code, 日期列, id) 升序的结果，每只股票的全部行只出现在同一个 DataFrame 中
+    """
+    round_failed = []
+    yield from _iter_query_pages(table, codes, filters, date_column, id_column, page_size, rows_per_code,
+                                 round_failed)
+    for _ in range(retries):
+        if not round_failed:
+            break
+        print(f"重新查询此前失败的 {len(round_failed)} 只股票")
+        codes, round_failed = round_failed, []
+        yield from _iter_query_pages(table, codes, filters, date_column, id_column, page_size, rows_per_code,
+                                     round_failed)
+    if round_failed:
+        print(f"{len(round_failed)} 只股票查询失败: {', '.join(round_failed[:10])}"
+              + (" 等" if len(round_failed) > 10 else ""))
+    if failed is not None:
+        failed.extend(round_failed)
+
+def _iter_query_pages(table, codes, filters, date_column, id_column, page_size, rows_per_code, failed):
+    """iter_query_pages 的单轮查询，单只股票仍失败时追加到 failed 并跳过"""
+    codes = sorted(set(codes))
+    order = (table.code, getattr(table, date_column), getattr(table, id_column))
+    batch_size = _batch_size(rows_per_code, page_size)
+    calls, total_rows = 0, 0
+    i = 0
+    while i < len(codes):
+        batch = codes[i:i + batch_size]
+        base = jq.query(table).filter(table.code.in_(batch), *filters).order_by(*order)
+        pending = []
+        batch_rows = 0
+        cursor = None
+        try:
+            while True:
+                q = base if cursor is None else base.filter(_after(table, cursor, date_column, id_column))
+                df = call(jq.finance.run_query, q.limit(page_size))
+                calls += 1
+                if df is None or df.empty:
+                    break
+                batch_rows += len(df)
+                if len(df) < page_size:
+                    pending.append(df)
+                    break
+                # 满页：最后一只股票可能还有未返回的行，先产出之前已完整的股票
+                cursor = df.iloc[-1]
+                last_code = cursor['code']
+                complete = df[df['code'] != last_code]
+                if not complete.empty:
+                    pending.append(complete)
+                    yield pd.concat(pending, ignore_index=True)
+                    pending = []
+                pending.append(df[df['code'] == last_code])
+        except Exception as e:
+            if len(batch) == 1:
+                print(f"查询{batch[0]}失败: {e}")
+                failed.append(batch[0])
+                i += 1
+                continue
+            # 已产出的股票不再重复获取，从尚未取完的股票开始减半重试
+            if cursor is not None:
+                i = bisect.bisect_left(codes, cursor['code'])
+            batch_size = max(1, len(batch) // 2)
+            print(f"查询失败({e})，每批股票数下调为 {batch_size} 后重试")
+            continue
+
+        if pending:
+            yield pd.concat(pending, ignore_index=True)
+        total_rows += batch_rows
+        print(f"查询 {i + len(batch)} / {len(codes)} 只股票: 本批 {batch_rows} 行，累计 {calls} 次请求")
+        i += len(batch)
+        # 按本批每只股票的平均行数调整下一批的股票数，预留 20% 余量减少翻页
+        if batch_rows:
+            batch_size = _batch_size(batch_rows / len(batch) * 1.25, page_size)
+    print(f"共 {len(codes)} 只股票，{total_rows} 行，{calls} 次请求")
+
+def run_query_bulk(table, codes, filters=(), date_column='pub_date', id_column='id', page_size=RUN_QUERY_MAX_ROWS,
+                   failed=None):
+    """
+    iter_query_pages 的结果合并为一张表
+
+    Args:
+        failed (list, optional): 传入列表时追加查询失败的股票代码
+
+    Returns:
+        DataFrame: 全部股票的查询结果
+    """
+    frames = list(iter_query_pages(table, codes, filters, date_column, id_column, page_size, failed=failed))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+def save_pages_by_code(pages, save_dir, sort_by=None, ascending=True):
+    """
+    将 iter_query_pages 产出的结果逐页按股票保存为 {code}.csv（覆盖已有文件）
+
+    Args:
+        pages: iter_query_pages 的返回值
+        save_dir (str): 保存目录
+        sort_by (list, optional): 保存前每只股票内的排序列
+        ascending (bool): 排序方向
+
+    Returns:
+        int: 保存的文件数
+    """
+    os.makedirs(save_dir, exist_ok=True)
+    saved = 0
+    for df in pages:
+        for code, code_df in df.groupby('code', sort=False):
+            if sort_by:
+                code_df = code_df.sort_values(sort_by, ascending=ascending, kind='stable')
+            code_df.to_csv(os.path.join(save_dir, f"{code}.csv"), index=False, encoding='utf-8-sig')
+            saved += 1
+    print(f"数据已保存至: {save_dir} ({saved} 只股票)")
+    return saved
@@ -0,0 +1,334 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Config.data_path as data_path
+from Config.data_path import get_path, get_partition_path, STORAGE_EXTENSIONS, PARTITIONED_DATASETS
+from Utils.partition_manifest import record_partition
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pc = None
+    pq = None
+
+"""
+日期分区数据的存储层
+所有按日期存储的数据集（行情、估值、因子、资金流向、融资融券、ST、涨跌停）统一通过本模块读写
+存储格式由 Config/data_path.py 中的 STORAGE_FORMAT 决定：
+- csv:     utf-8-sig 编码的 CSV（原有格式）
+- parquet: 带类型、zstd 压缩的列式文件，按 code 排序写入，按股票读取时用行组的 code 最小/最大值跳过无关行组
+读取时若配置格式的文件不存在，会自动尝试其他格式，便于新旧格式混合的目录逐步迁移
+每次保存分区后在数据集目录的完成清单中追加记录（见 Utils/partition_manifest.py）
+"""
+
+# Parquet 压缩算法
+PARQUET_COMPRESSION = 'zstd'
+# Parquet 行组大小（行数），按 code 排序后每个行组覆盖一段连续的股票代码
+PARQUET_ROW_GROUP_SIZE = 1024
+
+def _require_pyarrow():
+    if pq is None:
+        raise ImportError("Parquet 存储需要安装 pyarrow: pip install pyarrow")
+
+def find_partition(data_type, date, storage_format=None):
+    """
+    查找日期分区文件，优先使用指定（或配置）的格式
+
+    Returns:
+        tuple: (文件路径, 存储格式)，不存在时返回 (None, None)
+    """
+    storage_format = storage_format or data_path.STORAGE_FORMAT
+    formats = [storage_format] + [fmt for fmt in STORAGE_EXTENSIONS if fmt != storage_format]
+    for fmt in formats:
+        file_path = get_partition_path(data_type, date, fmt)
+        if os.path.exists(file_path):
+            return file_path, fmt
+    return None, None
+
+def list_partition_dates(data_type):
+    """
+    列出数据集中已存在的分区日期（不打开文件）
+
+    Returns:
+        list: 升序日期列表，格式：['YYYY-MM-DD', ...]
+    """
+    save_dir = get_path(data_type)
+    if not os.path.isdir(save_dir):
+        return []
+    extensions = tuple(STORAGE_EXTENSIONS.values())
+    dates = set()
+    with os.scandir(save_dir) as entries:
+        for entry in entries:
+            root, ext = os.path.splitext(entry.name)
+            if ext in extensions and len(root) == 10:
+                dates.add(root)
+    return sorted(dates)
+
+def save_partition(df, data_type, date, storage_format=None, params=None):
+    """
+    保存单个日期分区，写完后记录到完成清单
+
+    Args:
+        df (DataFrame): 数据
+        data_type (str): 数据类型，如 'stock_price'
+        date (str): 日期，格式：'YYYY-MM-DD'
+        storage_format (str, optional): 存储格式，默认为 STORAGE_FORMAT
+        params (dict, optional): 影响分区内容的请求参数，记录到完成清单，如 {'fq': 'post'}
+
+    Returns:
+        str: 保存路径
+    """
+    storage_format = storage_format or data_path.STORAGE_FORMAT
+    save_path = get_partition_path(data_type, date, storage_format)
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+
+    if storage_format == 'parquet':
+        _require_pyarrow()
+        df = df.copy()
+        if 'date' in df.columns:
+            df['date'] = pd.to_datetime(df['date'])
+        if 'code' in df.columns:
+            df = df.sort_values('code', kind='stable')
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, save_path, compression=PARQUET_COMPRESSION,
+                       row_group_size=PARQUET_ROW_GROUP_SIZE, write_statistics=True)
+    else:
+        df.to_csv(save_path, index=False, encoding='utf-8-sig')
+
+    record_partition(data_type, date, save_path, len(df), df.columns, params)
+    return save_path
+
+def read_partition(data_type, date, columns=None, codes=None, storage_format=None):
+    """
+    读取单个日期分区
+
+    Args:
+        data_type (str): 数据类型，如 'stock_price'
+        date (str): 日期，格式：'YYYY-MM-DD'
+        columns (list, optional): 需要读取的列，默认读取全部列，文件中不存在的列会被忽略
+        codes (list, optional): 只保留这些股票代码；Parquet 文件先按 code 列的行组统计信息跳过不含这些代码的行组
+            （代码越集中跳过越多，分散在全部代码中时与全量读取后过滤相当），再在 Arrow 层精确过滤
+        storage_format (str, optional): 优先读取的存储格式，默认为 STORAGE_FORMAT
+
+    Returns:
+        DataFrame: 数据，date 列统一为 datetime64；分区不存在时返回 None
+    """
+    file_path, fmt = find_partition(data_type, date, storage_format)
+    if file_path is None:
+        return None
+
+    if fmt == 'parquet':
+        _require_pyarrow()
+        df = _read_parquet_file(file_path, columns, _code_filter(codes)).to_pandas()
+    else:
+        usecols = (lambda c: c in columns) if columns is not None else None
+        df = pd.read_csv(file_path, usecols=usecols)
+        if codes is not None and 'code' in df.columns:
+            df = df[df['code'].isin(set(codes))].reset_index(drop=True)
+
+    if 'date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['date']):
+        df['date'] = pd.to_datetime(df['date'])
+    return df
+
+def _matching_row_groups(parquet_file, sorted_codes):
+    """
+    根据 code 列的行组统计信息（min/max）找出可能包含 sorted_codes 中任一代码的行组
+    分区按 code 排序写入，每个行组覆盖一段连续的代码区间；没有统计信息的行组一律保留
+
+    Args:
+        parquet_file (ParquetFile): 分区文件
+        sorted_codes (numpy.ndarray): 升序排列的股票代码
+
+    Returns:
+        list: 行组序号
+    """
+    metadata = parquet_file.metadata
+    column = parquet_file.schema_arrow.get_field_index('code')
+    groups = []
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(column).statistics
+        if stats is None or not stats.has_min_max:
+            groups.append(i)
+            continue
+        pos = np.searchsorted(sorted_codes, stats.min, side='left')
+        if pos < len(sorted_codes) and sorted_codes[pos] <= stats.max:
+            groups.append(i)
+    return groups
+
+def _code_filter(codes):
+    """股票代码过滤条件：(Arrow 代码数组, 升序代码数组)，codes 为 None 时返回 None"""
+    if codes is None:
+        return None
+    codes = list(dict.fromkeys(codes))
+    return pa.array(codes, type=pa.string()), np.sort(np.array(codes, dtype=object))
+
+def _read_parquet_file(file_path, columns, code_filter):
+    """
+    读取单个 Parquet 分区为 Arrow 表
+    指定 code_filter 时先按行组统计信息跳过不含这些代码的行组，再在 Arrow 层精确过滤
+
+    Args:
+        file_path (str): 文件路径
+        columns (list): 需要读取的列，None 为全部列，文件中不存在的列会被忽略
+        code_filter (tuple): _code_filter 的结果，None 为不过滤
+    """
+    parquet_file = pq.ParquetFile(file_path)
+    names = parquet_file.schema_arrow.names
+    if columns is not None:
+        columns = [c for c in columns if c in names]
+    if code_filter is None or 'code' not in names:
+        return parquet_file.read(columns=columns)
+
+    code_set, sorted_codes = code_filter
+    read_columns = columns if columns is None or 'code' in columns else columns + ['code']
+    groups = _matching_row_groups(parquet_file, sorted_codes)
+    table = parquet_file.read_row_groups(groups, columns=read_columns)
+    table = table.filter(pc.is_in(table['code'], value_set=code_set))
+    return table.select(columns) if columns is not None else table
+
+def _load_parquet(items, columns, codes):
+    """读取一组 Parquet 分区，在 Arrow 层过滤、合并后一次性转换为 DataFrame"""
+    _require_pyarrow()
+    # 代码集合只建立一次，各分区复用
+    code_filter = _code_filter(codes)
+    tables = []
+    for date, file_path in items:
+        table = _read_parquet_file(file_path, columns, code_filter)
+        if 'date' not in table.column_names:
+            table = table.append_column('date', pa.array(np.full(table.num_rows, np.datetime64(date, 'ns'))))
+        tables.append(table)
+    return pa.concat_tables(tables, promote_options='permissive').to_pandas()
+
+def _load_csv(items, columns, code_index):
+    """读取一组 CSV 分区，按预先建立的代码索引过滤后合并"""
+    usecols = (lambda c: c in columns) if columns is not None else None
+    frames = []
+    for date, file_path in items:
+        df = pd.read_csv(file_path, usecols=usecols)
+        if code_index is not None and 'code' in df.columns:
+            df = df[code_index.get_indexer(df['code']) >= 0]
+        if 'date' not in df.columns:
+            df['date'] = date
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+def _to_panel(df, fields, codes=None):
+    """
+    长表转换为 NumPy 面板
+
+    Returns:
+        dict: {'dates': datetime64 数组, 'codes': 股票代码数组, 'fields': {字段: 二维数组 (日期数, 股票数)}}
+    """
+    dates = np.unique(df['date'].to_numpy())
+    codes = np.asarray(codes) if codes is not None else np.unique(df['code'].to_numpy().astype(str))
+    row = np.searchsorted(dates, df['date'].to_numpy())
+    col = pd.Index(codes).get_indexer(df['code'])
+    valid = col >= 0
+    row, col = row[valid], col[valid]
+
+    panel = {}
+    for field in fields:
+        values = np.full((len(dates), len(codes)), np.nan)
+        values[row, col] = df[field].to_numpy(dtype=float)[valid]
+        panel[field] = values
+    return {'dates': dates, 'codes': codes, 'fields': panel}
+
+def load(dataset, start_date=None, end_date=None, codes=None, fields=None, as_panel=False):
+    """
+    读取日期分区数据集的一段区间
+
+    只打开区间内存在的分区文件，只读取 date、code 及所需字段；
+    Parquet 分区在 Arrow 层按股票过滤并合并，最后只做一次 DataFrame 转换
+
+    Args:
+        dataset (str): 数据集，须为 PARTITIONED_DATASETS 之一，如 'stock_price'
+        start_date (str, optional): 开始日期，格式：'YYYY-MM-DD'，默认不限
+        end_date (str, optional): 结束日期，格式：'YYYY-MM-DD'，默认不限
+        codes (list, optional): 股票代码列表，默认为全部股票
+        fields (list, optional): 字段列表，默认为全部字段
+        as_panel (bool): 为 True 时返回 NumPy 面板，需要指定数值型 fields
+
+    Returns:
+        DataFrame: 包含 date, code 及所选字段的长表，按日期升序；
+        as_panel=True 时返回 {'dates', 'codes', 'fields': {字段: 二维数组}}，缺失值为 NaN
+    """
+    if dataset not in PARTITIONED_DATASETS:
+        raise ValueError(f"{dataset} 不是按日期分区存储的数据集")
+    if as_panel and not fields:
+        raise ValueError("as_panel=True 时需要指定 fields")
+
+    dates = [date for date in list_partition_dates(dataset)
+             if (start_date is None or date >= str(start_date)[:10])
+             and (end_date is None or date <= str(end_date)[:10])]
+    columns = ['date', 'code'] + [f for f in fields if f not in ('date', 'code')] if fields else None
+    # 去重后再建立索引（Index.get_indexer 不接受重复值）
+    codes = list(dict.fromkeys(codes)) if codes is not None else None
+
+    parquet_items, csv_items = [], []
+    for date in dates:
+        file_path, fmt = find_partition(dataset, date)
+        (parquet_items if fmt == 'parquet' else csv_items).append((date, file_path))
+
+    frames = []
+    if parquet_items:
+        frames.append(_load_parquet(parquet_items, columns, codes))
+    if csv_items:
+        frames.append(_load_csv(csv_items, columns, pd.Index(codes) if codes is not None else None))
+
+    if not frames:
+        df = pd.DataFrame(columns=columns or ['date', 'code'])
+    else:
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    if not pd.api.types.is_datetime64_any_dtype(df['date']):
+        df['date'] = pd.to_datetime(df['date'])
+    if columns is not None and list(df.columns) != columns:
+        df = df.reindex(columns=columns)
+    if len(frames) > 1:
+        df = df.sort_values('date', kind='stable', ignore_index=True)
+
+    if as_panel:
+        return _to_panel(df, columns[2:], codes)
+    return df
+
+def convert_csv_tree(data_types=None, storage_format='parquet', remove_csv=False):
+    """
+    将已有的 CSV 分区一次性转换为其他存储格式
+
+    Args:
+        data_types (list, optional): 需要转换的数据集，默认为全部日期分区数据集
+        storage_format (str): 目标格式，默认为 'parquet'
+        remove_csv (bool): 转换成功后是否删除原 CSV 文件
+
+    Returns:
+        dict: {data_type: 转换的文件数}
+    """
+    data_types = data_types or PARTITIONED_DATASETS
+    summary = {}
+    for data_type in data_types:
+        converted = 0
+        for date in list_partition_dates(data_type):
+            csv_path = get_partition_path(data_type, date, 'csv')
+            if not os.path.exists(csv_path):
+                continue
+            try:
+                df = pd.read_csv(csv_path)
+                save_partition(df, data_type, date, storage_format)
+                if remove_csv:
+                    os.remove(csv_path)
+                converted += 1
+            except Exception as e:
+                print(f"  转换 {csv_path} 时出错: {e}")
+        summary[data_type] = converted
+        print(f"{data_type}: 已转换 {converted} 个文件")
+    return summary
+
+if __name__ == "__main__":
+    # 将全部 CSV 分区转换为 Parquet（保留原 CSV）
+    convert_csv_tree(storage_format='parquet', remove_csv=False)
@@ -0,0 +1,155 @@
+import threading
+import time
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+"""
+并发请求执行器
+逐日、逐批的 jqdatasdk 请求相互独立，耗时主要是网络延迟。本模块：
+- iter_map: 用有界线程池并发执行独立任务，结果按输入顺序逐个产出，调用方在主线程中按原顺序保存，输出与顺序执行一致
+- call: 所有接口请求经过进程内共享的并发上限（信号量）与令牌桶限速，无论有多少个线程池同时运行，
+  同时进行的请求数不超过 MAX_CONCURRENCY，每秒发起的请求数不超过 REQUESTS_PER_SECOND
+
+用法:
+    for date, df, error in iter_map(lambda d: call(jq.get_price, codes, start_date=d, end_date=d), dates):
+        ...
+
+并发上限与限速需与聚宽账号的连接数、调用频率限制一致，可用 configure 修改
+"""
+
+# 同时进行的接口请求数上限（聚宽账号的并发连接数限制）
+MAX_CONCURRENCY = 3
+# 每秒发起的接口请求数上限，None 为不限速
+REQUESTS_PER_SECOND = 5
+# 令牌桶容量，允许短时间内突发的请求数
+BURST = 5
+
+class RateLimiter:
+    """
+    令牌桶限速器（线程安全）
+    令牌以 rate 个/秒的速度补充，最多累积 burst 个，每次请求消耗一个令牌，没有令牌时等待
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            rate (float): 每秒补充的令牌数，None 或 0 为不限速
+            burst (int, optional): 令牌桶容量，默认为 max(1, rate)
+        """
+        self.rate = rate
+        self.capacity = burst or max(1, rate or 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """取得 tokens 个令牌，不足时阻塞等待"""
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+# 进程内共享的并发上限与限速器
+_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENCY)
+_LIMITER = RateLimiter(REQUESTS_PER_SECOND, BURST)
+# 当前线程是否已在 call 中（嵌套调用不重复占用并发数）
+_LOCAL = threading.local()
+
+def configure(max_concurrency=None, requests_per_second=None, burst=None):
+    """
+    修改全局并发上限与限速，须在发起请求之前调用
+
+    Args:
+        max_concurrency (int, optional): 同时进行的请求数上限
+        requests_per_second (float, optional): 每秒请求数上限，0 为不限速
+        burst (int, optional): 令牌桶容量
+    """
+    global MAX_CONCURRENCY, REQUESTS_PER_SECOND, BURST, _SLOTS, _LIMITER
+    if max_concurrency is not None:
+        MAX_CONCURRENCY = max_concurrency
+        _SLOTS = threading.BoundedSemaphore(max_concurrency)
+    if requests_per_second is not None or burst is not None:
+        REQUESTS_PER_SECOND = REQUESTS_PER_SECOND if requests_per_second is None else requests_per_second
+        BURST = BURST if burst is None else burst
+        _LIMITER = RateLimiter(REQUESTS_PER_SECOND, BURST)
+
+def call(func, *args, **kwargs):
+    """
+    在全局并发上限与限速下执行一次接口请求
+    func.rate_limited 为 True 的函数（如 Utils/jq_cache.py 的带缓存接口）自行决定是否需要请求，直接调用；
+    在 call 内部再次调用 call 时不重复占用并发数与令牌
+
+    Args:
+        func: 接口函数，如 jq.get_price
+        *args, **kwargs: 传给 func 的参数
+
+    Returns:
+        func 的返回值
+    """
+    if getattr(func, 'rate_limited', False) or getattr(_LOCAL, 'active', False):
+        return func(*args, **kwargs)
+    with _SLOTS:
+        _LIMITER.acquire()
+        _LOCAL.active = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _LOCAL.active = False
+
+def _run(func, item):
+    """执行单个任务，异常作为结果返回"""
+    try:
+        return func(item), None
+    except Exception as e:
+        return None, e
+
+def iter_map(func, items, max_workers=None):
+    """
+    并发执行 func(item)，按 items 的顺序产出结果
+    同一时间最多有 2 × max_workers 个任务已提交，结果不会在内存中大量堆积
+
+    Args:
+        func: 任务函数，接受单个参数；其中的接口请求应通过 call 执行
+        items (iterable): 任务参数，如交易日列表
+        max_workers (int, optional): 线程数，默认为 MAX_CONCURRENCY；为 1 时在当前线程顺序执行
+
+    Yields:
+        tuple: (item, 返回值, 异常)，成功时异常为 None，失败时返回值为 None
+    """
+    workers = max_workers or MAX_CONCURRENCY
+    if workers <= 1:
+        for item in items:
+            yield (item,) + _run(func, item)
+        return
+
+    pending = deque()
+    items = iter(items)
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for item in items:
+            pending.append((item, pool.submit(_run, func, item)))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            item, future = pending.popleft()
+            result, error = future.result()
+            for next_item in items:
+                pending.append((next_item, pool.submit(_run, func, next_item)))
+                break
+            yield item, result, error
+    finally:
+        # 调用方提前停止迭代时取消尚未开始的任务
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,158 @@
+import asyncio
+import time
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils import fetch_executor
+
+"""
+获取 - 转换 - 写入 流水线
+逐日获取数据时，顺序执行会在写文件时让网络空闲、在等待响应时让磁盘空闲。本模块用 asyncio 调度三个阶段：
+- fetch:     阻塞的接口请求在线程池中执行，最多 fetch_workers 个同时进行（请求本身仍应通过 fetch_executor.call 限速）
+- transform: 格式整理等计算，在线程池中执行
+- write:     保存文件，在线程池中执行，单个写入任务按输入顺序依次进行
+阶段之间用有界队列连接，fetch(N+1) 与 transform(N)、write(N-1) 同时进行，内存中最多堆积 queue_size 个结果；
+写入顺序与输入顺序一致，输出与顺序执行相同
+已有运行中的事件循环时（如 Jupyter、异步调用方），流水线在工作线程中以新的事件循环运行
+
+用法:
+    run_pipeline(trading_dates, fetch=lambda d: call(jq.get_valuation, ...), write=lambda d, df: save_partition(...))
+"""
+
+# 阶段之间队列的默认容量
+QUEUE_SIZE = 4
+
+# 队列结束标记
+_DONE = object()
+
+class StageStats:
+    """单个阶段的计数：处理项数、行数（结果为 DataFrame 时）、失败数、累计耗时（秒）"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.rows = 0
+        self.errors = 0
+        self.seconds = 0.0
+
+    def add(self, seconds, data=None):
+        self.items += 1
+        self.seconds += seconds
+        shape = getattr(data, 'shape', None)
+        if shape:
+            self.rows += shape[0]
+
+    def to_dict(self, wall_seconds):
+        return {
+            'items': self.items,
+            'rows': self.rows,
+            'errors': self.errors,
+            'seconds': round(self.seconds, 3),
+            'items_per_second': round(self.items / wall_seconds, 3) if wall_seconds else None,
+        }
+
+async def _pipeline(items, fetch, transform, write, fetch_workers, queue_size, stats):
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=fetch_workers + 2)
+    fetched = asyncio.Queue(queue_size)
+    transformed = asyncio.Queue(queue_size)
+    slots = asyncio.Semaphore(fetch_workers)
+
+    async def timed(stage, func, *args):
+        start = time.perf_counter()
+        result = await loop.run_in_executor(pool, func, *args)
+        # write 阶段按写入的数据计行数
+        stats[stage].add(time.perf_counter() - start, args[-1] if stage == 'write' else result)
+        return result
+
+    async def fetch_one(item):
+        try:
+            return await timed('fetch', fetch, item)
+        finally:
+            slots.release()
+
+    async def produce():
+        # 按输入顺序入队，transform 按顺序等待各请求完成
+        for item in items:
+            await slots.acquire()
+            await fetched.put((item, asyncio.ensure_future(fetch_one(item))))
+        await fetched.put(_DONE)
+
+    async def transform_stage():
+        while (entry := await fetched.get()) is not _DONE:
+            item, task = entry
+            stage = 'fetch'
+            try:
+                data = await task
+                if transform is not None:
+                    stage = 'transform'
+                    data = await timed('transform', transform, item, data)
+            except Exception as e:
+                stats[stage].errors += 1
+                print(f"{item} {stage} 失败: {e}")
+                continue
+            if data is not None:
+                await transformed.put((item, data))
+        await transformed.put(_DONE)
+
+    async def write_stage():
+        while (entry := await transformed.get()) is not _DONE:
+            item, data = entry
+            if write is None:
+                continue
+            try:
+                await timed('write', write, item, data)
+            except Exception as e:
+                stats['write'].errors += 1
+                print(f"{item} write 失败: {e}")
+
+    try:
+        await asyncio.gather(produce(), transform_stage(), write_stage())
+    finally:
+        pool.shutdown(wait=True)
+
+def _run_coroutine(coroutine):
+    """运行协程；当前线程已有运行中的事件循环时 asyncio.run 会报错，改在工作线程中用新的事件循环运行"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as runner:
+        return runner.submit(asyncio.run, coroutine).result()
+
+def run_pipeline(items, fetch, transform=None, write=None, fetch_workers=None, queue_size=QUEUE_SIZE, verbose=True):
+    """
+    以流水线方式对 items 依次执行 fetch -> transform -> write
+
+    Args:
+        items (iterable): 任务参数，如交易日列表
+        fetch: fetch(item) -> data，阻塞的接口请求，应通过 fetch_executor.call 执行
+        transform (optional): transform(item, data) -> data
+        write (optional): write(item, data)，按 items 的顺序调用；fetch 或 transform 返回 None 的项不写入
+        fetch_workers (int, optional): 同时进行的 fetch 数，默认为 fetch_executor.MAX_CONCURRENCY
+        queue_size (int): 阶段之间队列的容量
+        verbose (bool): 是否打印各阶段的吞吐统计
+
+    Returns:
+        dict: {'wall_seconds': 总耗时, 'fetch' / 'transform' / 'write': 各阶段的 items, rows, errors,
+               seconds（累计耗时）, items_per_second}
+        某一阶段失败的项打印错误并跳过后续阶段，计入该阶段的 errors
+    """
+    stats = {stage: StageStats(stage) for stage in ('fetch', 'transform', 'write')}
+    workers = fetch_workers or fetch_executor.MAX_CONCURRENCY
+    start = time.perf_counter()
+    _run_coroutine(_pipeline(items, fetch, transform, write, workers, queue_size, stats))
+    wall_seconds = time.perf_counter() - start
+
+    result = {'wall_seconds': round(wall_seconds, 3)}
+    result.update({stage: stage_stats.to_dict(wall_seconds) for stage, stage_stats in stats.items()})
+    if verbose:
+        print(f"流水线完成，总耗时 {wall_seconds:.2f}s")
+        for stage, stage_stats in stats.items():
+            if stage_stats.items or stage_stats.errors:
+                print(f"  {stage}: {stage_stats.items} 项，{stage_stats.rows} 行，失败 {stage_stats.errors} 项，"
+                      f"累计耗时 {stage_stats.seconds:.2f}s，吞吐 {stage_stats.items / wall_seconds:.2f} 项/秒")
+    return result
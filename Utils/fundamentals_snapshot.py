@@ -0,0 +1,125 @@
+from Utils import jq_cache as jq
+import pandas as pd
+import os
+import sys
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.data_store import save_partition, find_partition, pq
+from Utils.get_trading_date import get_trading_dates, get_previous_trading_dates, get_latest_trading_date
+from Utils.statement_fetcher import plan_requests, fundamentals_pages, _short_name, KEY_FIELDS, \
+    FUNDAMENTALS_PAGE_SIZE
+
+"""
+全市场财务数据截面快照
+用 get_fundamentals(query(...), date=...) 一次获取全部股票在某一日已披露的最新一期季度报表，
+按 Config/fields_config.py 的字段配置合并请求（规则同 statement_fetcher.plan_requests），按页获取，
+每个日期保存为 financial_snapshot 下的一个分区文件（默认 Parquet 列式存储）
+
+列名：
+- code, pubDate, statDate 取自第一组请求（资产负债表、利润表、现金流量表）
+- 其他组请求的披露日期、报告期保存为 {表前缀}_pubDate、{表前缀}_statDate（如 indicator_statDate）
+- 与已有列重名的字段加表前缀，如 indicator.operating_profit 保存为 indicator_operating_profit
+
+调用前需先完成 jqdatasdk 认证
+"""
+
+# 快照默认包含的季度报表
+SNAPSHOT_TABLES = ['balance_quarter', 'income_quarter', 'cash_flow_quarter', 'indicator_quarter']
+# 快照分区的存储格式，未安装 pyarrow 时使用 Config/data_path.py 中的 STORAGE_FORMAT
+SNAPSHOT_FORMAT = 'parquet'
+
+def _build_query(fields, codes=None):
+    """由完整字段名列表构造 query，按 code 排序以保证分页稳定"""
+    columns = [getattr(getattr(jq, field.split('.', 1)[0]), _short_name(field)) for field in fields]
+    key_table = getattr(jq, fields[0].split('.', 1)[0])
+    q = jq.query(*columns)
+    if codes is not None:
+        q = q.filter(key_table.code.in_(list(codes)))
+    return q.order_by(key_table.code)
+
+def fetch_snapshot(date, tables=None, codes=None, save=True, page_size=FUNDAMENTALS_PAGE_SIZE):
+    """
+    获取某一日全市场（或指定股票）已披露的最新一期季度财务数据
+
+    Args:
+        date (str): 查询日期，格式为 'YYYY-MM-DD'，只使用该日之前已披露的报告
+        tables (list, optional): 季度表字段配置名列表，默认为 SNAPSHOT_TABLES
+        codes (list, optional): 股票代码列表，默认为全市场
+        save (bool): 是否保存为 financial_snapshot/{date} 分区
+        page_size (int): 每页行数
+
+    Returns:
+        DataFrame: 每只股票一行，包含 date, code, pubDate, statDate 及各表字段
+    """
+    tables = tables or SNAPSHOT_TABLES
+    for table in tables:
+        if not table.endswith('_quarter'):
+            raise ValueError(f"快照只支持季度报表: {table}")
+
+    snapshot = None
+    pages = 0
+    for request in plan_requests(tables):
+        frames = list(fundamentals_pages(_build_query(request['fields'], codes), page_size=page_size, date=date))
+        pages += len(frames)
+        if not frames:
+            continue
+        df = pd.concat(frames, ignore_index=True).drop_duplicates(subset='code', keep='last')
+        if snapshot is None:
+            snapshot = df
+            continue
+        prefix = request['fields'][0].split('.', 1)[0]
+        rename = {name: f"{prefix}_{name}" for name in df.columns
+                  if name != 'code' and (name in snapshot.columns or name in KEY_FIELDS)}
+        snapshot = snapshot.merge(df.rename(columns=rename), on='code', how='outer')
+
+    if snapshot is None:
+        print(f"{date} 没有财务数据")
+        return pd.DataFrame()
+    snapshot = snapshot.sort_values('code', ignore_index=True)
+    snapshot.insert(0, 'date', date)
+    print(f"{date} 财务数据快照: {len(snapshot)} 只股票，{snapshot.shape[1]} 列，{pages} 页")
+    if save:
+        save_path = save_partition(snapshot, 'financial_snapshot', date,
+                                   storage_format=SNAPSHOT_FORMAT if pq is not None else None)
+        print(f"已保存至: {save_path}")
+    return snapshot
+
+def update_snapshots(start_date=None, end_date=None, count=None, tables=None, overwrite=False):
+    """
+    按交易日获取财务数据快照，已存在的日期跳过
+
+    Args:
+        start_date (str): 开始日期（与count二选一）
+        end_date (str): 结束日期，默认为最新交易日
+        count (int): 获取截至end_date（含）的最近几个交易日（与start_date二选一）
+        tables (list, optional): 季度表字段配置名列表，默认为 SNAPSHOT_TABLES
+        overwrite (bool): 是否重新获取已存在的日期
+
+    Returns:
+        list: 本次获取的日期列表
+    """
+    end_date = end_date or get_latest_trading_date()
+    if count is not None:
+        # get_trading_dates 的 count 从起始日期向后数，这里需要截至 end_date 的最近 count 个交易日
+        start_date = get_previous_trading_dates([end_date], count)[0]
+        trading_dates = get_trading_dates(start_date, end_date)[-count:]
+    else:
+        trading_dates = get_trading_dates(start_date, end_date)
+    fetched = []
+    for trading_date in trading_dates:
+        if not overwrite and find_partition('financial_snapshot', trading_date)[0] is not None:
+            continue
+        try:
+            if not fetch_snapshot(trading_date, tables).empty:
+                fetched.append(trading_date)
+        except Exception as e:
+            print(f"{trading_date} 获取财务数据快照失败: {e}")
+    print(f"共获取 {len(fetched)} 个交易日的财务数据快照")
+    return fetched
+
+if __name__ == "__main__":
+    from Config.config import JQ_USERNAME, JQ_PASSWORD
+    jq.auth(JQ_USERNAME, JQ_PASSWORD)
+    df = fetch_snapshot('2025-08-27')
+    print(df[['code', 'pubDate', 'statDate', 'total_assets', 'net_profit', 'roe']].head())
@@ -0,0 +1,175 @@
+import numpy as np
+import os
+import sys
+import time
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.data_store import list_partition_dates
+from Utils.get_stock_list import get_stock_universe
+from Utils.get_trading_date import get_trading_calendar, get_latest_trading_date, _to_day
+from Utils.partition_manifest import load_manifest
+
+"""
+日期分区数据集缺口扫描
+不打开任何分区文件：每个数据集目录一次 scandir 得到已有的分区日期，完成清单（Utils/partition_manifest.py）提供各分区的行数，
+与交易日历、股票池（Utils/get_stock_list.py）比对：
+- missing:    交易日历中没有分区文件的交易日
+- incomplete: 清单记录的行数低于当日上市股票数 × COVERAGE 的分区（没有清单记录的旧文件不检查行数）
+缺口按交易日历上的连续区间合并为请求，区间内上市股票数 × 交易日数超过 max_rows 时按顺序拆分，
+每个请求对应一次获取函数调用（见 FETCHERS），请求数为覆盖全部缺口所需的最少区间数
+
+用法:
+    report = scan_gaps()
+    for request in report['stock_price']['requests']:
+        get_daily_price(request['start_date'], request['end_date'], ...)
+"""
+
+# 扫描的数据集
+GAP_DATASETS = ['stock_price', 'stock_valuation', 'money_flow', 'mtss_info', 'is_st', 'factor_data']
+
+# 各数据集的获取函数
+FETCHERS = {
+    'stock_price': 'get_price.get_daily_price',
+    'stock_valuation': 'get_valuation.get_valuation',
+    'money_flow': 'get_money_flow.get_stock_moneyflow',
+    'mtss_info': 'get_mtss.get_mtss_info',
+    'is_st': 'get_extras.get_is_st',
+    'factor_data': 'get_all_factor.get_jq_factors',
+}
+
+# 分区行数不低于当日上市股票数的比例，None 为不检查（融资融券只覆盖标的股票）
+COVERAGE = {
+    'stock_price': 0.95,
+    'stock_valuation': 0.9,
+    'money_flow': 0.9,
+    'mtss_info': None,
+    'is_st': 0.95,
+    'factor_data': 0.9,
+}
+
+# 单个请求的最大行数（股票数 × 交易日数），与 get_price.GET_PRICE_MAX_ROWS 一致
+MAX_REQUEST_ROWS = 200000
+
+def _build_requests(dataset, gap_positions, calendar_strs, counts, max_rows):
+    """
+    将缺口合并为交易日历上的连续区间，按 max_rows 拆分
+
+    Args:
+        gap_positions (numpy.ndarray): 缺口在交易日历中的位置（升序）
+        calendar_strs (numpy.ndarray): 扫描范围内的交易日字符串
+        counts (numpy.ndarray): 扫描范围内各交易日的上市股票数
+
+    Returns:
+        list: [{'dataset', 'fetcher', 'start_date', 'end_date', 'n_days', 'est_rows'}, ...]
+    """
+    requests = []
+    if not len(gap_positions):
+        return requests
+    # 相邻缺口不连续处断开
+    breaks = np.flatnonzero(np.diff(gap_positions) != 1) + 1
+    for run in np.split(gap_positions, breaks):
+        start = 0
+        rows = 0
+        for i, pos in enumerate(run):
+            day_rows = int(counts[pos])
+            if i > start and rows + day_rows > max_rows:
+                requests.append(_request(dataset, calendar_strs, run[start], run[i - 1], i - start, rows))
+                start, rows = i, 0
+            rows += day_rows
+        requests.append(_request(dataset, calendar_strs, run[start], run[-1], len(run) - start, rows))
+    return requests
+
+def _request(dataset, calendar_strs, first, last, n_days, rows):
+    """由缺口区间在交易日历中的首尾位置生成请求"""
+    return {
+        'dataset': dataset,
+        'fetcher': FETCHERS.get(dataset),
+        'start_date': str(calendar_strs[first]),
+        'end_date': str(calendar_strs[last]),
+        'n_days': int(n_days),
+        'est_rows': int(rows),
+    }
+
+def scan_dataset(dataset, start_date=None, end_date=None, max_rows=MAX_REQUEST_ROWS):
+    """
+    扫描单个数据集的缺口
+
+    Args:
+        dataset (str): 数据集
+        start_date (str, optional): 开始日期，默认为数据集最早的分区日期
+        end_date (str, optional): 结束日期，默认为最新交易日
+        max_rows (int): 单个请求的最大行数
+
+    Returns:
+        dict: {'dataset', 'start_date', 'end_date', 'expected_days', 'present_days',
+               'missing': 缺失的交易日, 'incomplete': 行数不足的交易日, 'requests': 补齐缺口的请求}
+    """
+    present = list_partition_dates(dataset)
+    report = {'dataset': dataset, 'start_date': start_date, 'end_date': end_date, 'expected_days': 0,
+              'present_days': len(present), 'missing': [], 'incomplete': [], 'requests': []}
+    if start_date is None:
+        if not len(present):
+            return report
+        start_date = present[0]
+    end_date = end_date or get_latest_trading_date()
+    report['start_date'], report['end_date'] = start_date, end_date
+
+    calendar = get_trading_calendar()
+    lo = np.searchsorted(calendar.dates, _to_day(start_date), side='left')
+    hi = np.searchsorted(calendar.dates, _to_day(end_date), side='right')
+    calendar_days = calendar.dates[lo:hi]
+    calendar_strs = calendar.date_strs[lo:hi]
+    report['expected_days'] = len(calendar_strs)
+    counts = get_stock_universe().listed_counts(calendar_days)
+
+    # 按 datetime64 比较（字符串数组与 object 数组的 isin 会退化为逐元素比较）
+    is_gap = ~np.isin(calendar_days, np.array(present, dtype='datetime64[D]'))
+    report['missing'] = calendar_strs[is_gap].tolist()
+
+    coverage = COVERAGE.get(dataset)
+    if coverage:
+        records = load_manifest(dataset)
+        if records:
+            rows = np.array([records[d]['rows'] if d in records else -1 for d in calendar_strs])
+            short = (rows >= 0) & ~is_gap & (rows < counts * coverage)
+            report['incomplete'] = calendar_strs[short].tolist()
+            is_gap |= short
+
+    report['requests'] = _build_requests(dataset, np.flatnonzero(is_gap), calendar_strs, counts, max_rows)
+    return report
+
+def scan_gaps(datasets=GAP_DATASETS, start_date=None, end_date=None, max_rows=MAX_REQUEST_ROWS, verbose=True):
+    """
+    扫描多个数据集的缺口并生成补齐请求
+
+    Args:
+        datasets (list): 数据集列表，默认为 GAP_DATASETS
+        start_date (str, optional): 开始日期，默认为各数据集最早的分区日期
+        end_date (str, optional): 结束日期，默认为最新交易日
+        max_rows (int): 单个请求的最大行数
+        verbose (bool): 是否打印扫描结果
+
+    Returns:
+        dict: {数据集: scan_dataset 的结果}
+    """
+    start = time.perf_counter()
+    reports = {dataset: scan_dataset(dataset, start_date, end_date, max_rows) for dataset in datasets}
+    elapsed = time.perf_counter() - start
+
+    if verbose:
+        print(f"扫描 {len(datasets)} 个数据集，耗时 {elapsed * 1000:.1f}ms")
+        for dataset, report in reports.items():
+            if not report['expected_days']:
+                print(f"  {dataset}: 无分区数据")
+                continue
+            print(f"  {dataset}: {report['start_date']} 至 {report['end_date']}，应有 {report['expected_days']} 个交易日，"
+                  f"缺失 {len(report['missing'])} 个，行数不足 {len(report['incomplete'])} 个，"
+                  f"需 {len(report['requests'])} 个请求")
+            for request in report['requests']:
+                print(f"    {request['fetcher']}: {request['start_date']} 至 {request['end_date']}，"
+                      f"{request['n_days']} 个交易日，约 {request['est_rows']} 行")
+    return reports
+
+if __name__ == "__main__":
+    reports = scan_gaps()
@@ -0,0 +1,178 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Config.data_path import get_path
+from Config.fields_config import FINANCIAL_FIELDS, TABLE_OUTPUTS
+from Utils.pit_store import read_statement_files
+
+"""
+季度财务数据衍生计算
+利润表、现金流量表的季度数据为年初至报告期末的累计值，对所有股票一次性计算：
+- {字段}_sq:  单季度值（Q1 为累计值，Q2~Q4 为本期累计值减上期累计值）
+- {字段}_ttm: 滚动四个季度合计（最近四个单季度之和，缺任一季度为 NaN）
+- {字段}_yoy: 单季度同比增长率，(本季 - 去年同季) / |去年同季|
+- {字段}_qoq: 单季度环比增长率，(本季 - 上季) / |上季|
+结果保存至 Database/financial_derived/{表}.pkl，更新时只重新计算有新报告的股票
+"""
+
+# 需要衍生计算的季度累计表
+DERIVED_TABLES = ['income_quarter', 'cash_flow_quarter']
+# 衍生字段后缀
+DERIVED_SUFFIXES = ['_sq', '_ttm', '_yoy', '_qoq']
+# 股票序号与季度序号的合并键中，季度占用的位数
+_QUARTER_BITS = 16
+
+def _derived_file(table):
+    return os.path.join(get_path('financial_derived'), f"{table}.pkl")
+
+def _value_fields(table):
+    """表中参与衍生计算的数值字段（去掉 code/pubDate/statDate）"""
+    return [field.split('.', 1)[1] for field in FINANCIAL_FIELDS[table]
+            if field.split('.', 1)[1] not in ('code', 'pubDate', 'statDate')]
+
+def _growth(current, previous):
+    """增长率，上期为 0 或缺失时为 NaN"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(previous != 0, (current - previous) / np.abs(previous), np.nan)
+
+def _lag(keys, n):
+    """每行前 n 个季度所在的位置及是否存在"""
+    target = keys - n
+    pos = np.minimum(np.searchsorted(keys, target), len(keys) - 1)
+    return pos, keys[pos] == target
+
+def derive_quarterly(df, fields=None, cumulative=True):
+    """
+    计算单季度、TTM、同比、环比
+
+    Args:
+        df (DataFrame): 季度报表长表，包含 code, pubDate, statDate 及数值字段，可包含多只股票
+        fields (list, optional): 参与计算的字段，默认为 df 中除 code/pubDate/statDate 外的全部列
+        cumulative (bool): 输入是否为年初至今累计值；为 False 时输入已是单季度值，_sq 即原值
+
+    Returns:
+        DataFrame: 每个 (code, statDate) 一行，包含 code, pubDate, statDate 及各字段的衍生列，按 (code, statDate) 排序
+    """
+    if fields is None:
+        fields = [column for column in df.columns if column not in ('code', 'pubDate', 'statDate')]
+    df = df.dropna(subset=['code', 'statDate']).copy()
+    df['pubDate'] = pd.to_datetime(df['pubDate'])
+    df['statDate'] = pd.to_datetime(df['statDate'])
+    # 同一报告期多次披露时以最新披露为准
+    df = df.sort_values(['code', 'statDate', 'pubDate'], kind='stable')
+    df = df.drop_duplicates(subset=['code', 'statDate'], keep='last').reset_index(drop=True)
+    if df.empty:
+        return pd.DataFrame(columns=['code', 'pubDate', 'statDate'] +
+                            [f"{field}{suffix}" for field in fields for suffix in DERIVED_SUFFIXES])
+
+    stat = df['statDate']
+    quarter = (stat.dt.year.to_numpy() * 4 + (stat.dt.month.to_numpy() - 1) // 3).astype(np.int64)
+    is_q1 = stat.dt.month.to_numpy() <= 3
+    _, code_idx = np.unique(df['code'].to_numpy().astype(str), return_inverse=True)
+    # 按 (code, statDate) 排序后合并键有序，前 n 个季度的位置由 searchsorted 一次得到
+    keys = (code_idx.astype(np.int64) << _QUARTER_BITS) | quarter
+
+    values = df[fields].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    prev_pos, prev_found = _lag(keys, 1)
+    if cumulative:
+        single = np.where(is_q1[:, None], values,
+                          np.where(prev_found[:, None], values - values[prev_pos], np.nan))
+    else:
+        single = values
+
+    ttm = single.copy()
+    for n in (1, 2, 3):
+        pos, found = _lag(keys, n)
+        ttm += np.where(found[:, None], single[pos], np.nan)
+    year_pos, year_found = _lag(keys, 4)
+    yoy = _growth(single, np.where(year_found[:, None], single[year_pos], np.nan))
+    qoq = _growth(single, np.where(prev_found[:, None], single[prev_pos], np.nan))
+
+    columns = {'code': df['code'].to_numpy(), 'pubDate': df['pubDate'].to_numpy(), 'statDate': stat.to_numpy()}
+    for i, field in enumerate(fields):
+        for suffix, result in zip(DERIVED_SUFFIXES, (single, ttm, yoy, qoq)):
+            columns[f"{field}{suffix}"] = result[:, i]
+    return pd.DataFrame(columns)
+
+def _updated_codes(table, since):
+    """源目录中修改时间晚于 since 的 {code}.csv 对应的股票"""
+    source_dir = os.path.join(get_path('financial_data'), TABLE_OUTPUTS[table][0])
+    if not os.path.isdir(source_dir):
+        return []
+    with os.scandir(source_dir) as entries:
+        return [entry.name[:-4] for entry in entries
+                if entry.name.endswith('.csv') and entry.stat().st_mtime > since]
+
+def update_derived_tables(tables=None, cumulative=True, rebuild=False):
+    """
+    计算并保存衍生表
+    已有衍生表时，只重新计算源文件在衍生表保存之后有更新的股票，其余股票沿用已有结果
+
+    Args:
+        tables (list, optional): 字段配置名列表，默认为 DERIVED_TABLES
+        cumulative (bool): 源数据是否为年初至今累计值
+        rebuild (bool): 是否全部重新计算
+
+    Returns:
+        dict: {表: 衍生表 DataFrame}
+    """
+    results = {}
+    os.makedirs(get_path('financial_derived'), exist_ok=True)
+    for table in tables or DERIVED_TABLES:
+        name = TABLE_OUTPUTS[table][1]
+        file_path = _derived_file(table)
+        existing = None
+        codes = None
+        if not rebuild and os.path.exists(file_path):
+            codes = _updated_codes(table, os.path.getmtime(file_path))
+            existing = pd.read_pickle(file_path)
+            if not codes:
+                print(f"{name}没有新的报告，沿用已有衍生表")
+                results[table] = existing
+                continue
+            print(f"{name}有 {len(codes)} 只股票的报告有更新，重新计算")
+
+        source = read_statement_files(table, codes)
+        if source is None:
+            print(f"{name}没有源数据")
+            results[table] = existing
+            continue
+        fields = [field for field in _value_fields(table) if field in source.columns]
+        derived = derive_quarterly(source, fields, cumulative)
+        if existing is not None:
+            kept = existing[~existing['code'].isin(derived['code'].unique())]
+            derived = pd.concat([kept, derived], ignore_index=True)
+            derived = derived.sort_values(['code', 'statDate'], kind='stable', ignore_index=True)
+        derived.to_pickle(file_path)
+        print(f"{name}衍生数据已保存至: {file_path} ({len(derived)} 行, {derived['code'].nunique()} 只股票)")
+        results[table] = derived
+    return results
+
+def load_derived_table(table, codes=None):
+    """
+    读取已保存的衍生表
+
+    Args:
+        table (str): 字段配置名，如 'income_quarter'
+        codes (list, optional): 股票代码列表，默认返回全部股票
+
+    Returns:
+        DataFrame: 衍生表，不存在时为空 DataFrame
+    """
+    file_path = _derived_file(table)
+    if not os.path.exists(file_path):
+        print(f"{file_path} 不存在，请先运行 update_derived_tables")
+        return pd.DataFrame()
+    df = pd.read_pickle(file_path)
+    if codes is not None:
+        df = df[df['code'].isin(codes)].reset_index(drop=True)
+    return df
+
+if __name__ == "__main__":
+    update_derived_tables()
+    df = load_derived_table('income_quarter', ['000001.XSHE', '600519.XSHG'])
+    print(df[['code', 'pubDate', 'statDate', 'net_profit_sq', 'net_profit_ttm', 'net_profit_yoy', 'net_profit_qoq']].tail(10))
@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 import os
 import sys
 from datetime import datetime
@@ -7,6 +8,142 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from Config.data_path import get_path
 from Utils.get_trading_date import *
+from Utils.get_trading_date import _to_day, _to_days
+
+class StockUniverse:
+    """
+    股票池区间索引
+    由 all_securities_stock.csv 一次性构建，每只股票的上市区间 [start_date, end_date]
+    以 datetime64[D] 数组保存，并按 start_date 排序，查询时二分查找
+    """
+
+    def __init__(self, stock_df):
+        """
+        Args:
+            stock_df (DataFrame): 证券信息表，包含 code, start_date, end_date, type 列
+        """
+        stock_df = stock_df[stock_df['type'] == 'stock']
+        # 保持文件中的顺序，返回的股票列表与原实现一致
+        self.codes = stock_df['code'].to_numpy(dtype=object)
+        self.start_dates = pd.to_datetime(stock_df['start_date']).values.astype('datetime64[D]')
+        self.end_dates = pd.to_datetime(stock_df['end_date']).values.astype('datetime64[D]')
+        self._code_index = pd.Index(self.codes)
+        self._order = np.argsort(self.start_dates, kind='stable')
+        self._sorted_start = self.start_dates[self._order]
+        self._sorted_end = np.sort(self.end_dates)
+
+    @classmethod
+    def from_csv(cls, file_path):
+        """从证券信息文件构建股票池索引"""
+        return cls(pd.read_csv(file_path))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def get_list(self, trade_date):
+        """
+        获取trade_date当天上市（start_date <= trade_date <= end_date）的股票代码列表
+
+        Returns:
+            list: 股票代码列表，格式：['000001.XSHE', '000002.XSHE', ...]
+        """
+        day = _to_day(trade_date)
+        # start_date <= day 的股票为排序后数组的前缀
+        listed = self._order[:np.searchsorted(self._sorted_start, day, side='right')]
+        listed = listed[self.end_dates[listed] >= day]
+        listed.sort()
+        return self.codes[listed].tolist()
+
+    def get_window_list(self, start_date, end_date):
+        """
+        获取[start_date, end_date]区间内任意一天处于上市状态的股票代码列表（区间并集）
+
+        Returns:
+            list: 股票代码列表
+        """
+        listed = (self.start_dates <= _to_day(end_date)) & (self.end_dates >= _to_day(start_date))
+        return self.codes[listed].tolist()
+
+    def is_listed(self, codes, dates):
+        """
+        逐元素判断 (code, date) 是否在上市区间内
+
+        Args:
+            codes: 股票代码数组
+            dates: 日期数组，与codes等长
+
+        Returns:
+            numpy.ndarray: bool 数组，未知股票为 False
+        """
+        pos = self._code_index.get_indexer(np.asarray(codes))
+        days = _to_days(dates)
+        safe = np.maximum(pos, 0)
+        return (pos >= 0) & (self.start_dates[safe] <= days) & (self.end_dates[safe] >= days)
+
+    def membership(self, dates):
+        """
+        计算日期 × 股票的上市状态矩阵
+
+        Args:
+            dates: 日期数组
+
+        Returns:
+            numpy.ndarray: bool 矩阵，形状 (len(dates), len(codes))，列顺序与 self.codes 一致
+        """
+        days = _to_days(dates)[:, None]
+        return (self.start_dates[None, :] <= days) & (self.end_dates[None, :] >= days)
+
+    def listed_counts(self, dates):
+        """
+        各日期上市的股票数（start_date <= date 的数量减去 end_date < date 的数量，不生成上市状态矩阵）
+
+        Args:
+            dates: 日期数组
+
+        Returns:
+            numpy.ndarray: 与 dates 对应的股票数
+        """
+        days = _to_days(dates)
+        return (np.searchsorted(self._sorted_start, days, side='right')
+                - np.searchsorted(self._sorted_end, days, side='left'))
+
+    def get_lists(self, dates):
+        """
+        一次性获取多个日期的股票代码列表
+
+        Args:
+            dates: 日期数组
+
+        Returns:
+            dict: {date: 股票代码列表}，键与输入日期一致
+        """
+        dates = list(dates)
+        matrix = self.membership(dates)
+        return {date: self.codes[row].tolist() for date, row in zip(dates, matrix)}
+
+# 进程内缓存的股票池索引，证券信息文件修改时间变化时自动重建
+_UNIVERSE = None
+_UNIVERSE_MTIME = None
+
+def _instruments_file():
+    """证券信息文件路径"""
+    return os.path.join(get_path('cn_stock_instruments'), 'all_securities_stock.csv')
+
+def get_stock_universe():
+    """
+    获取进程内缓存的股票池索引
+    仅当 all_securities_stock.csv 的修改时间变化时重新读取
+
+    Returns:
+        StockUniverse: 股票池索引
+    """
+    global _UNIVERSE, _UNIVERSE_MTIME
+    full_file_path = _instruments_file()
+    mtime = os.path.getmtime(full_file_path)
+    if _UNIVERSE is None or mtime != _UNIVERSE_MTIME:
+        _UNIVERSE = StockUniverse.from_csv(full_file_path)
+        _UNIVERSE_MTIME = mtime
+    return _UNIVERSE
 
 def get_stock_list(trade_date):
     """
@@ -20,42 +157,34 @@ def get_stock_list(trade_date):
     Returns:
         list: 股票代码列表，格式：['000001.XSHE', '000002.XSHE', ...]
     """
-    # 读取股票代码列表文件
-    file_path = get_path('cn_stock_instruments')
-    
-    # 构建文件名
-    file_name = 'all_securities_stock.csv'
-    full_file_path = os.path.join(file_path, file_name)
-    
     try:
-        # 读取股票数据
-        stock_df = pd.read_csv(full_file_path)
-        
-        # 转换日期格式
-        stock_df['start_date'] = pd.to_datetime(stock_df['start_date'])
-        stock_df['end_date'] = pd.to_datetime(stock_df['end_date'])
-        target_date = pd.to_datetime(trade_date)
-        
-        # 过滤出在指定日期有效的股票
-        # 股票有效条件：start_date <= target_date <= end_date 且 type为stock
-        valid_stocks = stock_df[
-            (stock_df['start_date'] <= target_date) & 
-            (stock_df['end_date'] >= target_date) & 
-            (stock_df['type'] == 'stock')
-        ]
-        
-        # 获取股票代码列表
-        stock_list = valid_stocks['code'].tolist()
-        
-        return stock_list
-        
+        return get_stock_universe().get_list(trade_date)
     except FileNotFoundError:
-        print(f"股票数据文件未找到: {full_file_path}")
+        print(f"股票数据文件未找到: {_instruments_file()}")
         return []
     except Exception as e:
         print(f"获取股票列表时出错: {e}")
         return []
 
+def get_stock_lists(dates):
+    """
+    一次性获取多个日期的股票代码列表（单次向量化计算，不逐日过滤）
+
+    Args:
+        dates (list): 交易日期列表，格式：['YYYY-MM-DD', ...]
+
+    Returns:
+        dict: {date: 股票代码列表}
+    """
+    try:
+        return get_stock_universe().get_lists(dates)
+    except FileNotFoundError:
+        print(f"股票数据文件未找到: {_instruments_file()}")
+        return {}
+    except Exception as e:
+        print(f"获取股票列表时出错: {e}")
+        return {}
+
 # 示例用法
 if __name__ == "__main__":
     # 测试获取指定日期的股票列表
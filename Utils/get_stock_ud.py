@@ -1,24 +1,154 @@
 import pandas as pd
+import numpy as np
 import os
 import sys
 
 # 添加项目根目录到系统路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from Config.data_path import get_path
-from Utils.get_trading_date import get_trading_dates
+from Utils.get_trading_date import get_trading_dates, get_previous_trading_date
+from Utils.data_store import save_partition, read_partition, load
 
-def get_stock_ud(start_date=None, end_date=None, count=None):
+"""
+股票涨跌停计算
+基于 stock_price 中的 high/low/close/high_limit/low_limit，对整个日期区间一次性按 (日期 × 股票) 面板计算：
+- zt/dt:             最高价触及涨停价 / 最低价触及跌停价
+- zt_close/dt_close: 收盘价等于涨停价 / 跌停价（封板）
+- zt_open/dt_open:   盘中触及涨停 / 跌停但收盘未封住（开板、炸板）
+- zt_streak/dt_streak: 截至当日连续收盘涨停 / 跌停的交易日数（连板数），停牌或未封板即中断
+面板按交易日历展开，stock_price 缺失的交易日为空行，连板数在缺失的交易日中断，不会跨过缺口继续累计
+"""
+
+# 价格比较容差
+PRICE_EPS = 1e-6
+# 计算所需的行情字段
+PRICE_FIELDS = ['high', 'low', 'close', 'high_limit', 'low_limit']
+# 输出的标记字段
+UD_FIELDS = ['zt', 'dt', 'zt_close', 'dt_close', 'zt_open', 'dt_open', 'zt_streak', 'dt_streak']
+
+def _streak(flags, seed=None):
+    """
+    沿日期轴计算连续为 True 的天数
+
+    Args:
+        flags (numpy.ndarray): bool 矩阵，形状 (日期数, 股票数)
+        seed (numpy.ndarray, optional): 区间开始前一日的连续天数，形状 (股票数,)
+
+    Returns:
+        numpy.ndarray: int32 矩阵，形状与 flags 相同
+    """
+    n_codes = flags.shape[1]
+    seed = np.zeros(n_codes, dtype=np.int32) if seed is None else seed.astype(np.int32)
+    counts = np.cumsum(np.vstack([seed, flags.astype(np.int32)]), axis=0)
+    # 每遇到 False 记录当时的累计值，之后的连续天数 = 累计值 - 最近一次 False 时的累计值
+    resets = np.where(np.vstack([np.zeros((1, n_codes), dtype=bool), ~flags]), counts, 0)
+    return (counts - np.maximum.accumulate(resets, axis=0))[1:]
+
+def compute_limit_panel(high, low, close, high_limit, low_limit, zt_seed=None, dt_seed=None):
+    """
+    按面板计算涨跌停标记
+
+    Args:
+        high, low, close, high_limit, low_limit (numpy.ndarray): float 矩阵，形状 (日期数, 股票数)，缺失为 NaN
+        zt_seed, dt_seed (numpy.ndarray, optional): 区间开始前一日的连板数，形状 (股票数,)
+
+    Returns:
+        dict: {'valid': bool 矩阵, 字段: 矩阵}，字段见 UD_FIELDS
+    """
+    valid = ~(np.isnan(high) | np.isnan(low) | np.isnan(high_limit) | np.isnan(low_limit))
+    with np.errstate(invalid='ignore'):
+        zt = valid & (np.abs(high - high_limit) < PRICE_EPS)
+        dt = valid & (np.abs(low - low_limit) < PRICE_EPS)
+        zt_close = valid & (np.abs(close - high_limit) < PRICE_EPS)
+        dt_close = valid & (np.abs(close - low_limit) < PRICE_EPS)
+    return {
+        'valid': valid,
+        'zt': zt,
+        'dt': dt,
+        'zt_close': zt_close,
+        'dt_close': dt_close,
+        'zt_open': zt & ~zt_close,
+        'dt_open': dt & ~dt_close,
+        'zt_streak': _streak(zt_close, zt_seed),
+        'dt_streak': _streak(dt_close, dt_seed),
+    }
+
+def panel_to_frame(dates, codes, result):
+    """
+    面板结果转换为长表，只保留有效行情的 (日期, 股票)
+
+    Returns:
+        DataFrame: 包含 date, code（分类类型）及 UD_FIELDS 的长表，按 (date, code) 排序
+    """
+    rows, cols = np.nonzero(result['valid'])
+    # 日期、代码以分类编码构造，避免生成上千万个字符串对象
+    date_strs = pd.to_datetime(np.asarray(dates)).strftime('%Y-%m-%d')
+    df = pd.DataFrame({'date': pd.Categorical.from_codes(rows, categories=date_strs),
+                       'code': pd.Categorical.from_codes(cols, categories=pd.Index(codes))})
+    for field in UD_FIELDS:
+        df[field] = result[field][rows, cols].astype(np.int32)
+    return df
+
+def summarize_panel(dates, result):
+    """
+    按日汇总涨跌停数量
+
+    Returns:
+        DataFrame: 每个交易日一行，包含股票数、涨跌停、封板、开板数量及最高连板数
+    """
+    summary = pd.DataFrame({'date': pd.to_datetime(np.asarray(dates)).strftime('%Y-%m-%d'),
+                            'total': result['valid'].sum(axis=1)})
+    for field in ['zt', 'dt', 'zt_close', 'dt_close', 'zt_open', 'dt_open']:
+        summary[field] = result[field].sum(axis=1)
+    summary['zt_streak_2plus'] = (result['zt_streak'] >= 2).sum(axis=1)
+    summary['max_zt_streak'] = result['zt_streak'].max(axis=1, initial=0)
+    summary['max_dt_streak'] = result['dt_streak'].max(axis=1, initial=0)
+    return summary
+
+def _reindex_panel(panel, trading_dates):
+    """
+    将 load(as_panel=True) 的面板按交易日历展开，缺失的交易日填充 NaN
+
+    Returns:
+        dict: 与 panel 结构相同，dates 为 trading_dates 对应的 datetime64 数组
+    """
+    dates = np.array(trading_dates, dtype='datetime64[D]').astype(panel['dates'].dtype)
+    rows = np.searchsorted(dates, panel['dates'])
+    fields = {}
+    for field, values in panel['fields'].items():
+        full = np.full((len(dates), values.shape[1]), np.nan)
+        full[rows] = values
+        fields[field] = full
+    return {'dates': dates, 'codes': panel['codes'], 'fields': fields}
+
+def _load_streak_seed(trading_date, codes):
+    """读取区间开始前一交易日的连板数，用于跨区间延续连板计数"""
+    prev_date = get_previous_trading_date(trading_date)
+    prev_df = read_partition('stock_ud', prev_date, columns=['code', 'zt_streak', 'dt_streak']) if prev_date else None
+    if prev_df is None or 'zt_streak' not in prev_df.columns:
+        print(f"  未找到 {prev_date} 的连板数据，连板数从 0 开始计算")
+        return None, None
+    pos = pd.Index(codes).get_indexer(prev_df['code'])
+    known = pos >= 0
+    zt_seed = np.zeros(len(codes), dtype=np.int32)
+    dt_seed = np.zeros(len(codes), dtype=np.int32)
+    zt_seed[pos[known]] = prev_df['zt_streak'].to_numpy()[known]
+    dt_seed[pos[known]] = prev_df['dt_streak'].to_numpy()[known]
+    return zt_seed, dt_seed
+
+def get_stock_ud(start_date=None, end_date=None, count=None, save=True):
     """
     判断股票涨跌停情况
     如果high=high_limit，说明当天存在涨停的情况，zt=1
     如果low=low_limit，说明当天存在跌停的情况，dt=1
-    
+    同时计算封板、开板标记和连板数，结果按日期分区保存至 stock_ud
+
     参数：
     start_date: 开始日期（与count二选一）
     end_date: 结束日期（可选，当使用count时作为结束日期）
     count: 查询交易日天数，表示获取end_date之前几个交易日的数据（与start_date二选一）
-    
+    save: 是否保存结果
+
     Returns:
         dict: 按日期分组的数据字典 {date: DataFrame}
     """
@@ -29,120 +159,89 @@ def get_stock_ud(start_date=None, end_date=None, count=None):
     else:
         # 使用日期范围时，获取start_date到end_date的交易日
         trading_dates = get_trading_dates(start_date, end_date)
-    
+
     if not trading_dates:
         print("未找到交易日")
         return {}
-    
+
     print(f"计划处理 {len(trading_dates)} 个交易日的涨跌停数据")
-    
-    # 创建保存目录
-    save_dir = get_path('stock_ud')
-    
-    # 按日期处理
+
+    # 一次性读取整个区间的行情面板
+    panel = load('stock_price', trading_dates[0], trading_dates[-1], fields=PRICE_FIELDS, as_panel=True)
+    if len(panel['dates']) == 0:
+        print("  区间内没有价格数据")
+        return {}
+
+    missing = sorted(set(trading_dates) - set(pd.to_datetime(panel['dates']).strftime('%Y-%m-%d')))
+    if missing:
+        print(f"  {len(missing)} 个交易日价格数据不存在: {missing[:5]}，连板数在这些交易日中断")
+        panel = _reindex_panel(panel, trading_dates)
+
+    zt_seed, dt_seed = _load_streak_seed(trading_dates[0], panel['codes'])
+    fields = panel['fields']
+    result = compute_limit_panel(fields['high'], fields['low'], fields['close'],
+                                 fields['high_limit'], fields['low_limit'], zt_seed, dt_seed)
+    result_df = panel_to_frame(panel['dates'], panel['codes'], result)
+    summary = summarize_panel(panel['dates'], result)
+
+    # 按日期保存
     daily_data_dict = {}
-    processed_days = []
-    
-    for i, trading_date in enumerate(trading_dates):
-        print(f"\n=== 处理交易日 {i+1}/{len(trading_dates)}: {trading_date} ===")
-        
-        try:
-            # 读取价格数据文件
-            price_file = os.path.join(get_path('stock_price_old'), f"{trading_date}.csv")
-            
-            if not os.path.exists(price_file):
-                print(f"  价格数据文件不存在: {price_file}")
-                continue
-            
-            # 读取价格数据
-            df = pd.read_csv(price_file)
-            
-            if df.empty:
-                print(f"  {trading_date} 价格数据为空")
-                continue
-            
-            # 初始化结果DataFrame
-            result_df = pd.DataFrame(columns=['date', 'code', 'zt', 'dt'])
-            
-            # 处理每只股票
-            for _, row in df.iterrows():
-                code = row['code']
-                high = row['high']
-                low = row['low']
-                high_limit = row['high_limit']
-                low_limit = row['low_limit']
-                
-                # 检查数据是否有效
-                if pd.isna(high) or pd.isna(low) or pd.isna(high_limit) or pd.isna(low_limit):
-                    continue
-                
-                # 判断涨跌停
-                zt = 1 if abs(high - high_limit) < 1e-6 else 0  # 涨停
-                dt = 1 if abs(low - low_limit) < 1e-6 else 0    # 跌停
-                
-                # 添加到结果
-                result_row = {
-                    'date': trading_date,
-                    'code': code,
-                    'zt': zt,
-                    'dt': dt
-                }
-                result_df = pd.concat([result_df, pd.DataFrame([result_row])], ignore_index=True)
-            
-            if not result_df.empty:
-                # 保存结果
-                save_path = os.path.join(save_dir, f"{trading_date}.csv")
-                result_df.to_csv(save_path, index=False, encoding='utf-8-sig')
-                
-                # 统计涨跌停情况
-                zt_count = result_df['zt'].sum()
-                dt_count = result_df['dt'].sum()
-                total_stocks = len(result_df)
-                
-                print(f"  成功处理 {trading_date} 数据: {total_stocks} 只股票")
-                print(f"  涨停股票: {zt_count} 只 ({zt_count/total_stocks*100:.1f}%)")
-                print(f"  跌停股票: {dt_count} 只 ({dt_count/total_stocks*100:.1f}%)")
-                print(f"  数据已保存至: {save_path}")
-                
-                # 保存到字典
-                daily_data_dict[trading_date] = result_df
-                processed_days.append(trading_date)
-            else:
-                print(f"  {trading_date} 未获取到有效数据")
-                
-        except Exception as e:
-            print(f"  处理 {trading_date} 数据时出错: {e}")
-            continue
-    
+    for trading_date, day_df in result_df.groupby('date', sort=True, observed=True):
+        day_df = day_df.astype({'date': str, 'code': str}).reset_index(drop=True)
+        if save:
+            save_partition(day_df, 'stock_ud', trading_date)
+        daily_data_dict[trading_date] = day_df
+
     # 输出汇总信息
     print(f"\n=== 涨跌停数据处理汇总 ===")
     print(f"计划处理: {len(trading_dates)} 个交易日")
-    print(f"成功处理: {len(processed_days)} 个交易日")
-    print(f"完成日期: {processed_days}")
-    
+    print(f"成功处理: {len(daily_data_dict)} 个交易日")
+    print(summary.to_string(index=False, max_rows=20))
+
     # 统计总体涨跌停情况
     if daily_data_dict:
-        total_records = sum(len(df) for df in daily_data_dict.values())
-        total_zt = sum(df['zt'].sum() for df in daily_data_dict.values())
-        total_dt = sum(df['dt'].sum() for df in daily_data_dict.values())
-        
+        total_records = summary['total'].sum()
+        total_zt = summary['zt'].sum()
+        total_dt = summary['dt'].sum()
+
         print(f"总记录数: {total_records}")
         print(f"总涨停次数: {total_zt}")
         print(f"总跌停次数: {total_dt}")
         print(f"涨停比例: {total_zt/total_records*100:.2f}%")
         print(f"跌停比例: {total_dt/total_records*100:.2f}%")
-    
+
     return daily_data_dict
 
+def get_stock_ud_summary(start_date, end_date=None):
+    """
+    从已保存的涨跌停数据按日汇总
+
+    Returns:
+        DataFrame: 每个交易日一行，包含股票数及各标记的数量、最高连板数
+    """
+    df = load('stock_ud', start_date, end_date or start_date)
+    if df.empty:
+        return pd.DataFrame()
+    flag_fields = [f for f in ['zt', 'dt', 'zt_close', 'dt_close', 'zt_open', 'dt_open'] if f in df.columns]
+    summary = df.groupby('date')[flag_fields].sum()
+    summary.insert(0, 'total', df.groupby('date').size())
+    if 'zt_streak' in df.columns:
+        summary['zt_streak_2plus'] = (df['zt_streak'] >= 2).groupby(df['date']).sum()
+        summary['max_zt_streak'] = df.groupby('date')['zt_streak'].max()
+        summary['max_dt_streak'] = df.groupby('date')['dt_streak'].max()
+    summary = summary.reset_index()
+    summary['date'] = summary['date'].dt.strftime('%Y-%m-%d')
+    return summary
+
 def get_stock_ud_by_date(date):
     """
     获取指定日期的涨跌停数据
-    
+
     参数：
     date: 日期字符串，格式为 'YYYY-MM-DD'
-    
+
     Returns:
-        DataFrame: 涨跌停数据，包含列：date, code, zt, dt
+        DataFrame: 涨跌停数据，包含列：date, code 及 UD_FIELDS
     """
     return get_stock_ud(start_date=date, end_date=date)
 
@@ -152,15 +251,19 @@ if __name__ == "__main__":
     start_date = '2024-08-21'
     end_date = '2024-08-23'
     result1 = get_stock_ud(start_date=start_date, end_date=end_date)
-    
+
     # 示例2: 使用count处理最近N个交易日
     print("\n=== 示例2: 使用count处理最近3个交易日的涨跌停数据 ===")
     count = 3
     # result2 = get_stock_ud(count=count)
-    
+
     # 示例3: 处理单个交易日
     print("\n=== 示例3: 处理单个交易日的涨跌停数据 ===")
     date = '2024-08-21'
     # result3 = get_stock_ud_by_date(date)
-    
-    print("\n请取消注释相应的示例代码来运行测试")
\ No newline at end of file
+
+    # 示例4: 按日汇总已保存的涨跌停数据
+    print("\n=== 示例4: 按日汇总已保存的涨跌停数据 ===")
+    # summary = get_stock_ud_summary(start_date, end_date)
+
+    print("\n请取消注释相应的示例代码来运行测试")
@@ -1,5 +1,5 @@
 import pandas as pd
-import pickle
+import numpy as np
 import os
 import sys
 from datetime import datetime
@@ -8,6 +8,207 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from Config.data_path import get_path
 
+def _to_day(date):
+    """
+    将日期转换为 numpy.datetime64[D]
+
+    Args:
+        date: 日期，支持 'YYYY-MM-DD' 及 pd.Timestamp 可解析的其他格式字符串（如 '2020/01/10'）、datetime、date、Timestamp
+
+    Returns:
+        numpy.datetime64: 精确到日的日期
+    """
+    # 'YYYY-MM-DD' 直接转换，其他格式交给 pd.Timestamp 解析
+    if isinstance(date, str) and len(date) == 10 and date[4] == '-' and date[7] == '-':
+        return np.datetime64(date, 'D')
+    return np.datetime64(pd.Timestamp(date).date(), 'D')
+
+def _to_days(dates):
+    """
+    将日期数组转换为 numpy.datetime64[D] 数组
+
+    Args:
+        dates: 日期数组，支持 list、numpy 数组、pandas Series/Index
+
+    Returns:
+        numpy.ndarray: datetime64[D] 数组，无法解析的日期为 NaT
+    """
+    values = pd.to_datetime(pd.Series(np.asarray(dates)), errors='coerce')
+    return values.values.astype('datetime64[D]')
+
+def _wrap_like(dates, result):
+    """按输入类型返回结果：Series保留原索引，Index返回DatetimeIndex，其余返回numpy数组"""
+    if isinstance(dates, pd.Series):
+        return pd.Series(result.astype('datetime64[ns]'), index=dates.index, name=dates.name)
+    if isinstance(dates, pd.Index):
+        return pd.DatetimeIndex(result.astype('datetime64[ns]'), name=dates.name)
+    return result
+
+class TradingCalendar:
+    """
+    交易日历
+    交易日以升序 datetime64[D] 数组保存，区间、偏移、是否交易日的查询均通过二分查找完成
+    """
+
+    def __init__(self, trade_dates):
+        """
+        Args:
+            trade_dates: 交易日序列（任意可被 pd.to_datetime 解析的日期）
+        """
+        dates = pd.to_datetime(pd.Series(trade_dates)).values.astype('datetime64[D]')
+        self.dates = np.unique(dates)
+        # 预先生成字符串，避免每次查询时格式化
+        self.date_strs = np.datetime_as_string(self.dates, unit='D')
+
+    @classmethod
+    def from_pickle(cls, file_path):
+        """从 date.pkl 构建交易日历"""
+        df = pd.read_pickle(file_path)
+        return cls(df['trade_date'])
+
+    def __len__(self):
+        return len(self.dates)
+
+    def get_range(self, start_date, end_date=None, count=None):
+        """
+        获取start_date起（含）的交易日，可选截止到end_date（含）或只取前count个
+
+        Returns:
+            list: 交易日期列表，格式：['YYYY-MM-DD', ...]
+        """
+        lo = np.searchsorted(self.dates, _to_day(start_date), side='left')
+        hi = len(self.dates)
+        if end_date:
+            hi = np.searchsorted(self.dates, _to_day(end_date), side='right')
+        if count:
+            hi = min(hi, lo + count)
+        return self.date_strs[lo:hi].tolist()
+
+    def get_previous(self, date, offset=1):
+        """
+        获取date之前的第offset个交易日，date非交易日时以其之前最近的交易日为基准
+
+        Returns:
+            str: 交易日期，格式：'YYYY-MM-DD'，如果找不到则返回None
+        """
+        # 最后一个 <= date 的交易日
+        base = np.searchsorted(self.dates, _to_day(date), side='right') - 1
+        if base < 0:
+            return None
+        new_index = base - offset
+        if 0 <= new_index < len(self.dates):
+            return str(self.date_strs[new_index])
+        return None
+
+    def get_next(self, date, offset=1):
+        """
+        获取date之后的第offset个交易日，date非交易日时以其之后最近的交易日为基准
+
+        Returns:
+            str: 交易日期，格式：'YYYY-MM-DD'，如果找不到则返回None
+        """
+        # 第一个 >= date 的交易日
+        base = np.searchsorted(self.dates, _to_day(date), side='left')
+        if base >= len(self.dates):
+            return None
+        new_index = base + offset
+        if 0 <= new_index < len(self.dates):
+            return str(self.date_strs[new_index])
+        return None
+
+    def _shift(self, days, steps, side):
+        """
+        批量偏移：以 days 对应的基准交易日为起点移动 steps 个交易日
+
+        Args:
+            days (numpy.ndarray): datetime64[D] 数组
+            steps (numpy.ndarray): 交易日偏移量数组（正数向后，负数向前）
+            side (str): 'right' 以 <= 日期的最后一个交易日为基准，'left' 以 >= 日期的第一个交易日为基准
+
+        Returns:
+            numpy.ndarray: datetime64[D] 数组，越界或无基准时为 NaT
+        """
+        n = len(self.dates)
+        base = np.searchsorted(self.dates, days, side=side)
+        if side == 'right':
+            base = base - 1
+            has_base = base >= 0
+        else:
+            has_base = base < n
+        new_index = base + steps
+        valid = has_base & ~np.isnat(days) & (new_index >= 0) & (new_index < n)
+        result = np.full(len(days), np.datetime64('NaT'), dtype='datetime64[D]')
+        result[valid] = self.dates[new_index[valid]]
+        return result
+
+    def get_previous_many(self, dates, offsets=1):
+        """
+        批量获取每个日期之前的第offset个交易日，语义与 get_previous 一致
+
+        Args:
+            dates: 日期数组（list、numpy 数组、pandas Series/Index）
+            offsets (int or array): 偏移量，标量或与dates等长的数组
+
+        Returns:
+            与输入同类型的日期数组，找不到时为 NaT
+        """
+        days = _to_days(dates)
+        steps = np.broadcast_to(np.asarray(offsets, dtype=np.int64), days.shape)
+        return _wrap_like(dates, self._shift(days, -steps, 'right'))
+
+    def get_next_many(self, dates, offsets=1):
+        """
+        批量获取每个日期之后的第offset个交易日，语义与 get_next 一致
+
+        Args:
+            dates: 日期数组（list、numpy 数组、pandas Series/Index）
+            offsets (int or array): 偏移量，标量或与dates等长的数组
+
+        Returns:
+            与输入同类型的日期数组，找不到时为 NaT
+        """
+        days = _to_days(dates)
+        steps = np.broadcast_to(np.asarray(offsets, dtype=np.int64), days.shape)
+        return _wrap_like(dates, self._shift(days, steps, 'left'))
+
+    def is_trading_day(self, date):
+        """判断date是否为交易日"""
+        day = _to_day(date)
+        pos = np.searchsorted(self.dates, day, side='left')
+        return bool(pos < len(self.dates) and self.dates[pos] == day)
+
+    def get_latest(self, as_of=None):
+        """
+        获取as_of（默认今天）当天或之前最近的交易日
+
+        Returns:
+            str: 交易日期，格式：'YYYY-MM-DD'，如果找不到则返回None
+        """
+        if as_of is None:
+            as_of = datetime.now().strftime('%Y-%m-%d')
+        pos = np.searchsorted(self.dates, _to_day(as_of), side='right') - 1
+        if pos < 0:
+            return None
+        return str(self.date_strs[pos])
+
+# 进程内缓存的交易日历，首次使用时从 date.pkl 加载
+_CALENDAR = None
+
+def get_trading_calendar(reload=False):
+    """
+    获取进程内缓存的交易日历，每个进程只读取一次 date.pkl
+
+    Args:
+        reload (bool): 是否强制重新读取 date.pkl（如刚运行过 all_trading_days.py）
+
+    Returns:
+        TradingCalendar: 交易日历
+    """
+    global _CALENDAR
+    if _CALENDAR is None or reload:
+        _CALENDAR = TradingCalendar.from_pickle(get_path('trading_days'))
+    return _CALENDAR
+
 def get_trading_dates(start_date, end_date=None, count=None):
     """
     根据起始日期获取交易日
@@ -20,34 +221,10 @@ def get_trading_dates(start_date, end_date=None, count=None):
     Returns:
         list: 交易日期列表，格式：['YYYY-MM-DD', ...]
     """
-    # 获取交易日数据文件路径
-    trading_days_file = get_path('trading_days')
-    
     try:
-        # 读取交易日数据
-        with open(trading_days_file, 'rb') as f:
-            df = pickle.load(f)
-        
-        # 使用pandas向量化操作，性能更优
-        start_dt = pd.to_datetime(start_date)
-        
-        # 布尔索引过滤
-        mask = df['trade_date'] >= start_dt
-        if end_date:
-            end_dt = pd.to_datetime(end_date)
-            mask = mask & (df['trade_date'] <= end_dt)
-        
-        filtered_df = df[mask]
-        
-        # 如果指定了数量，则取前count个
-        if count:
-            filtered_df = filtered_df.head(count)
-        
-        # 转换为字符串列表
-        return filtered_df['trade_date'].dt.strftime('%Y-%m-%d').tolist()
-        
+        return get_trading_calendar().get_range(start_date, end_date, count)
     except FileNotFoundError:
-        print(f"交易日数据文件未找到: {trading_days_file}")
+        print(f"交易日数据文件未找到: {get_path('trading_days')}")
         return []
     except Exception as e:
         print(f"获取交易日时出错: {e}")
@@ -63,27 +240,10 @@ def get_latest_trading_date():
     Returns:
         str: 最新交易日期，格式：'YYYY-MM-DD'，如果找不到则返回None
     """
-    trading_days_file = get_path('trading_days')
-    
     try:
-        # 读取交易日数据
-        with open(trading_days_file, 'rb') as f:
-            df = pickle.load(f)
-        
-        # 获取当前日期
-        today = pd.to_datetime(datetime.now().strftime('%Y-%m-%d'))
-        
-        # 找到小于等于今天的最大交易日
-        past_trading_days = df[df['trade_date'] <= today]
-        
-        if not past_trading_days.empty:
-            latest_date = past_trading_days.iloc[-1]['trade_date']
-            return latest_date.strftime('%Y-%m-%d')
-        
-        return None
-        
+        return get_trading_calendar().get_latest()
     except FileNotFoundError:
-        print(f"交易日数据文件未找到: {trading_days_file}")
+        print(f"交易日数据文件未找到: {get_path('trading_days')}")
         return None
     except Exception as e:
         print(f"获取最新交易日时出错: {e}")
@@ -100,39 +260,10 @@ def get_previous_trading_date(date, offset=1):
     Returns:
         str: 交易日期，格式：'YYYY-MM-DD'，如果找不到则返回None
     """
-    trading_days_file = get_path('trading_days')
-    
     try:
-        # 读取交易日数据
-        with open(trading_days_file, 'rb') as f:
-            df = pickle.load(f)
-        
-        target_dt = pd.to_datetime(date)
-        
-        # 使用pandas高效查找
-        if target_dt in df['trade_date'].values:
-            # 如果基准日期是交易日，直接找到索引
-            target_index = df[
-                df['trade_date'] == target_dt
-            ].index[0]
-        else:
-            # 如果基准日期不是交易日，找到第一个小于基准日期的交易日
-            past_dates = df[df['trade_date'] < target_dt]
-            if past_dates.empty:
-                return None
-            target_index = past_dates.index[-1]  # 取最后一个小于目标日期的交易日
-        
-        # 计算偏移后的索引
-        # 对于get_last_trading_date，正数offset表示之前的交易日（更早的日期，索引更小）
-        new_index = target_index - offset
-        if 0 <= new_index < len(df):
-            result_date = df.iloc[new_index]['trade_date']
-            return result_date.strftime('%Y-%m-%d')
-        
-        return None
-        
+        return get_trading_calendar().get_previous(date, offset)
     except FileNotFoundError:
-        print(f"交易日数据文件未找到: {trading_days_file}")
+        print(f"交易日数据文件未找到: {get_path('trading_days')}")
         return None
     except Exception as e:
         print(f"获取之前交易日时出错: {e}")
@@ -149,41 +280,43 @@ def get_next_trading_date(date, offset=1):
     Returns:
         str: 交易日期，格式：'YYYY-MM-DD'，如果找不到则返回None
     """
-    trading_days_file = get_path('trading_days')
-    
     try:
-        # 读取交易日数据
-        with open(trading_days_file, 'rb') as f:
-            df = pickle.load(f)
-        
-        target_dt = pd.to_datetime(date)
-        
-        # 使用pandas高效查找
-        if target_dt in df['trade_date'].values:
-            # 如果基准日期是交易日，直接找到索引
-            target_index = df[df['trade_date'] == target_dt].index[0]
-        else:
-            # 如果基准日期不是交易日，找到第一个大于基准日期的交易日
-            future_dates = df[df['trade_date'] > target_dt]
-            if future_dates.empty:
-                return None
-            target_index = future_dates.index[0]
-        
-        # 计算偏移后的索引
-        new_index = target_index + offset
-        if 0 <= new_index < len(df):
-            result_date = df.iloc[new_index]['trade_date']
-            return result_date.strftime('%Y-%m-%d')
-        
-        return None
-        
+        return get_trading_calendar().get_next(date, offset)
     except FileNotFoundError:
-        print(f"交易日数据文件未找到: {trading_days_file}")
+        print(f"交易日数据文件未找到: {get_path('trading_days')}")
         return None
     except Exception as e:
         print(f"获取下一个交易日时出错: {e}")
         return None
 
+def get_previous_trading_dates(dates, offset=1):
+    """
+    批量获取每个日期之前的第offset个交易日（get_previous_trading_date 的向量化版本）
+    所有日期通过一次 searchsorted 完成，适用于百万行 (code, date) 的标签计算
+
+    Args:
+        dates: 日期数组（list、numpy 数组、pandas Series/Index）
+        offset (int or array): 偏移量，标量或与dates等长的数组
+
+    Returns:
+        与输入同类型的日期数组（Series保留原索引），找不到时为 NaT
+    """
+    return get_trading_calendar().get_previous_many(dates, offset)
+
+def get_next_trading_dates(dates, offset=1):
+    """
+    批量获取每个日期之后的第offset个交易日（get_next_trading_date 的向量化版本）
+    所有日期通过一次 searchsorted 完成，适用于百万行 (code, date) 的标签计算
+
+    Args:
+        dates: 日期数组（list、numpy 数组、pandas Series/Index）
+        offset (int or array): 偏移量，标量或与dates等长的数组
+
+    Returns:
+        与输入同类型的日期数组（Series保留原索引），找不到时为 NaT
+    """
+    return get_trading_calendar().get_next_many(dates, offset)
+
 def is_trading_day(date):
     """
     判断指定日期是否为交易日
@@ -194,20 +327,10 @@ def is_trading_day(date):
     Returns:
         bool: True表示是交易日，False表示不是交易日
     """
-    trading_days_file = get_path('trading_days')
-    
     try:
-        # 读取交易日数据
-        with open(trading_days_file, 'rb') as f:
-            df = pickle.load(f)
-        
-        target_dt = pd.to_datetime(date)
-        
-        # 使用pandas高效查找
-        return target_dt in df['trade_date'].values
-        
+        return get_trading_calendar().is_trading_day(date)
     except FileNotFoundError:
-        print(f"交易日数据文件未找到: {trading_days_file}")
+        print(f"交易日数据文件未找到: {get_path('trading_days')}")
         return False
     except Exception as e:
         print(f"判断交易日时出错: {e}")
@@ -247,4 +370,9 @@ if __name__ == "__main__":
     # 测试判断是否为交易日
     print("\n2025-01-01是否为交易日:")
     is_trading = is_trading_day('2025-01-01')
-    print(is_trading)
\ No newline at end of file
+    print(is_trading)
+
+    # 测试批量获取T+1、T+5交易日
+    print("\n批量获取T+1、T+5交易日:")
+    dates = pd.Series(['2025-01-01', '2025-01-06', '2025-01-06'])
+    print(get_next_trading_dates(dates, [1, 1, 5]))
\ No newline at end of file
@@ -0,0 +1,365 @@
+import jqdatasdk as _jq
+import pandas as pd
+import numpy as np
+import functools
+import hashlib
+import inspect
+import json
+import pickle
+import threading
+import time
+import zlib
+import os
+import sys
+from datetime import date, datetime
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Config.data_path import get_path
+from Utils import fetch_executor
+
+"""
+jqdatasdk 接口的持久化读穿透缓存
+获取数据的脚本用 `from Utils import jq_cache as jq` 代替 `import jqdatasdk as jq`，用法不变：
+- CACHE_POLICIES 中的接口先查本地缓存，未命中或已过期时才请求接口（经过 fetch_executor 的全局并发上限与限速），
+  结果压缩后保存在 Database/jq_cache/{接口名}/{键}.pkl.z
+- 其他属性（auth、query、finance 等）直接转发给 jqdatasdk
+
+缓存键: (接口名, 规范化后的参数)。参数按接口签名绑定并补全默认值，日期统一为 'YYYY-MM-DD'，
+因此 get_price(codes, '2024-01-02', '2024-01-02') 与 get_price(codes, start_date=date(2024, 1, 2), ...) 命中同一条缓存
+
+有效期（按接口的日期参数判断）：
+- 日期早于今天的历史数据不会再变化，永久缓存
+- 日期为今天、晚于今天或未指定（即最新数据）时只缓存 TODAY_TTL 秒
+- 前复权价格随之后的分红变化，缓存 ADJUSTED_TTL 秒；无日期参数的接口（如 get_all_factors）按策略中的固定有效期
+- 空结果（如数据尚未入库时的空 DataFrame）最多缓存 TODAY_TTL 秒，不因日期早于今天而永久缓存
+
+缓存总大小超过 MAX_CACHE_BYTES 时按最近使用时间淘汰（命中时更新文件修改时间），
+命中、未命中、过期、淘汰次数见 cache_stats()
+"""
+
+# "今天"及最新数据的缓存有效期（秒）
+TODAY_TTL = 3600
+# 前复权数据的缓存有效期（秒）
+ADJUSTED_TTL = 86400
+# 缓存目录的最大总大小（字节），超过时淘汰最久未使用的条目
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+# 淘汰后保留的大小比例，避免每次写入都触发淘汰
+EVICT_TARGET = 0.9
+# 压缩级别（zlib 1~9）
+COMPRESS_LEVEL = 3
+# 缓存文件扩展名
+CACHE_EXTENSION = '.pkl.z'
+
+# 各接口的缓存策略: {接口名: (日期参数名, 无日期参数时的有效期)}
+# 日期参数名为 None 的接口按固定有效期缓存
+CACHE_POLICIES = {
+    'get_price': ('end_date', None),
+    'get_valuation': ('end_date', None),
+    'get_money_flow': ('end_date', None),
+    'get_mtss': ('end_date', None),
+    'get_extras': ('end_date', None),
+    'get_factor_values': ('end_date', None),
+    'get_trade_days': ('end_date', None),
+    'get_history_fundamentals': ('watch_date', None),
+    'get_all_securities': ('date', None),
+    'get_industry_stocks': ('date', None),
+    'get_index_stocks': ('date', None),
+    'get_concept_stocks': ('date', None),
+    'get_industry': ('date', None),
+    'get_concept': ('date', None),
+    'get_margincash_stocks': ('date', None),
+    'get_marginsec_stocks': ('date', None),
+    'get_all_factors': (None, 86400),
+}
+
+def _normalize(value):
+    """将参数值转换为可稳定序列化的形式"""
+    if isinstance(value, (datetime, pd.Timestamp)):
+        if value == pd.Timestamp(value).normalize():
+            return value.strftime('%Y-%m-%d')
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, (date, np.datetime64)):
+        return pd.Timestamp(value).strftime('%Y-%m-%d')
+    if isinstance(value, str) and len(value) > 10 and value[10:].strip() in ('00:00:00', ''):
+        return value[:10]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple, pd.Index, np.ndarray, pd.Series)):
+        return [_normalize(item) for item in list(value)]
+    if isinstance(value, (set, frozenset)):
+        return sorted(_normalize(item) for item in value)
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    return value
+
+def _bind_arguments(func, args, kwargs):
+    """按接口签名绑定参数并补全默认值，无法获取签名时按位置参数与关键字参数原样返回"""
+    try:
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        # 展开 **kwargs 形式的参数
+        for name, param in inspect.signature(func).parameters.items():
+            if param.kind == inspect.Parameter.VAR_KEYWORD:
+                arguments.update(arguments.pop(name, {}))
+        return {name: _normalize(value) for name, value in arguments.items()}
+    except (TypeError, ValueError):
+        return {'args': _normalize(list(args)), **{name: _normalize(value) for name, value in kwargs.items()}}
+
+def cache_key(api, arguments):
+    """由接口名与规范化参数生成缓存键"""
+    payload = json.dumps([api, arguments], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def cache_ttl(api, arguments, today=None):
+    """
+    缓存有效期
+
+    Returns:
+        float: 有效期（秒），None 为永久有效
+    """
+    date_arg, default_ttl = CACHE_POLICIES[api]
+    if date_arg is None:
+        return default_ttl
+    if api == 'get_price' and arguments.get('fq') == 'pre':
+        return ADJUSTED_TTL
+    value = arguments.get(date_arg)
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    if value is None or str(value)[:10] >= today:
+        return TODAY_TTL
+    return None
+
+def _is_empty(value):
+    """返回值是否为空结果（空 DataFrame/Series、空列表或字典等）"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.empty
+    return isinstance(value, (list, tuple, dict, set, str)) and not value
+
+class ResponseCache:
+    """
+    磁盘缓存（线程安全）
+    每条缓存一个文件，内容为 zlib 压缩的 pickle: (写入时间, 有效期, 返回值)
+    进程内维护 {文件路径: (大小, 最近使用时间)} 索引，首次使用时扫描缓存目录建立
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir or get_path('jq_cache')
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None
+        self._total_bytes = 0
+        self.stats = {}
+
+    def _count(self, api, event, n=1):
+        with self._lock:
+            api_stats = self.stats.setdefault(api, {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0,
+                                                    'bytes_written': 0})
+            api_stats[event] += n
+
+    def _load_index(self):
+        """扫描缓存目录建立大小与最近使用时间索引（需持有锁）"""
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if os.path.isdir(self.cache_dir):
+            with os.scandir(self.cache_dir) as api_dirs:
+                for api_dir in api_dirs:
+                    if not api_dir.is_dir():
+                        continue
+                    with os.scandir(api_dir.path) as entries:
+                        for entry in entries:
+                            if entry.name.endswith(CACHE_EXTENSION):
+                                stat = entry.stat()
+                                self._entries[entry.path] = (stat.st_size, stat.st_mtime)
+        self._total_bytes = sum(size for size, _ in self._entries.values())
+
+    def _path(self, api, key):
+        return os.path.join(self.cache_dir, api, f"{key}{CACHE_EXTENSION}")
+
+    def get(self, api, key):
+        """
+        读取缓存
+
+        Returns:
+            tuple: (是否命中, 返回值)
+        """
+        path = self._path(api, key)
+        try:
+            with open(path, 'rb') as f:
+                created, ttl, value = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            self._count(api, 'misses')
+            return False, None
+        except Exception as e:
+            print(f"读取缓存 {path} 失败: {e}")
+            self._count(api, 'misses')
+            return False, None
+
+        now = time.time()
+        if ttl is not None and now - created > ttl:
+            self._count(api, 'expired')
+            self._count(api, 'misses')
+            return False, None
+        # 更新最近使用时间，用于 LRU 淘汰
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        with self._lock:
+            if self._entries is not None and path in self._entries:
+                self._entries[path] = (self._entries[path][0], now)
+        self._count(api, 'hits')
+        return True, value
+
+    def put(self, api, key, value, ttl):
+        """写入缓存，先写临时文件再替换，避免并发读到不完整的文件"""
+        path = self._path(api, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = zlib.compress(pickle.dumps((time.time(), ttl, value), protocol=pickle.HIGHEST_PROTOCOL),
+                             COMPRESS_LEVEL)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._count(api, 'bytes_written', len(data))
+
+        with self._lock:
+            self._load_index()
+            old_size = self._entries.get(path, (0, 0))[0]
+            self._entries[path] = (len(data), time.time())
+            self._total_bytes += len(data) - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """按最近使用时间淘汰，直到总大小不超过 max_bytes × EVICT_TARGET（需持有锁）"""
+        target = self.max_bytes * EVICT_TARGET
+        for path, (size, _) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            del self._entries[path]
+            self._total_bytes -= size
+            api = os.path.basename(os.path.dirname(path))
+            api_stats = self.stats.setdefault(api, {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0,
+                                                    'bytes_written': 0})
+            api_stats['evictions'] += 1
+
+    def size(self):
+        """缓存目录的总大小（字节）与条目数"""
+        with self._lock:
+            self._load_index()
+            return self._total_bytes, len(self._entries)
+
+    def clear(self, api=None):
+        """删除全部缓存，或指定接口的缓存"""
+        with self._lock:
+            self._load_index()
+            for path in list(self._entries):
+                if api is None or os.path.basename(os.path.dirname(path)) == api:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    self._total_bytes -= self._entries.pop(path)[0]
+
+# 进程内共享的缓存
+_CACHE = None
+# 是否启用缓存，为 False 时直接请求接口
+ENABLED = True
+# 已生成的带缓存接口
+_WRAPPED = {}
+
+def get_cache():
+    """获取进程内共享的缓存"""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = ResponseCache()
+    return _CACHE
+
+def configure_cache(enabled=None, cache_dir=None, max_bytes=None):
+    """
+    修改缓存设置
+
+    Args:
+        enabled (bool, optional): 是否启用缓存
+        cache_dir (str, optional): 缓存目录
+        max_bytes (int, optional): 缓存目录的最大总大小（字节）
+    """
+    global _CACHE, ENABLED
+    if enabled is not None:
+        ENABLED = enabled
+    if cache_dir is not None or max_bytes is not None:
+        old = get_cache()
+        _CACHE = ResponseCache(cache_dir or old.cache_dir, max_bytes or old.max_bytes)
+        _CACHE.stats = old.stats
+
+def cache_stats():
+    """
+    各接口的缓存统计
+
+    Returns:
+        dict: {接口名: {'hits', 'misses', 'expired', 'evictions', 'bytes_written', 'hit_rate'}}
+    """
+    stats = {}
+    for api, api_stats in get_cache().stats.items():
+        lookups = api_stats['hits'] + api_stats['misses']
+        stats[api] = dict(api_stats, hit_rate=round(api_stats['hits'] / lookups, 4) if lookups else None)
+    return stats
+
+def print_cache_stats():
+    """打印各接口的缓存统计与缓存目录大小"""
+    total_bytes, n_entries = get_cache().size()
+    print(f"接口缓存: {n_entries} 条，{total_bytes / 1024 ** 2:.1f} MB")
+    for api, api_stats in cache_stats().items():
+        print(f"  {api}: 命中 {api_stats['hits']}，未命中 {api_stats['misses']}（过期 {api_stats['expired']}），"
+              f"淘汰 {api_stats['evictions']}，命中率 {api_stats['hit_rate']}")
+
+def cached(api, func=None):
+    """
+    生成带缓存的接口函数
+
+    Args:
+        api (str): 接口名，须在 CACHE_POLICIES 中
+        func (optional): 实际请求的函数，默认为 jqdatasdk 中的同名接口
+
+    Returns:
+        function: 与原接口参数相同的函数
+    """
+    func = func or getattr(_jq, api)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not ENABLED:
+            return fetch_executor.call(func, *args, **kwargs)
+        arguments = _bind_arguments(func, args, kwargs)
+        key = cache_key(api, arguments)
+        cache = get_cache()
+        hit, value = cache.get(api, key)
+        if hit:
+            return value
+        value = fetch_executor.call(func, *args, **kwargs)
+        if value is not None:
+            ttl = cache_ttl(api, arguments)
+            if _is_empty(value):
+                # 空结果可能只是数据尚未入库，不能按历史数据永久缓存
+                ttl = TODAY_TTL if ttl is None else min(ttl, TODAY_TTL)
+            cache.put(api, key, value, ttl)
+        return value
+
+    # 命中缓存时不占用请求并发数与限速令牌，未命中时内部自行通过 fetch_executor.call 请求
+    wrapper.rate_limited = True
+    return wrapper
+
+def __getattr__(name):
+    """CACHE_POLICIES 中的接口返回带缓存的版本，其他属性直接取自 jqdatasdk"""
+    attr = getattr(_jq, name)
+    if name in CACHE_POLICIES and callable(attr):
+        if name not in _WRAPPED:
+            _WRAPPED[name] = cached(name, attr)
+        return _WRAPPED[name]
+    return attr
@@ -0,0 +1,190 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import sys
+from datetime import datetime
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Config.data_path import get_path
+from Utils.get_trading_date import get_trading_calendar, get_latest_trading_date, _to_day, _to_days
+from Utils.get_stock_list import get_stock_universe, _instruments_file
+
+"""
+股票上市状态矩阵（日期 × 股票）
+由 all_securities_stock.csv 的上市区间和 date.pkl 交易日历生成，按位压缩后落盘
+读取时使用 np.memmap，按行/列切片无需整体加载
+
+存储目录: Database/stock_listing_matrix/
+- membership.bin  按位压缩的 uint8 矩阵，形状 (日期数, ceil(股票数/8))，bitorder='little'
+- dates.npy       日期轴，datetime64[D]
+- codes.npy       股票轴，定长字符串
+- meta.json       矩阵形状及来源文件修改时间
+"""
+
+MATRIX_FILE = 'membership.bin'
+DATES_FILE = 'dates.npy'
+CODES_FILE = 'codes.npy'
+META_FILE = 'meta.json'
+
+def build_listing_matrix(start_date='2005-01-01', end_date=None, chunk_size=500):
+    """
+    生成上市状态矩阵并保存
+
+    Args:
+        start_date (str): 起始日期，格式：'YYYY-MM-DD'
+        end_date (str, optional): 结束日期，默认为最新交易日
+        chunk_size (int): 每次计算的日期行数，控制内存占用
+
+    Returns:
+        str: 矩阵保存目录
+    """
+    if end_date is None:
+        end_date = get_latest_trading_date()
+    dates = get_trading_calendar().get_range(start_date, end_date)
+    if not dates:
+        print("未找到交易日")
+        return None
+
+    universe = get_stock_universe()
+    n_dates, n_codes = len(dates), len(universe.codes)
+    n_bytes = (n_codes + 7) // 8
+    print(f"生成上市状态矩阵: {n_dates} 个交易日 × {n_codes} 只股票")
+
+    save_dir = get_path('stock_listing_matrix')
+    os.makedirs(save_dir, exist_ok=True)
+
+    bits = np.memmap(os.path.join(save_dir, MATRIX_FILE), dtype=np.uint8, mode='w+', shape=(n_dates, n_bytes))
+    for lo in range(0, n_dates, chunk_size):
+        hi = min(lo + chunk_size, n_dates)
+        bits[lo:hi] = np.packbits(universe.membership(dates[lo:hi]), axis=1, bitorder='little')
+    bits.flush()
+    del bits
+
+    np.save(os.path.join(save_dir, DATES_FILE), _to_days(dates))
+    np.save(os.path.join(save_dir, CODES_FILE), universe.codes.astype(str))
+    meta = {
+        'n_dates': n_dates,
+        'n_codes': n_codes,
+        'n_bytes': n_bytes,
+        'bitorder': 'little',
+        'source_mtime': os.path.getmtime(_instruments_file()),
+        'built_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    with open(os.path.join(save_dir, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    print(f"上市状态矩阵已保存至: {save_dir}")
+    return save_dir
+
+class ListingMatrix:
+    """
+    上市状态矩阵读取器
+    矩阵以 np.memmap 只读打开，单行读取为零拷贝切片加一次 unpackbits
+    """
+
+    def __init__(self, matrix_dir=None):
+        """
+        Args:
+            matrix_dir (str, optional): 矩阵目录，默认为 Database/stock_listing_matrix
+        """
+        matrix_dir = matrix_dir or get_path('stock_listing_matrix')
+        with open(os.path.join(matrix_dir, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.dates = np.load(os.path.join(matrix_dir, DATES_FILE))
+        self.codes = np.load(os.path.join(matrix_dir, CODES_FILE))
+        self.bits = np.memmap(os.path.join(matrix_dir, MATRIX_FILE), dtype=np.uint8, mode='r',
+                              shape=(self.meta['n_dates'], self.meta['n_bytes']))
+        self._code_index = pd.Index(self.codes)
+
+    def is_stale(self):
+        """证券信息文件在矩阵生成后是否被更新过"""
+        return os.path.getmtime(_instruments_file()) != self.meta['source_mtime']
+
+    def _date_positions(self, dates):
+        """日期在日期轴上的位置，不在轴上的为 -1"""
+        days = _to_days(dates)
+        pos = np.searchsorted(self.dates, days)
+        pos = np.minimum(pos, len(self.dates) - 1)
+        return np.where(self.dates[pos] == days, pos, -1)
+
+    def row(self, date):
+        """
+        获取某一交易日的上市状态
+
+        Returns:
+            numpy.ndarray: bool 数组，顺序与 self.codes 一致
+        """
+        day = _to_day(date)
+        pos = np.searchsorted(self.dates, day)
+        if pos >= len(self.dates) or self.dates[pos] != day:
+            raise KeyError(f"{date} 不在上市状态矩阵的日期范围内")
+        return np.unpackbits(self.bits[pos], count=self.meta['n_codes'], bitorder='little').astype(bool)
+
+    def get_list(self, date):
+        """获取某一交易日上市的股票代码列表"""
+        return self.codes[self.row(date)].tolist()
+
+    def mask(self, dates, codes=None):
+        """
+        获取子矩阵
+
+        Args:
+            dates: 日期数组（需为交易日）
+            codes (list, optional): 股票代码列表，默认全部股票
+
+        Returns:
+            numpy.ndarray: bool 矩阵，形状 (len(dates), len(codes))，未知股票为 False
+        """
+        pos = self._date_positions(dates)
+        if (pos < 0).any():
+            raise KeyError("部分日期不在上市状态矩阵的日期范围内")
+        full = np.unpackbits(self.bits[pos], axis=1, count=self.meta['n_codes'], bitorder='little').astype(bool)
+        if codes is None:
+            return full
+        code_pos = self._code_index.get_indexer(codes)
+        result = full[:, np.maximum(code_pos, 0)]
+        result[:, code_pos < 0] = False
+        return result
+
+    def is_listed(self, codes, dates):
+        """
+        逐元素判断 (code, date) 是否处于上市状态
+
+        Args:
+            codes: 股票代码数组
+            dates: 日期数组，与codes等长
+
+        Returns:
+            numpy.ndarray: bool 数组，未知股票或日期为 False
+        """
+        code_pos = self._code_index.get_indexer(codes)
+        date_pos = self._date_positions(dates)
+        valid = (code_pos >= 0) & (date_pos >= 0)
+        result = np.zeros(len(code_pos), dtype=bool)
+        cp, dp = code_pos[valid], date_pos[valid]
+        result[valid] = (self.bits[dp, cp >> 3] >> (cp & 7)) & 1
+        return result
+
+    def filter_frame(self, df, date_col='date', code_col='code'):
+        """
+        只保留处于上市状态的行
+
+        Args:
+            df (DataFrame): 含日期列和股票代码列的数据
+
+        Returns:
+            DataFrame: 过滤后的数据
+        """
+        return df[self.is_listed(df[code_col].to_numpy(), df[date_col].to_numpy())]
+
+if __name__ == "__main__":
+    build_listing_matrix()
+
+    matrix = ListingMatrix()
+    test_date = matrix.dates[-1]
+    stock_list = matrix.get_list(test_date)
+    print(f"{test_date} 上市股票数量: {len(stock_list)}")
+    print("前10只股票:")
+    print(stock_list[:10])
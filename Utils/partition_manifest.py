@@ -0,0 +1,178 @@
+import hashlib
+import json
+import threading
+import os
+import sys
+from datetime import datetime
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Config.data_path import get_path
+
+"""
+日期分区完成清单
+每个日期分区数据集目录下的 _manifest.jsonl 记录已完整写入的分区，每行一条：
+    {"dataset", "date", "rows", "checksum"(文件 sha1), "path", "columns", "completed_at", "final", "params"}
+"params" 为影响分区内容的请求参数（如价格数据的复权方式 {"fq": "post"}），参数不同的分区不计入已完成
+Utils/data_store.save_partition 写完文件后追加记录，同一日期以最后一条为准；
+日期为今天或之后的分区（盘中获取，数据可能尚未最终确定）记为 "final": false，不计入已完成，下次运行时重新获取；
+追加写入不会破坏已有记录，进程中途退出时最后一行可能不完整，读取时跳过
+
+获取数据的脚本用 pending_dates 过滤掉已完成的日期，中断后重新运行时从第一个缺失的交易日继续，不重复请求；
+分区文件被删除或清单中没有记录的日期视为未完成，verify_partitions 可校验文件内容是否与记录一致
+"""
+
+MANIFEST_FILE = '_manifest.jsonl'
+
+_LOCK = threading.Lock()
+
+def _manifest_path(dataset):
+    return os.path.join(get_path(dataset), MANIFEST_FILE)
+
+def file_checksum(path):
+    """文件内容的 sha1"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def record_partition(dataset, date, path, rows, columns=None, params=None):
+    """
+    记录一个已完整写入的分区
+
+    Args:
+        dataset (str): 数据集，如 'stock_price'
+        date (str): 分区日期，格式：'YYYY-MM-DD'
+        path (str): 分区文件路径
+        rows (int): 行数
+        columns (list, optional): 列名
+        params (dict, optional): 影响分区内容的请求参数，如 {'fq': 'post'}
+    """
+    now = datetime.now()
+    record = {
+        'dataset': dataset,
+        'date': date,
+        'rows': int(rows),
+        'checksum': file_checksum(path),
+        'path': os.path.basename(path),
+        'columns': list(columns) if columns is not None else None,
+        'completed_at': now.strftime('%Y-%m-%d %H:%M:%S'),
+        # 当天及之后的数据可能在收盘后仍会变化
+        'final': str(date)[:10] < now.strftime('%Y-%m-%d'),
+        'params': dict(params) if params is not None else None,
+    }
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    with _LOCK:
+        with open(_manifest_path(dataset), 'a', encoding='utf-8') as f:
+            f.write(line)
+
+def load_manifest(dataset):
+    """
+    读取数据集的完成清单
+
+    Returns:
+        dict: {日期: 记录}，同一日期以最后一条为准
+    """
+    manifest_path = _manifest_path(dataset)
+    records = {}
+    if not os.path.exists(manifest_path):
+        return records
+    with open(manifest_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # 中途退出时写了一半的行
+                continue
+            records[record['date']] = record
+    return records
+
+def completed_dates(dataset, columns=None, params=None):
+    """
+    已完成且分区文件仍存在的日期，不含 "final" 为 false 的分区（没有该字段的旧记录视为已完成）
+
+    Args:
+        dataset (str): 数据集
+        columns (str | list, optional): 要求分区包含的列，如本次请求的因子；记录中缺少其中任一列的日期视为未完成
+        params (dict, optional): 要求分区记录的请求参数，如 {'fq': 'post'}；记录中任一参数不同或缺少的日期视为未完成
+
+    Returns:
+        set: 日期集合
+    """
+    save_dir = get_path(dataset)
+    if not os.path.isdir(save_dir):
+        return set()
+    with os.scandir(save_dir) as entries:
+        existing = {entry.name for entry in entries}
+    if isinstance(columns, str):
+        columns = [columns]
+    required = set(columns or [])
+    done = set()
+    for date, record in load_manifest(dataset).items():
+        if record['path'] not in existing or record.get('final') is False:
+            continue
+        if required and not required.issubset(record.get('columns') or []):
+            continue
+        if params and any(key not in (record.get('params') or {}) or record['params'][key] != value
+                          for key, value in params.items()):
+            continue
+        done.add(date)
+    return done
+
+def pending_dates(dataset, dates, columns=None, params=None):
+    """
+    从 dates 中去掉已完成的日期，保持原顺序
+
+    Args:
+        dataset (str): 数据集
+        dates (list): 计划获取的日期
+        columns (str | list, optional): 要求分区包含的列
+        params (dict, optional): 要求分区记录的请求参数
+
+    Returns:
+        list: 尚未完成的日期
+    """
+    done = completed_dates(dataset, columns, params)
+    pending = [date for date in dates if date not in done]
+    if len(pending) < len(dates):
+        print(f"{dataset}: {len(dates) - len(pending)} 个日期已完成，跳过；剩余 {len(pending)} 个"
+              + (f"，从 {pending[0]} 开始" if pending else ""))
+    return pending
+
+def verify_partitions(dataset, dates=None):
+    """
+    重新计算分区文件的 sha1 并与清单比对
+
+    Args:
+        dataset (str): 数据集
+        dates (list, optional): 校验的日期，默认为清单中的全部日期
+
+    Returns:
+        dict: {'missing': 文件不存在的日期, 'mismatch': 校验和不一致的日期}
+    """
+    records = load_manifest(dataset)
+    save_dir = get_path(dataset)
+    missing, mismatch = [], []
+    for date in sorted(dates if dates is not None else records):
+        record = records.get(date)
+        path = os.path.join(save_dir, record['path']) if record else None
+        if path is None or not os.path.exists(path):
+            missing.append(date)
+        elif file_checksum(path) != record['checksum']:
+            mismatch.append(date)
+    print(f"{dataset}: 校验 {len(records) if dates is None else len(dates)} 个分区，"
+          f"缺失 {len(missing)} 个，校验和不一致 {len(mismatch)} 个")
+    return {'missing': missing, 'mismatch': mismatch}
+
+def compact_manifest(dataset):
+    """重写清单文件，每个日期只保留最后一条记录"""
+    records = load_manifest(dataset)
+    manifest_path = _manifest_path(dataset)
+    tmp_path = manifest_path + '.tmp'
+    with _LOCK:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for date in sorted(records):
+                f.write(json.dumps(records[date], ensure_ascii=False) + '\n')
+        os.replace(tmp_path, manifest_path)
+    return len(records)
@@ -0,0 +1,240 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Config.data_path import get_path
+from Config.fields_config import FINANCIAL_FIELDS, TABLE_OUTPUTS
+from Utils.get_trading_date import _to_days
+
+"""
+财务数据时点（Point-in-Time）存储
+将 financial_data/<表目录>/{code}.csv 合并为一张按 (code, pubDate) 排序的长表，保存至 Database/financial_pit/{表}.pkl，
+as_of(dates, codes, fields) 返回每个日期、每只股票在当日已披露的最新一期报告的字段值（不使用未来数据）
+
+更正报告的处理：
+- 同一报告期（statDate）多次披露时，以披露日期最新的版本为准（as_of 取 pubDate 不晚于查询日的最后一条）
+- 在更新一期报告披露之后，对更早报告期的补充更正不会成为“最新报告”，构建时剔除
+  （按 pubDate 排序后 statDate 小于此前已披露的最大 statDate 的行）
+"""
+
+# 默认使用的季度报表
+DEFAULT_TABLES = ['balance_quarter', 'income_quarter', 'cash_flow_quarter', 'indicator_quarter']
+# 日期 (天数) 在合并键中占用的位数
+_DAY_BITS = 32
+
+def _pit_file(table):
+    return os.path.join(get_path('financial_pit'), f"{table}.pkl")
+
+def read_statement_files(table, codes=None):
+    """
+    读取 financial_data/<表目录> 下的 {code}.csv
+
+    Args:
+        table (str): 字段配置名，如 'income_quarter'
+        codes (iterable, optional): 只读取这些股票，默认读取全部
+
+    Returns:
+        DataFrame: 合并后的原始数据，无数据时为 None
+    """
+    source_dir = os.path.join(get_path('financial_data'), TABLE_OUTPUTS[table][0])
+    if not os.path.isdir(source_dir):
+        return None
+    if codes is None:
+        with os.scandir(source_dir) as entries:
+            paths = [entry.path for entry in entries if entry.name.endswith('.csv')]
+    else:
+        paths = [os.path.join(source_dir, f"{code}.csv") for code in codes]
+    frames = []
+    for path in paths:
+        try:
+            frames.append(pd.read_csv(path))
+        except (FileNotFoundError, pd.errors.EmptyDataError):
+            continue
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+def build_pit_table(table):
+    """
+    由 {code}.csv 构建单张表的时点长表并保存
+
+    Args:
+        table (str): 字段配置名，如 'income_quarter'
+
+    Returns:
+        DataFrame: 按 (code, pubDate, statDate) 排序，pubDate/statDate 为 datetime64
+    """
+    df = read_statement_files(table)
+    if df is None:
+        print(f"{TABLE_OUTPUTS[table][1]}没有数据")
+        return pd.DataFrame(columns=['code', 'pubDate', 'statDate'])
+
+    df['pubDate'] = pd.to_datetime(df['pubDate'])
+    df['statDate'] = pd.to_datetime(df['statDate'])
+    df = df.dropna(subset=['code', 'pubDate', 'statDate'])
+    df = df.sort_values(['code', 'pubDate', 'statDate'], kind='stable', ignore_index=True)
+
+    # 剔除更晚披露的旧报告期更正
+    latest_stat = df.groupby('code', sort=False)['statDate'].cummax()
+    df = df[df['statDate'] >= latest_stat].reset_index(drop=True)
+
+    os.makedirs(get_path('financial_pit'), exist_ok=True)
+    df.to_pickle(_pit_file(table))
+    print(f"{TABLE_OUTPUTS[table][1]}时点数据已保存至: {_pit_file(table)} ({len(df)} 行, {df['code'].nunique()} 只股票)")
+    return df
+
+class PITStore:
+    """
+    财务数据时点存储
+    每张表的 (code, pubDate) 编码为一个有序 int64 键，as_of 对所有 (日期, 股票) 一次 searchsorted 完成定位
+    """
+
+    def __init__(self, frames):
+        """
+        Args:
+            frames (dict): {表名: 时点长表}，格式同 build_pit_table 的返回值；
+                表名为字段配置名时可用 '表前缀.字段名' 取字段，其他表（如单季度衍生表）只能用短字段名
+        """
+        self.tables = list(frames)
+        self._frames = {}
+        self._keys = {}
+        self._codes = {}
+        self._values = {}
+        for table, df in frames.items():
+            self._index(table, df)
+
+    @classmethod
+    def load(cls, tables=None, rebuild=False):
+        """
+        读取已保存的时点表，不存在时由 {code}.csv 构建
+
+        Args:
+            tables (list, optional): 字段配置名列表，默认为四张季度报表
+            rebuild (bool): 是否忽略已保存的时点表，重新构建
+        """
+        frames = {}
+        for table in tables or DEFAULT_TABLES:
+            if rebuild or not os.path.exists(_pit_file(table)):
+                frames[table] = build_pit_table(table)
+            else:
+                frames[table] = pd.read_pickle(_pit_file(table))
+        return cls(frames)
+
+    def _index(self, table, df):
+        """建立 (code, pubDate) 合并键"""
+        codes, code_idx = np.unique(df['code'].to_numpy().astype(str), return_inverse=True) if len(df) else \
+            (np.array([], dtype=str), np.array([], dtype=np.int64))
+        days = _to_days(df['pubDate']).astype(np.int64) if len(df) else np.array([], dtype=np.int64)
+        keys = (code_idx.astype(np.int64) << _DAY_BITS) | days
+        if len(keys) and (np.diff(keys) < 0).any():
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            df = df.iloc[order].reset_index(drop=True)
+        self._frames[table] = df
+        self._codes[table] = pd.Index(codes)
+        self._keys[table] = keys
+        self._values[table] = {}
+
+    def _resolve(self, field):
+        """
+        字段名解析为 (表, 列名)
+        字段可写作 'income.operating_profit' 或短字段名；短字段名在多张表中重复时取 tables 中靠前的表
+        """
+        if '.' in field:
+            prefix, name = field.split('.', 1)
+            for table in self.tables:
+                if table in FINANCIAL_FIELDS and FINANCIAL_FIELDS[table][0].split('.', 1)[0] == prefix:
+                    return table, name
+            raise KeyError(f"未加载 {prefix} 对应的表")
+        for table in self.tables:
+            if field in self._frames[table].columns:
+                return table, field
+        raise KeyError(f"未找到字段: {field}")
+
+    def _column(self, table, name):
+        """按合并键顺序排列的字段数组（缓存）"""
+        if name not in self._values[table]:
+            column = self._frames[table][name]
+            if name in ('pubDate', 'statDate'):
+                self._values[table][name] = column.to_numpy(dtype='datetime64[D]')
+            else:
+                self._values[table][name] = pd.to_numeric(column, errors='coerce').to_numpy(dtype=float)
+        return self._values[table][name]
+
+    def _positions(self, table, days, codes, strict):
+        """
+        每个 (日期, 股票) 在当日已披露的最后一条记录的位置
+
+        Returns:
+            numpy.ndarray: int64 矩阵，形状 (日期数, 股票数)，无记录为 -1
+        """
+        keys = self._keys[table]
+        code_idx = self._codes[table].get_indexer(codes).astype(np.int64)
+        query = (np.maximum(code_idx, 0)[None, :] << _DAY_BITS) | days[:, None]
+        # strict=True 时只使用查询日之前披露的报告
+        pos = np.searchsorted(keys, query, side='left' if strict else 'right') - 1
+        found = (pos >= 0) & (code_idx[None, :] >= 0)
+        found &= (keys[np.maximum(pos, 0)] >> _DAY_BITS) == code_idx[None, :]
+        return np.where(found, pos, -1)
+
+    def as_of(self, dates, codes, fields, strict=False, dtype=float):
+        """
+        获取各日期已披露的最新一期报告的字段值
+
+        Args:
+            dates: 日期数组，如交易日列表
+            codes (list): 股票代码列表
+            fields (list): 字段列表，短字段名或 '表前缀.字段名'，可包含 'pubDate'、'statDate'
+            strict (bool): 为 True 时只使用查询日之前（不含当日）披露的报告
+            dtype: 数值字段的输出类型，默认为 float（float64），大面板可用 np.float32 减少内存
+
+        Returns:
+            dict: {'dates': datetime64[D] 数组, 'codes': 股票代码数组, 'fields': {字段: 二维数组 (日期数, 股票数)}}
+            无数据的位置数值字段为 NaN，日期字段为 NaT
+        """
+        days = _to_days(dates).astype(np.int64)
+        codes = np.asarray(codes).astype(str)
+        positions = {}
+        panel = {}
+        for field in fields:
+            table, name = self._resolve(field)
+            if table not in positions:
+                positions[table] = self._positions(table, days, codes, strict)
+            pos = positions[table]
+            values = self._column(table, name)
+            if values.dtype.kind == 'M':
+                result = values[np.maximum(pos, 0)] if len(values) else np.full(pos.shape, np.datetime64('NaT', 'D'))
+                result[pos < 0] = np.datetime64('NaT')
+            else:
+                result = values.astype(dtype, copy=False)[np.maximum(pos, 0)] if len(values) else \
+                    np.full(pos.shape, np.nan, dtype=dtype)
+                result[pos < 0] = np.nan
+            panel[field] = result
+        return {'dates': days.astype('datetime64[D]'), 'codes': codes, 'fields': panel}
+
+    def as_of_frame(self, dates, codes, fields, strict=False):
+        """
+        as_of 的长表形式
+
+        Returns:
+            DataFrame: 包含 date, code 及所选字段，只保留至少有一个字段有值的行
+        """
+        panel = self.as_of(dates, codes, fields, strict)
+        n_dates, n_codes = len(panel['dates']), len(panel['codes'])
+        df = pd.DataFrame({
+            'date': np.repeat(panel['dates'], n_codes),
+            'code': np.tile(panel['codes'], n_dates),
+        })
+        for field, values in panel['fields'].items():
+            df[field] = values.ravel()
+        return df.dropna(subset=list(fields), how='all').reset_index(drop=True)
+
+if __name__ == "__main__":
+    from Utils.get_trading_date import get_trading_dates
+
+    store = PITStore.load(rebuild=True)
+    dates = get_trading_dates('2024-01-01', '2024-12-31')
+    codes = ['000001.XSHE', '600519.XSHG']
+    df = store.as_of_frame(dates, codes, ['statDate', 'pubDate', 'total_assets', 'net_profit', 'roe'])
+    print(df.tail(10))
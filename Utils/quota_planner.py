@@ -0,0 +1,252 @@
+import jqdatasdk as jq
+import pandas as pd
+import os
+import sys
+from datetime import datetime
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Config.data_path import get_path
+from Utils.get_stock_list import get_stock_universe
+from Utils.get_trading_date import get_trading_dates, get_latest_trading_date
+from Utils.partition_manifest import pending_dates
+
+"""
+按每日数据条数额度规划获取任务
+聚宽账号每天可请求的数据条数有限（jq.get_query_count），直接开始大范围回补常在中途因额度耗尽而失败。本模块：
+- 由完成清单（Utils/partition_manifest.py）得到每个任务尚未完成的交易日
+- 按 股票数 × 交易日数 × 字段数 估算每个交易日消耗的条数，股票数取该日上市的全部A股
+- 所有任务的待获取交易日按日期从新到旧排列（日期相同时按任务优先级），依次放入剩余额度（预留 RESERVE_RATIO），
+  某个任务的一个交易日放不下时，该任务更早的交易日全部推迟到下一日的额度，其他任务继续规划；
+  每个任务本次获取的是最新的若干个待获取交易日，最近的数据总是先补齐
+- 按计划逐个执行任务，记录执行前后的剩余额度，输出每个任务的估算与实际消耗，并追加到 quota_usage/usage_log.csv
+
+推迟的交易日不需要单独保存，次日运行时仍在完成清单之外，会重新进入规划
+
+用法:
+    jobs = [QuotaJob('stock_price', 'stock_price', run=lambda s, e: get_daily_price(s, e, ...), fields=fields,
+                     start_date='2015-01-01', end_date='2025-08-28')]
+    run_jobs(jobs)
+"""
+
+# 保留的额度比例，避免估算偏差导致额度耗尽
+RESERVE_RATIO = 0.05
+
+USAGE_LOG_FILE = 'usage_log.csv'
+
+class QuotaJob:
+    """
+    一个按交易日分区保存的获取任务
+    """
+
+    def __init__(self, name, dataset, run, fields, start_date, end_date=None, codes=None, priority=0, params=None):
+        """
+        Args:
+            name (str): 任务名称
+            dataset (str): 保存的数据集，用于从完成清单中判断已完成的交易日
+            run: run(start_date, end_date)，获取并保存一段连续交易日的数据
+            fields (str | list): 请求的字段，字段数用于估算条数，已完成的分区须包含全部字段
+            start_date (str): 开始日期
+            end_date (str, optional): 结束日期，默认为最新交易日
+            codes (int | list, optional): 每个交易日请求的股票数或股票列表，默认为当日上市的全部A股
+            priority (int): 日期相同时优先级高的任务先获取
+            params (dict, optional): 已完成的分区须记录相同的请求参数，如价格数据的 {'fq': None}
+        """
+        self.name = name
+        self.dataset = dataset
+        self.run = run
+        self.fields = [fields] if isinstance(fields, str) else list(fields)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.codes = codes
+        self.priority = priority
+        self.params = params
+
+    def trading_dates(self):
+        """任务范围内的交易日（从旧到新），不含今天之后的日期"""
+        return get_trading_dates(self.start_date, self.end_date or get_latest_trading_date())
+
+    def pending_dates(self):
+        """尚未完成的交易日（从旧到新）"""
+        return pending_dates(self.dataset, self.trading_dates(), self.fields, self.params)
+
+    def estimate_rows(self, dates):
+        """
+        估算各交易日消耗的条数
+
+        Args:
+            dates (list): 交易日列表
+
+        Returns:
+            list: 与 dates 对应的条数
+        """
+        if not dates:
+            return []
+        if self.codes is None:
+            n_codes = get_stock_universe().membership(dates).sum(axis=1)
+        else:
+            n_codes = [self.codes if isinstance(self.codes, int) else len(self.codes)] * len(dates)
+        return [int(n) * len(self.fields) for n in n_codes]
+
+def get_query_spare():
+    """当日剩余可请求的数据条数"""
+    return jq.get_query_count('spare')
+
+def plan_jobs(jobs, spare=None, reserve_ratio=RESERVE_RATIO):
+    """
+    在剩余额度内规划各任务本次获取的交易日
+
+    Args:
+        jobs (list): QuotaJob 列表
+        spare (int, optional): 剩余额度，默认查询 jq.get_query_count
+        reserve_ratio (float): 保留的额度比例
+
+    Returns:
+        list: 每个任务一个 dict：{'job', 'scheduled': 本次获取的交易日（从旧到新）, 'deferred': 推迟的交易日,
+              'estimated_rows': 本次估算条数, 'deferred_rows': 推迟部分的估算条数}
+    """
+    if spare is None:
+        spare = get_query_spare()
+    budget = int(spare * (1 - reserve_ratio))
+
+    plans = []
+    units = []
+    for i, job in enumerate(jobs):
+        dates = job.pending_dates()
+        plans.append({'job': job, 'scheduled': [], 'deferred': [], 'estimated_rows': 0, 'deferred_rows': 0})
+        units.extend((date, job.priority, i, rows) for date, rows in zip(dates, job.estimate_rows(dates)))
+
+    # 日期从新到旧，日期相同时优先级高的在前
+    units.sort(key=lambda unit: (unit[0], unit[1]), reverse=True)
+    blocked = set()
+    for date, _, i, rows in units:
+        plan = plans[i]
+        if i not in blocked and rows <= budget:
+            budget -= rows
+            plan['scheduled'].append(date)
+            plan['estimated_rows'] += rows
+        else:
+            # 保证本次获取的是最新的连续若干个待获取交易日
+            blocked.add(i)
+            plan['deferred'].append(date)
+            plan['deferred_rows'] += rows
+
+    for plan in plans:
+        plan['scheduled'].reverse()
+        plan['deferred'].reverse()
+
+    print(f"剩余额度 {spare} 条，可用 {int(spare * (1 - reserve_ratio))} 条（保留 {reserve_ratio:.0%}）")
+    for plan in plans:
+        print(f"  {plan['job'].name}: 本次 {len(plan['scheduled'])} 个交易日，估算 {plan['estimated_rows']} 条；"
+              f"推迟 {len(plan['deferred'])} 个交易日，估算 {plan['deferred_rows']} 条")
+    return plans
+
+def _date_segments(job, dates):
+    """将交易日拆分为交易日历上连续的区间 [(start_date, end_date), ...]"""
+    position = {date: i for i, date in enumerate(job.trading_dates())}
+    segments = []
+    for date in dates:
+        if segments and position[date] == position[segments[-1][1]] + 1:
+            segments[-1][1] = date
+        else:
+            segments.append([date, date])
+    return [tuple(segment) for segment in segments]
+
+def _append_usage_log(reports):
+    """追加每个任务的估算与实际消耗到 usage_log.csv"""
+    save_dir = get_path('quota_usage')
+    os.makedirs(save_dir, exist_ok=True)
+    save_path = os.path.join(save_dir, USAGE_LOG_FILE)
+    df = pd.DataFrame(reports)
+    df.to_csv(save_path, mode='a', header=not os.path.exists(save_path), index=False, encoding='utf-8-sig')
+    return save_path
+
+def run_jobs(jobs, spare=None, reserve_ratio=RESERVE_RATIO, dry_run=False):
+    """
+    规划并执行任务，报告每个任务的估算与实际消耗
+
+    Args:
+        jobs (list): QuotaJob 列表
+        spare (int, optional): 剩余额度，默认查询 jq.get_query_count
+        reserve_ratio (float): 保留的额度比例
+        dry_run (bool): 只规划不执行
+
+    Returns:
+        list: 每个任务一个 dict：任务名、数据集、本次与推迟的交易日数、估算条数、实际条数（执行前后剩余额度之差）
+    """
+    plans = plan_jobs(jobs, spare, reserve_ratio)
+    if dry_run:
+        return plans
+
+    run_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    reports = []
+    # 最新交易日在前的任务先执行
+    for plan in sorted(plans, key=lambda p: (p['scheduled'][-1] if p['scheduled'] else '', p['job'].priority), reverse=True):
+        job = plan['job']
+        report = {
+            'run_at': run_at,
+            'job': job.name,
+            'dataset': job.dataset,
+            'scheduled_days': len(plan['scheduled']),
+            'first_date': plan['scheduled'][0] if plan['scheduled'] else None,
+            'last_date': plan['scheduled'][-1] if plan['scheduled'] else None,
+            'deferred_days': len(plan['deferred']),
+            'estimated_rows': plan['estimated_rows'],
+            'actual_rows': 0,
+        }
+        if plan['scheduled']:
+            print(f"\n=== 执行任务 {job.name}: {report['first_date']} 至 {report['last_date']}，"
+                  f"{report['scheduled_days']} 个交易日 ===")
+            before = get_query_spare()
+            for start_date, end_date in _date_segments(job, plan['scheduled']):
+                try:
+                    job.run(start_date, end_date)
+                except Exception as e:
+                    print(f"任务 {job.name} 获取 {start_date} 至 {end_date} 时出错: {e}")
+            report['actual_rows'] = before - get_query_spare()
+        reports.append(report)
+
+    print("\n任务额度消耗:")
+    for report in reports:
+        ratio = report['actual_rows'] / report['estimated_rows'] if report['estimated_rows'] else None
+        print(f"  {report['job']}: 估算 {report['estimated_rows']} 条，实际 {report['actual_rows']} 条"
+              + (f"（实际/估算 {ratio:.2f}）" if ratio is not None else "")
+              + (f"，推迟 {report['deferred_days']} 个交易日" if report['deferred_days'] else ""))
+    save_path = _append_usage_log(reports)
+    print(f"额度消耗记录已追加至: {save_path}")
+    return reports
+
+def default_jobs(start_date, end_date=None):
+    """
+    日常更新任务：价格、估值、资金流向
+    导入对应模块时会登录聚宽账号
+
+    Args:
+        start_date (str): 开始日期
+        end_date (str, optional): 结束日期，默认为最新交易日
+
+    Returns:
+        list: QuotaJob 列表
+    """
+    from get_price import get_daily_price
+    from get_valuation import get_valuation, VALUATION_FIELDS
+    from get_money_flow import get_stock_moneyflow, MONEY_FLOW_FIELDS
+
+    price_fields = ['open', 'close', 'low', 'high', 'volume', 'money', 'factor', 'high_limit', 'low_limit', 'avg', 'pre_close', 'paused']
+    return [
+        QuotaJob('stock_price', 'stock_price',
+                 lambda s, e: get_daily_price(s, e, 'daily', price_fields, False, None, False, True,
+                                              batched=True, emit_post_factor=True),
+                 price_fields, start_date, end_date, priority=2, params={'fq': None}),
+        QuotaJob('stock_valuation', 'stock_valuation', get_valuation, VALUATION_FIELDS, start_date, end_date, priority=1),
+        QuotaJob('money_flow', 'money_flow', get_stock_moneyflow, MONEY_FLOW_FIELDS, start_date, end_date),
+    ]
+
+if __name__ == "__main__":
+    from Config.config import JQ_USERNAME, JQ_PASSWORD
+    jq.auth(JQ_USERNAME, JQ_PASSWORD)
+
+    jobs = default_jobs('2025-01-01')
+    # 先只看规划
+    plans = run_jobs(jobs, dry_run=True)
+    # reports = run_jobs(jobs)
@@ -0,0 +1,267 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import sys
+from datetime import datetime
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Config.data_path import get_path
+from Utils.get_trading_date import _to_day, _to_days
+from Utils.get_stock_list import get_stock_list
+
+"""
+金融行业分类索引（股票 -> 行业类型）
+由 stock_industry/{date}.csv 行业快照（get_stock_industry.py 生成）构建，不调用接口：
+每只股票按快照日期排列，相邻快照分类相同则合并为一个有效区间，区间从快照日期起生效，直到下一次分类变化
+
+行业类型：
+- bank:      银行（申万一级 801780，旧申万二级 801192）
+- security:  证券（申万二级 801193）
+- insurance: 保险（申万二级 801194）
+- finance:   其他金融（申万一级 801790 非银金融、旧申万一级 801190 金融服务中的其他股票）
+- 空字符串:   非金融
+
+早于第一份快照的日期使用该股票最早的分类；之后没有快照的日期沿用最后一次的分类；不在任何快照中的股票分类为 None
+get_sector_stocks 用于代替 get_industry_stocks，日期晚于最后一份快照或有股票不在快照中时返回 None，由调用方改用接口
+
+存储目录: Database/stock_sector/
+- sector_intervals.csv  code, sector, start_date, end_date（end_date 为下一区间的开始日期，最后一个区间为空）
+- meta.json             构建时使用的快照日期列表
+"""
+
+INTERVALS_FILE = 'sector_intervals.csv'
+META_FILE = 'meta.json'
+
+# 分类规则，按顺序匹配: (行业来源, 行业代码, 行业类型)
+SECTOR_RULES = [
+    ('sw_l1', '801780', 'bank'),
+    ('sw_l2', '801192', 'bank'),
+    ('sw_l2', '801193', 'security'),
+    ('sw_l2', '801194', 'insurance'),
+    ('sw_l1', '801790', 'finance'),
+    ('sw_l1', '801190', 'finance'),
+]
+# 金融行业类型
+FINANCE_SECTORS = ['bank', 'security', 'insurance', 'finance']
+# 行业类型对应的专用财务指标表（Config/fields_config.py 中的字段配置名）
+SECTOR_TABLES = {
+    'bank': 'bank_indicator_annual',
+    'security': 'security_indicator_annual',
+    'insurance': 'insurance_indicator_annual',
+}
+# 合并键中日期占用的位数
+_DAY_BITS = 32
+
+def list_industry_snapshots():
+    """stock_industry 目录下的快照日期，升序"""
+    save_dir = get_path('stock_industry')
+    if not os.path.isdir(save_dir):
+        return []
+    with os.scandir(save_dir) as entries:
+        return sorted(entry.name[:10] for entry in entries
+                      if entry.name.endswith('.csv') and len(entry.name) == 14)
+
+def classify_snapshot(df):
+    """
+    按 SECTOR_RULES 对单份行业快照分类
+
+    Args:
+        df (DataFrame): stock_industry 快照，包含 stock_code, source, industry_code
+
+    Returns:
+        Series: index 为股票代码，值为行业类型（非金融为空字符串）
+    """
+    codes = pd.Index(df['stock_code'].unique())
+    sector = pd.Series('', index=codes, dtype=object)
+    industry_code = df['industry_code'].astype(str)
+    # 倒序赋值，靠前的规则覆盖靠后的规则
+    for source, code, sector_type in reversed(SECTOR_RULES):
+        matched = df.loc[(df['source'] == source) & (industry_code == code), 'stock_code']
+        sector[matched.to_numpy()] = sector_type
+    return sector
+
+def build_sector_index():
+    """
+    由全部行业快照构建分类区间并保存
+
+    Returns:
+        DataFrame: 分类区间表，无快照时为 None
+    """
+    snapshots = list_industry_snapshots()
+    if not snapshots:
+        print(f"{get_path('stock_industry')} 下没有行业快照，请先运行 get_stock_industry.py")
+        return None
+
+    frames = []
+    for date in snapshots:
+        df = pd.read_csv(os.path.join(get_path('stock_industry'), f"{date}.csv"),
+                         usecols=['stock_code', 'source', 'industry_code'], dtype={'industry_code': str})
+        sector = classify_snapshot(df)
+        frames.append(pd.DataFrame({'code': sector.index, 'sector': sector.to_numpy(), 'date': date}))
+    history = pd.concat(frames, ignore_index=True).sort_values(['code', 'date'], kind='stable')
+
+    # 与同一股票上一份快照分类不同的行作为新区间的起点
+    changed = (history['code'] != history['code'].shift()) | (history['sector'] != history['sector'].shift())
+    intervals = history[changed].rename(columns={'date': 'start_date'}).reset_index(drop=True)
+    next_start = intervals['start_date'].shift(-1)
+    intervals['end_date'] = next_start.where(intervals['code'] == intervals['code'].shift(-1))
+
+    save_dir = get_path('stock_sector')
+    os.makedirs(save_dir, exist_ok=True)
+    intervals.to_csv(os.path.join(save_dir, INTERVALS_FILE), index=False, encoding='utf-8-sig')
+    meta = {
+        'snapshots': snapshots,
+        'built_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    with open(os.path.join(save_dir, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+    print(f"行业分类索引已保存至: {save_dir}（{len(snapshots)} 份快照，{intervals['code'].nunique()} 只股票，"
+          f"{len(intervals)} 个区间）")
+    return intervals
+
+class SectorIndex:
+    """
+    行业分类区间索引
+    区间按 (股票, 开始日期) 编码为有序 int64 键，查询时对全部股票一次 searchsorted
+    """
+
+    def __init__(self, intervals, snapshots=None):
+        """
+        Args:
+            intervals (DataFrame): build_sector_index 的返回值
+            snapshots (list, optional): 构建时使用的快照日期列表
+        """
+        intervals = intervals.sort_values(['code', 'start_date'], kind='stable')
+        self.snapshots = snapshots or []
+        codes, code_idx = np.unique(intervals['code'].to_numpy().astype(str), return_inverse=True)
+        self.codes = codes
+        self._code_index = pd.Index(codes)
+        self._keys = (code_idx.astype(np.int64) << _DAY_BITS) | _to_days(intervals['start_date']).astype(np.int64)
+        self._sectors = intervals['sector'].fillna('').to_numpy(dtype=object)
+        # 每只股票第一个区间的位置，用于早于第一份快照的日期
+        self._first = np.searchsorted(self._keys, np.arange(len(codes), dtype=np.int64) << _DAY_BITS)
+
+    @classmethod
+    def load(cls, rebuild=False):
+        """
+        读取已保存的索引；不存在或有新快照时由快照重新构建
+
+        Returns:
+            SectorIndex: 索引，没有任何快照时为 None
+        """
+        save_dir = get_path('stock_sector')
+        meta_path = os.path.join(save_dir, META_FILE)
+        snapshots = list_industry_snapshots()
+        if not rebuild and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta['snapshots'] == snapshots:
+                intervals = pd.read_csv(os.path.join(save_dir, INTERVALS_FILE), dtype={'sector': str})
+                return cls(intervals, snapshots)
+        intervals = build_sector_index()
+        return cls(intervals, snapshots) if intervals is not None else None
+
+    def sector_of(self, codes, date=None):
+        """
+        获取股票在某一日期的行业类型
+
+        Args:
+            codes (list): 股票代码列表
+            date (str, optional): 日期，默认为最后一份快照的分类
+
+        Returns:
+            numpy.ndarray: 行业类型数组，非金融股票为空字符串，不在任何快照中的股票为 None
+        """
+        code_pos = self._code_index.get_indexer(codes)
+        known = code_pos >= 0
+        day = _to_day(date).astype(np.int64) if date is not None else np.iinfo(np.int32).max
+        query = (np.maximum(code_pos, 0).astype(np.int64) << _DAY_BITS) | day
+        pos = np.searchsorted(self._keys, query, side='right') - 1
+        # 早于该股票第一个区间的日期使用第一个区间
+        pos = np.maximum(pos, self._first[np.maximum(code_pos, 0)])
+        result = np.full(len(code_pos), None, dtype=object)
+        result[known] = self._sectors[pos[known]]
+        return result
+
+    def route(self, codes, date=None):
+        """
+        将股票按行业类型分组
+
+        Returns:
+            dict: {行业类型: 股票代码列表}，非金融股票在 'general' 中，不在任何快照中的股票在 'unknown' 中，不含空分组
+        """
+        codes = list(codes)
+        sectors = self.sector_of(codes, date)
+        groups = {}
+        for code, sector in zip(codes, sectors):
+            groups.setdefault('unknown' if sector is None else sector or 'general', []).append(code)
+        return groups
+
+    def get_codes(self, sectors, codes, date=None):
+        """
+        从 codes 中选出属于指定行业类型的股票
+
+        Args:
+            sectors (str or list): 行业类型，如 'bank' 或 FINANCE_SECTORS
+            codes (list): 候选股票代码列表，如某一日期的股票列表
+            date (str, optional): 分类日期
+
+        Returns:
+            list: 股票代码列表，顺序与 codes 一致
+        """
+        sectors = [sectors] if isinstance(sectors, str) else list(sectors)
+        codes = list(codes)
+        mask = np.isin(self.sector_of(codes, date).astype(str), sectors)
+        return [code for code, keep in zip(codes, mask) if keep]
+
+# 进程内缓存的行业分类索引，行业快照列表变化时自动重建
+_INDEX = None
+
+def get_sector_index():
+    """
+    获取进程内缓存的行业分类索引
+    仅当 stock_industry 下的快照列表变化时重新加载
+
+    Returns:
+        SectorIndex: 索引，没有任何快照时为 None
+    """
+    global _INDEX
+    if _INDEX is None or _INDEX.snapshots != list_industry_snapshots():
+        _INDEX = SectorIndex.load()
+    return _INDEX
+
+def get_sector_stocks(date, sectors=FINANCE_SECTORS):
+    """
+    获取某一日期各行业类型的股票代码列表（不调用接口）
+    候选股票为 get_stock_list(date) 中当日上市的股票
+
+    Args:
+        date (str): 日期，格式为 'YYYY-MM-DD'
+        sectors (list): 行业类型列表
+
+    Returns:
+        dict: {行业类型: 股票代码列表}；没有行业快照、日期晚于最后一份快照或有股票不在快照中时为 None
+              （调用方改用 get_industry_stocks，避免新上市的金融股被当作非金融股）
+    """
+    index = get_sector_index()
+    if index is None:
+        return None
+    if str(date)[:10] > index.snapshots[-1]:
+        print(f"警告: {date} 晚于最后一份行业快照 {index.snapshots[-1]}，改用 get_industry_stocks")
+        return None
+    groups = index.route(get_stock_list(date), date)
+    unknown = groups.get('unknown', [])
+    if unknown:
+        print(f"警告: {len(unknown)} 只股票不在行业快照中（如 {unknown[:3]}），改用 get_industry_stocks")
+        return None
+    return {sector: groups.get(sector, []) for sector in sectors}
+
+if __name__ == "__main__":
+    build_sector_index()
+    index = get_sector_index()
+    if index is not None:
+        date = index.snapshots[-1]
+        for sector, group_codes in get_sector_stocks(date).items():
+            print(f"{sector}: {len(group_codes)} 只股票，如 {group_codes[:3]}")
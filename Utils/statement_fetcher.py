@@ -0,0 +1,542 @@
+from Utils import jq_cache as jq
+import pandas as pd
+import json
+import os
+import sys
+from datetime import datetime
+
+# 添加项目根目录到系统路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Config.data_path import get_path
+from Config.fields_config import FINANCIAL_FIELDS, TABLE_OUTPUTS
+from Utils.fetch_executor import iter_map, call
+
+"""
+财务报表批量获取引擎
+按 Config/fields_config.FINANCIAL_FIELDS 的表配置，将多张表的字段合并到尽可能少的 get_history_fundamentals 请求中，
+每次请求多只股票，返回结果在本地按表、按股票拆分，保存为 financial_data/<表目录>/{code}.csv
+
+合并规则：
+- 同一请求内的表必须是同一周期（季度 '1q' / 年度 '1y'），且覆盖相同的公司范围
+  （银行、券商、保险专用指标表只覆盖对应行业，不与通用报表合并）
+- code、statDate 为各表的公共连接键，pubDate 为同一期报告的披露日期，三者每次请求只取一份，再写回各表
+- 除上述字段外短字段名相同的表（如 income.operating_profit 与 indicator.operating_profit）不能放在同一请求，
+  否则返回结果无法区分列的来源
+- 接口文档没有说明多表合并请求按哪种方式连接：若只返回各表都有数据的股票（内连接），某张表缺数据的股票会在全部表中丢失。
+  因此合并请求中没有返回、也没有请求失败的股票，会逐表单独重新请求一次
+
+增量更新（update_statements）：
+每张表记录已见过的最新披露日期 pubDate（水位线），每次只用 get_fundamentals 按最近几个报告期扫描
+pubDate >= 水位线的记录，找出有新报告的股票，再只对这些股票批量获取最近几期并按 statDate 合并进已有文件；
+请求失败的股票记录在 failed_codes.json 中，下次更新时重新获取全部历史，有失败股票的表不推进水位线
+
+调用前需先完成 jqdatasdk 认证
+"""
+
+# 单次 get_history_fundamentals 请求的最大行数（股票数 × 期数）
+# 请求报错时会自动拆分为两半并重试
+HISTORY_FUNDAMENTALS_MAX_ROWS = 5000
+
+# 单次 get_fundamentals 查询返回的最大行数，超过时分页
+FUNDAMENTALS_PAGE_SIZE = 5000
+
+# 增量更新的水位线文件 {字段配置名: 'YYYY-MM-DD'}
+WATERMARK_FILE = 'watermarks.json'
+# 请求失败、待重新获取的股票 {字段配置名: [股票代码]}
+FAILED_CODES_FILE = 'failed_codes.json'
+
+# 各表共用的字段（短字段名）
+KEY_FIELDS = ['code', 'pubDate', 'statDate']
+
+# 只覆盖特定行业公司的表（字段前缀），不与其他表合并请求
+SECTOR_TABLE_PREFIXES = ['bank_indicator', 'security_indicator', 'insurance_indicator']
+
+# 周期对应的 get_history_fundamentals 参数
+PERIOD_PARAMS = {
+    'quarter': {'interval': '1q', 'stat_by_year': False},
+    'annual': {'interval': '1y', 'stat_by_year': True},
+}
+
+def _short_name(field):
+    """'balance.cash_equivalents' -> 'cash_equivalents'"""
+    return field.split('.', 1)[-1]
+
+def _table_period(table):
+    """根据字段配置名判断周期: 'quarter' 或 'annual'"""
+    return 'quarter' if table.endswith('_quarter') else 'annual'
+
+def _table_scope(table):
+    """表覆盖的公司范围: 行业专用表返回字段前缀，通用报表返回 'general'"""
+    prefix = FINANCIAL_FIELDS[table][0].split('.', 1)[0]
+    return prefix if prefix in SECTOR_TABLE_PREFIXES else 'general'
+
+def get_period_count(period, end_date, start_year=2005):
+    """
+    获取自start_year年初至end_date的期数
+
+    Args:
+        period (str): 'quarter' 或 'annual'
+        end_date (str): 结束日期，格式为 'YYYY-MM-DD'
+        start_year (int): 起始年份，默认为 2005
+
+    Returns:
+        int: 季度数（只计已结束的季度）或年度数
+    """
+    end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+    if period == 'annual':
+        return end_dt.year - start_year + 1
+    # 已结束的季度：季末日期不晚于 end_date
+    quarter_ends = [(3, 31), (6, 30), (9, 30), (12, 31)]
+    finished = sum(1 for month, day in quarter_ends if datetime(end_dt.year, month, day) <= end_dt)
+    return (end_dt.year - start_year) * 4 + finished
+
+def _table_fields(table, fields=None):
+    """表的完整字段列表，fields 中指定了该表时以指定的为准"""
+    return fields[table] if fields and table in fields else FINANCIAL_FIELDS[table]
+
+def plan_requests(tables, fields=None):
+    """
+    将多张表的字段合并为尽可能少的请求
+
+    Args:
+        tables (list): 字段配置名列表，如 ['balance_quarter', 'income_quarter']
+        fields (dict, optional): {字段配置名: [完整字段名]}，只请求表的部分字段时指定，默认为 FINANCIAL_FIELDS 中的全部字段
+
+    Returns:
+        list: 每个请求一项 {'period': 周期, 'tables': [字段配置名], 'fields': [完整字段名]}
+    """
+    groups = []
+    for table in tables:
+        if table not in FINANCIAL_FIELDS:
+            raise ValueError(f"未知的财务数据表: {table}")
+        period, scope = _table_period(table), _table_scope(table)
+        value_fields = [f for f in _table_fields(table, fields) if _short_name(f) not in KEY_FIELDS]
+        names = {_short_name(f) for f in value_fields}
+        for group in groups:
+            if group['period'] == period and group['scope'] == scope and not (group['names'] & names):
+                break
+        else:
+            prefix = FINANCIAL_FIELDS[table][0].split('.', 1)[0]
+            group = {'period': period, 'scope': scope, 'tables': [], 'names': set(),
+                     'fields': [f"{prefix}.{name}" for name in KEY_FIELDS]}
+            groups.append(group)
+        group['tables'].append(table)
+        group['names'] |= names
+        group['fields'].extend(value_fields)
+    return [{'period': g['period'], 'tables': g['tables'], 'fields': g['fields']} for g in groups]
+
+def _route(df, tables, fields=None):
+    """
+    将一次请求的结果拆分回各表
+
+    Returns:
+        dict: {字段配置名: DataFrame}，列顺序与字段配置一致
+    """
+    routed = {}
+    for table in tables:
+        columns = [c for c in (_short_name(f) for f in _table_fields(table, fields)) if c in df.columns]
+        table_df = df[columns]
+        value_columns = [c for c in columns if c not in KEY_FIELDS]
+        # 合并请求时，其他表有数据而本表没有的行会全部为空，剔除
+        if len(tables) > 1 and value_columns:
+            table_df = table_df.dropna(subset=value_columns, how='all')
+        routed[table] = table_df
+    return routed
+
+def _table_dir(table):
+    """表的保存目录"""
+    return os.path.join(get_path('financial_data'), TABLE_OUTPUTS[table][0])
+
+def _save_by_code(df, table, upsert=False):
+    """
+    将多只股票的结果按股票拆分，保存为与逐只获取相同的 {code}.csv 文件
+
+    Args:
+        upsert (bool): 为 True 时与已有文件按 (statDate, pubDate) 合并，否则覆盖；
+            同一报告期更正后重新披露的版本追加保存，保留此前披露的版本供 Utils/pit_store.py 按时点查询
+
+    Returns:
+        int: 保存的文件数
+    """
+    name = TABLE_OUTPUTS[table][1]
+    save_dir = _table_dir(table)
+    os.makedirs(save_dir, exist_ok=True)
+    saved = 0
+    for code, code_df in df.groupby('code', sort=False):
+        file_path = os.path.join(save_dir, f"{code}.csv")
+        if upsert and os.path.exists(file_path):
+            code_df = pd.concat([pd.read_csv(file_path), code_df], ignore_index=True)
+            for column in ('statDate', 'pubDate'):
+                code_df[column] = pd.to_datetime(code_df[column]).dt.strftime('%Y-%m-%d')
+            code_df = code_df.drop_duplicates(subset=['statDate', 'pubDate'], keep='last')
+            code_df = code_df.sort_values(['statDate', 'pubDate'], kind='stable')
+        code_df.to_csv(file_path, index=False, encoding='utf-8-sig')
+        saved += 1
+    print(f"{name}数据已保存至: {save_dir} ({saved} 只股票)")
+    return saved
+
+def _fetch_batch(batch, fields, end_date, count, period):
+    """
+    请求一批股票的 get_history_fundamentals，请求报错时将该批拆成两半分别重试，单只股票仍失败则跳过
+
+    Returns:
+        tuple: (各次成功请求的 DataFrame 列表, 失败的股票代码列表)
+    """
+    try:
+        df = call(jq.get_history_fundamentals,
+                  security=batch,
+                  fields=fields,
+                  watch_date=end_date,
+                  count=count,
+                  **PERIOD_PARAMS[period])
+    except Exception as e:
+        if len(batch) == 1:
+            print(f"获取{batch[0]}财务数据失败: {e}")
+            return [], list(batch)
+        half = len(batch) // 2
+        print(f"请求失败({e})，拆分为 {half} 和 {len(batch) - half} 只股票后重试")
+        first_frames, first_failed = _fetch_batch(batch[:half], fields, end_date, count, period)
+        second_frames, second_failed = _fetch_batch(batch[half:], fields, end_date, count, period)
+        return first_frames + second_frames, first_failed + second_failed
+    return ([df] if df is not None and not df.empty else []), []
+
+def _fetch_batched(codes, fields, end_date, count, period, max_rows, failed=None):
+    """
+    按股票分批请求 get_history_fundamentals
+
+    每批股票数 = max_rows // count，各批并发请求（见 Utils/fetch_executor.py），按股票顺序产出；
+    请求报错时将该批拆成两半后重试，单只股票仍失败则跳过
+
+    Args:
+        failed (list, optional): 传入时追加请求失败的股票代码
+
+    Yields:
+        DataFrame: 每批的返回结果
+    """
+    failed = failed if failed is not None else []
+    batch_size = max(1, max_rows // max(count, 1))
+    batches = [codes[i:i + batch_size] for i in range(0, len(codes), batch_size)]
+    done = 0
+    for batch, result, error in iter_map(lambda batch: _fetch_batch(batch, fields, end_date, count, period), batches):
+        done += len(batch)
+        if error is not None:
+            print(f"请求 {done - len(batch) + 1}~{done} / {len(codes)} 只股票失败: {error}")
+            failed.extend(batch)
+            continue
+        frames, batch_failed = result
+        failed.extend(batch_failed)
+        print(f"请求 {done - len(batch) + 1}~{done} / {len(codes)} 只股票: {sum(len(df) for df in frames)} 行"
+              + (f"，失败 {len(batch_failed)} 只" if batch_failed else ""))
+        yield from frames
+
+def _fetch_request(request, codes, end_date, count, max_rows, fields, save, upsert, results, failed):
+    """
+    执行 plan_requests 中的一个请求，结果按表拆分后保存，并追加到 results、failed
+
+    Returns:
+        set: 返回结果中出现的股票代码
+    """
+    names = '、'.join(TABLE_OUTPUTS[t][1] for t in request['tables'])
+    returned = set()
+    request_failed = []
+    for df in _fetch_batched(codes, request['fields'], end_date, count, request['period'], max_rows, request_failed):
+        returned.update(df['code'].unique())
+        for table, table_df in _route(df, request['tables'], fields).items():
+            if save and not table_df.empty:
+                _save_by_code(table_df, table, upsert=upsert)
+            results[table].append(table_df)
+    if request_failed:
+        print(f"{names}数据请求失败 {len(request_failed)} 只股票: {request_failed[:10]}"
+              + (" ..." if len(request_failed) > 10 else ""))
+    for table in request['tables']:
+        failed[table].extend(request_failed)
+    return returned
+
+def fetch_statements(tables, codes, end_date, count=None, max_rows=HISTORY_FUNDAMENTALS_MAX_ROWS, save=True,
+                     upsert=False, fields=None, return_failed=False):
+    """
+    批量获取多只股票的多张财务数据表
+
+    Args:
+        tables (list): 字段配置名列表，FINANCIAL_FIELDS 的键，如 ['balance_quarter', 'income_quarter']
+        codes (list): 股票代码列表
+        end_date (str): 结束日期（观察日期），格式为 'YYYY-MM-DD'
+        count (int, optional): 获取的期数，默认为自2005年至end_date的全部期数
+        max_rows (int): 单次请求的最大行数（股票数 × 期数）
+        save (bool): 是否按股票保存为 {code}.csv
+        upsert (bool): 保存时是否与已有文件按 statDate 合并，默认覆盖
+        fields (dict, optional): {字段配置名: [完整字段名]}，只获取部分字段时指定
+        return_failed (bool): 是否同时返回请求失败的股票
+
+    Returns:
+        dict: {字段配置名: DataFrame}，所有股票的合并结果；
+        return_failed=True 时返回 (结果, {字段配置名: 请求失败的股票代码列表})
+    """
+    results = {table: [] for table in tables}
+    failed = {table: [] for table in tables}
+    for request in plan_requests(tables, fields):
+        period = request['period']
+        request_count = count if count is not None else get_period_count(period, end_date)
+        names = '、'.join(TABLE_OUTPUTS[t][1] for t in request['tables'])
+        print(f"开始批量获取{len(codes)}只股票的{names}数据，共{request_count}期，{len(request['fields'])}个字段")
+        returned = _fetch_request(request, codes, end_date, request_count, max_rows, fields, save, upsert,
+                                  results, failed)
+        if len(request['tables']) == 1:
+            continue
+
+        # 合并请求未返回的股票逐表单独请求，避免某张表缺数据时其他表的数据随之丢失
+        request_failed = set(failed[request['tables'][0]])
+        missing = [code for code in codes if code not in returned and code not in request_failed]
+        if not missing:
+            continue
+        print(f"{names}合并请求未返回 {len(missing)} 只股票，逐表单独请求")
+        for table in request['tables']:
+            single = plan_requests([table], fields)[0]
+            _fetch_request(single, missing, end_date, request_count, max_rows, fields, save, upsert, results, failed)
+
+    for table, frames in results.items():
+        results[table] = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if results[table].empty:
+            print(f"无{TABLE_OUTPUTS[table][1]}数据")
+    if return_failed:
+        return results, failed
+    return results
+
+def _watermark_path():
+    return get_path('financial_data', WATERMARK_FILE)
+
+def load_watermarks():
+    """
+    读取各表的 pubDate 水位线
+
+    Returns:
+        dict: {字段配置名: 'YYYY-MM-DD'}
+    """
+    if not os.path.exists(_watermark_path()):
+        return {}
+    with open(_watermark_path()) as f:
+        return json.load(f)
+
+def _save_watermarks(watermarks):
+    os.makedirs(os.path.dirname(_watermark_path()), exist_ok=True)
+    with open(_watermark_path(), 'w') as f:
+        json.dump(watermarks, f, indent=2, sort_keys=True)
+
+def _failed_codes_path():
+    return get_path('financial_data', FAILED_CODES_FILE)
+
+def load_failed_codes():
+    """
+    读取请求失败、待重新获取的股票
+
+    Returns:
+        dict: {字段配置名: [股票代码]}
+    """
+    if not os.path.exists(_failed_codes_path()):
+        return {}
+    with open(_failed_codes_path()) as f:
+        return json.load(f)
+
+def record_failed_codes(tables, codes, failed):
+    """
+    更新待重新获取的股票：本次请求过的股票先移出，再加入本次请求失败的股票
+
+    Args:
+        tables (list): 本次请求的字段配置名
+        codes (list): 本次请求的股票代码
+        failed (dict): {字段配置名: 请求失败的股票代码列表}
+    """
+    stored = load_failed_codes()
+    attempted = set(codes)
+    for table in tables:
+        remaining = (set(stored.get(table, [])) - attempted) | set(failed.get(table, []))
+        if remaining:
+            stored[table] = sorted(remaining)
+        else:
+            stored.pop(table, None)
+    os.makedirs(os.path.dirname(_failed_codes_path()), exist_ok=True)
+    with open(_failed_codes_path(), 'w') as f:
+        json.dump(stored, f, indent=2, sort_keys=True)
+    return stored
+
+def record_watermarks(results, failed=None, codes=None):
+    """
+    全量获取后记录各表的 pubDate 水位线，之后可用 update_statements 增量更新
+    有股票请求失败的表不推进水位线，失败的股票记录到 failed_codes.json，下次增量更新时重新获取
+
+    Args:
+        results (dict): fetch_statements 的返回值 {字段配置名: DataFrame}
+        failed (dict, optional): fetch_statements(return_failed=True) 返回的 {字段配置名: 请求失败的股票代码列表}
+        codes (list, optional): 本次请求的股票代码，与 failed 一起传入
+    """
+    if failed is not None:
+        record_failed_codes(list(results), codes or [], failed)
+    watermarks = load_watermarks()
+    for table, df in results.items():
+        if failed and failed.get(table):
+            print(f"{TABLE_OUTPUTS[table][1]}({table}) {len(failed[table])} 只股票请求失败，水位线保持 {watermarks.get(table)}")
+            continue
+        if not df.empty and 'pubDate' in df.columns:
+            latest = str(df['pubDate'].max())[:10]
+            watermarks[table] = max(watermarks.get(table, latest), latest)
+    _save_watermarks(watermarks)
+
+def _scan_watermark(table):
+    """从已保存的 {code}.csv 中找出最新的 pubDate，用于首次增量更新，无文件时返回 None"""
+    save_dir = _table_dir(table)
+    if not os.path.isdir(save_dir):
+        return None
+    latest = None
+    with os.scandir(save_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.csv'):
+                continue
+            try:
+                pub_dates = pd.read_csv(entry.path, usecols=['pubDate'])['pubDate'].dropna()
+            except (ValueError, pd.errors.EmptyDataError):
+                continue
+            if not pub_dates.empty:
+                value = str(pub_dates.max())[:10]
+                latest = value if latest is None or value > latest else latest
+    return latest
+
+def _recent_stat_dates(period, end_date, lookback):
+    """
+    最近 lookback 个已结束的报告期，用作 get_fundamentals 的 statDate 参数
+
+    Returns:
+        list: 季度如 ['2025q2', '2025q1', ...]，年度如 ['2024', '2023', ...]
+    """
+    end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+    if period == 'annual':
+        return [str(end_dt.year - 1 - i) for i in range(lookback)]
+    index = end_dt.year * 4 + get_period_count('quarter', end_date, start_year=end_dt.year) - 1
+    return [f"{(index - i) // 4}q{(index - i) % 4 + 1}" for i in range(lookback)]
+
+def fundamentals_pages(q, page_size=FUNDAMENTALS_PAGE_SIZE, **kwargs):
+    """
+    按 offset/limit 分页执行 get_fundamentals 查询，查询需带 order_by 以保证分页稳定
+
+    Args:
+        q: jqdatasdk query 对象
+        page_size (int): 每页行数
+        **kwargs: 传给 get_fundamentals 的 date / statDate 参数
+
+    Yields:
+        DataFrame: 每页的返回结果（非空）
+    """
+    offset = 0
+    while True:
+        df = call(jq.get_fundamentals, q.offset(offset).limit(page_size), **kwargs)
+        if df is None or df.empty:
+            break
+        yield df
+        if len(df) < page_size:
+            break
+        offset += page_size
+
+def _discover_updates(table, watermark, end_date, lookback):
+    """
+    扫描最近 lookback 个报告期中 pubDate 在 [watermark, end_date] 内的记录
+
+    Returns:
+        DataFrame: code, pubDate, statDate
+    """
+    prefix = FINANCIAL_FIELDS[table][0].split('.', 1)[0]
+    jq_table = getattr(jq, prefix)
+    q = jq.query(jq_table.code, jq_table.pubDate, jq_table.statDate).filter(
+        jq_table.pubDate >= watermark, jq_table.pubDate <= end_date).order_by(jq_table.code)
+
+    frames = []
+    for stat_date in _recent_stat_dates(_table_period(table), end_date, lookback):
+        frames.extend(fundamentals_pages(q, statDate=stat_date))
+    if not frames:
+        return pd.DataFrame(columns=['code', 'pubDate', 'statDate'])
+    return pd.concat(frames, ignore_index=True)
+
+def _group_by_tables(table_codes, tables):
+    """
+    按股票需要请求的表分组，需要的表相同的股票合并为一组请求
+
+    Args:
+        table_codes (dict): {字段配置名: 股票代码列表}
+        tables (list): 考虑的字段配置名，决定组内表的顺序
+
+    Returns:
+        list: [(字段配置名列表, 股票代码列表), ...]
+    """
+    code_tables = {}
+    for table in tables:
+        for code in table_codes.get(table) or []:
+            code_tables.setdefault(code, []).append(table)
+    groups = {}
+    for code, code_table_list in code_tables.items():
+        groups.setdefault(tuple(code_table_list), []).append(code)
+    return [(list(group_tables), sorted(codes)) for group_tables, codes in sorted(groups.items())]
+
+def update_statements(tables, end_date, lookback=4, max_rows=HISTORY_FUNDAMENTALS_MAX_ROWS):
+    """
+    按 pubDate 水位线增量更新财务数据表
+
+    1. 对每张表用 get_fundamentals 扫描最近 lookback 个报告期内 pubDate >= 水位线的记录（全市场，按页请求）
+    2. 只对有新报告的股票、在其有新报告的表中批量获取最近 lookback 期数据，按 (statDate, pubDate) 合并进已有 {code}.csv；
+       有新报告的表相同的股票合并为一组请求
+    3. failed_codes.json 中此前请求失败的股票重新获取全部历史并合并，同样只请求失败的表
+    4. 水位线更新为本次见到的最新 pubDate；水位线当天的记录会被重复扫描，合并时按 (statDate, pubDate) 去重；
+       本次有股票请求失败的表保持原水位线，失败的股票记录到 failed_codes.json，下次更新时重新获取
+
+    没有水位线时从已保存文件中扫描最新 pubDate 作为起点；已保存文件也不存在时需先全量获取
+
+    Args:
+        tables (list): 字段配置名列表，如 ['balance_quarter', 'income_quarter']
+        end_date (str): 更新截至日期，格式为 'YYYY-MM-DD'
+        lookback (int): 扫描及重新获取的报告期数，默认为 4（覆盖年报与一季报同时披露、补充更正等情况）
+        max_rows (int): 重新获取时单次请求的最大行数
+
+    Returns:
+        dict: {字段配置名: 有新报告的股票代码列表}
+    """
+    watermarks = load_watermarks()
+    new_watermarks = {}
+    updated = {}
+    for table in tables:
+        watermark = watermarks.get(table) or _scan_watermark(table)
+        if watermark is None:
+            print(f"{TABLE_OUTPUTS[table][1]}({table}) 无历史数据，请先全量获取")
+            continue
+        found = _discover_updates(table, watermark, end_date, lookback)
+        codes = sorted(found['code'].unique())
+        print(f"{TABLE_OUTPUTS[table][1]}({table}): {watermark} 以来 {len(codes)} 只股票有新报告")
+        updated[table] = codes
+        new_watermarks[table] = max(watermark, str(found['pubDate'].max())[:10]) if not found.empty else watermark
+
+    failed = {table: [] for table in tables}
+
+    # 有新报告的股票只在其有新报告的表中重新获取
+    for group_tables, codes in _group_by_tables(updated, tables):
+        _, update_failed = fetch_statements(group_tables, codes, end_date, count=lookback,
+                                            max_rows=max_rows, upsert=True, return_failed=True)
+        record_failed_codes(group_tables, codes, update_failed)
+        for table in group_tables:
+            failed[table].extend(update_failed[table])
+
+    # 此前请求失败的股票重新获取全部历史
+    stored_failed = load_failed_codes()
+    retry_groups = _group_by_tables(stored_failed, tables)
+    if retry_groups:
+        print(f"重新获取此前请求失败的 {sum(len(codes) for _, codes in retry_groups)} 只股票")
+    for group_tables, codes in retry_groups:
+        _, retry_failed = fetch_statements(group_tables, codes, end_date, count=None,
+                                           max_rows=max_rows, upsert=True, return_failed=True)
+        record_failed_codes(group_tables, codes, retry_failed)
+        for table in group_tables:
+            failed[table].extend(retry_failed[table])
+
+    for table, watermark in new_watermarks.items():
+        if failed[table]:
+            print(f"{TABLE_OUTPUTS[table][1]}({table}) {len(set(failed[table]))} 只股票请求失败，"
+                  f"水位线保持 {watermarks.get(table)}")
+            continue
+        watermarks[table] = watermark
+    _save_watermarks(watermarks)
+    return updated
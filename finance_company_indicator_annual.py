@@ -1,10 +1,9 @@
 from jqdatasdk import *
 from Config.config import JQ_USERNAME, JQ_PASSWORD
 auth(JQ_USERNAME, JQ_PASSWORD)
-from Config.data_path import get_path
-from Config.fields_config import get_fields
-import pandas as pd
-import os
+from Utils.statement_fetcher import fetch_statements, HISTORY_FUNDAMENTALS_MAX_ROWS
+from Utils.jq_cache import get_industry_stocks
+from Utils.sector_index import get_sector_stocks
 
 """
 获取银行、券商、保险公司财务指标数据
@@ -39,135 +38,28 @@ class PlanTwo:
         """
         获取截至end_date的银行财务指标数据
         """
-        # 使用统一的字段配置
-        fields = get_fields('bank_indicator_annual')
-        
-        try:
-            print(f"开始获取{code}的银行财务指标数据")
-
-            # 如果没有指定count，计算从2005年到end_date的年度数
-            if count is None:
-                count = get_annual_count(end_date)
-            
-            # 使用get_history_fundamentals获取历史数据
-            df = get_history_fundamentals(
-                security=code, 
-                fields=fields, 
-                watch_date=end_date, 
-                count=count, 
-                interval='1y', 
-                stat_by_year=True
-            )
-            
-            if not df.empty:
-                print(f"成功获取{code}的银行财务指标数据，共{len(df)}期")
-                
-                # 保存数据
-                bank_indicator_dir = os.path.join(get_path('financial_data'), 'bank_indicator_annual')
-                os.makedirs(bank_indicator_dir, exist_ok=True)
-                file_path = os.path.join(bank_indicator_dir, f"{code}.csv")
-                df.to_csv(file_path, index=False, encoding='utf-8-sig')
-                print(f"银行财务指标数据已保存至: {file_path}")
-                
-                return df
-            else:
-                print(f"{code} 无银行财务指标数据")
-                return pd.DataFrame()
-                
-        except Exception as e:
-            print(f"获取{code}银行财务指标数据失败: {e}")
-            return pd.DataFrame()
+        return fetch_statements(['bank_indicator_annual'], [code], end_date, count)['bank_indicator_annual']
 
     def _get_security_indicator_annual(code, end_date, count=None):
         """
         获取截至end_date的券商财务指标数据
         """
-        # 使用统一的字段配置
-        fields = get_fields('security_indicator_annual')
-        
-        try:
-            print(f"开始获取{code}的券商财务指标数据")
-
-            # 如果没有指定count，计算从2005年到end_date的年度数
-            if count is None:
-                count = get_annual_count(end_date)
-            
-            # 使用get_history_fundamentals获取历史数据
-            df = get_history_fundamentals(
-                security=code, 
-                fields=fields, 
-                watch_date=end_date, 
-                count=count, 
-                interval='1y', 
-                stat_by_year=True
-                )
-            
-            if not df.empty:
-                print(f"成功获取{code}的券商财务指标数据，共{len(df)}期")
-                
-                # 保存数据
-                security_indicator_dir = os.path.join(get_path('financial_data'), 'security_indicator_annual')
-                os.makedirs(security_indicator_dir, exist_ok=True)
-                file_path = os.path.join(security_indicator_dir, f"{code}.csv")
-                df.to_csv(file_path, index=False, encoding='utf-8-sig')
-                print(f"券商财务指标数据已保存至: {file_path}")
-                
-                return df
-            else:
-                print(f"{code} 无券商财务指标数据")
-                return pd.DataFrame()
-                
-        except Exception as e:
-            print(f"获取{code}券商财务指标数据失败: {e}")
-            return pd.DataFrame()
+        return fetch_statements(['security_indicator_annual'], [code], end_date, count)['security_indicator_annual']
 
     def _get_insurance_indicator_annual(code, end_date, count=None):
         """
         获取截至end_date的保险财务指标数据
         """
-        # 使用统一的字段配置
-        fields = get_fields('insurance_indicator_annual')
-        
-        try:
-            print(f"开始获取{code}的保险财务指标数据")
-
-            # 如果没有指定count，计算从2005年到end_date的年度数
-            if count is None:
-                count = get_annual_count(end_date)
-            
-            # 使用get_history_fundamentals获取历史数据
-            df = get_history_fundamentals(
-                security=code, 
-                fields=fields, 
-                watch_date=end_date, 
-                count=count, 
-                interval='1y', 
-                stat_by_year=True
-                )
-            
-            if not df.empty:
-                print(f"成功获取{code}的保险财务指标数据，共{len(df)}期")
-                
-                # 保存数据
-                insurance_indicator_dir = os.path.join(get_path('financial_data'), 'insurance_indicator_annual')
-                os.makedirs(insurance_indicator_dir, exist_ok=True)
-                file_path = os.path.join(insurance_indicator_dir, f"{code}.csv")
-                df.to_csv(file_path, index=False, encoding='utf-8-sig')
-                print(f"保险财务指标数据已保存至: {file_path}")
-                
-                return df
-            else:
-                print(f"{code} 无保险财务指标数据")
-                return pd.DataFrame()
-                
-        except Exception as e:
-            print(f"获取{code}保险财务指标数据失败: {e}")
-            return pd.DataFrame()
+        return fetch_statements(['insurance_indicator_annual'], [code], end_date, count)['insurance_indicator_annual']
 
     def _get_finance_stock_list(end_date):
         """
         获取end_date的银行、券商、保险上市公司股票代码列表
+        优先使用本地行业分类索引（Utils/sector_index.py），没有行业快照、日期晚于最后一份快照或有股票不在快照中时调用 get_industry_stocks
         """
+        sector_stocks = get_sector_stocks(end_date, ['bank', 'security', 'insurance'])
+        if sector_stocks is not None:
+            return sector_stocks['bank'], sector_stocks['security'], sector_stocks['insurance']
         bank_stock_list = get_industry_stocks(industry_code='801780', date=end_date)
         print(bank_stock_list[:5])
         security_stock_list = get_industry_stocks(industry_code='801193', date=end_date)
@@ -176,15 +68,12 @@ class PlanTwo:
         print(insurance_stock_list[:5])
         return bank_stock_list, security_stock_list, insurance_stock_list
 
-    def get_finance_stock_indicator(end_date):
-        bank_stock_list, security_stock_list, insurance_stock_list = _get_finance_stock_list(end_date)
-        # 获取银行、券商、保险上市公司财务指标数据
-        for code in bank_stock_list:
-            _get_bank_indicator_annual(code, end_date, count=None)
-        for code in security_stock_list:
-            _get_security_indicator_annual(code, end_date, count=None)
-        for code in insurance_stock_list:
-            _get_insurance_indicator_annual(code, end_date, count=None)
+    def get_finance_stock_indicator(end_date, max_rows=HISTORY_FUNDAMENTALS_MAX_ROWS):
+        bank_stock_list, security_stock_list, insurance_stock_list = PlanTwo._get_finance_stock_list(end_date)
+        # 获取银行、券商、保险上市公司财务指标数据，每类公司多只股票批量请求
+        fetch_statements(['bank_indicator_annual'], bank_stock_list, end_date, max_rows=max_rows)
+        fetch_statements(['security_indicator_annual'], security_stock_list, end_date, max_rows=max_rows)
+        fetch_statements(['insurance_indicator_annual'], insurance_stock_list, end_date, max_rows=max_rows)
 
 if __name__ == '__main__':
     end_date = '2025-08-27'
@@ -1,11 +1,9 @@
 from jqdatasdk import *
 from Config.config import JQ_USERNAME, JQ_PASSWORD
 auth(JQ_USERNAME, JQ_PASSWORD)
-from Config.data_path import get_path
-from Config.fields_config import get_fields
 from Utils.get_stock_list import get_stock_list
-import pandas as pd
-import os
+from Utils.statement_fetcher import fetch_statements, update_statements, record_watermarks, HISTORY_FUNDAMENTALS_MAX_ROWS
+from Utils.annual_builder import build_annual_statements
 
 """
 获取财务数据
@@ -18,8 +16,14 @@ import os
 - 财务指标
 
 get_history_fundamentals(security, fields, watch_date=None, stat_date=None, count=count, interval='1y', stat_by_year=True)
+批量模式由 Utils/statement_fetcher.py 将四张表合并请求、多只股票一次获取，结果在本地按表、按股票拆分保存
+默认（from_quarter=True）由 Utils/annual_builder.py 从本地季度数据的第四季度生成年度数据，
+只有季度数据中没有对应年度值的字段通过接口获取，需要先运行 financial_data_quarter.py
 """
 
+# 年度财务数据表（Config/fields_config.py 中的字段配置名）
+ANNUAL_TABLES = ['balance_annual', 'income_annual', 'cash_flow_annual', 'indicator_annual']
+
 def get_annual_count(end_date):
     """
     获取自2005年1月1日至end_date的年度数量
@@ -51,180 +55,51 @@ def _get_balance_sheet_annual(code, end_date, count=None):
     Args:
         code (str): 股票代码，如 '000001.XSHE'
         end_date (str): 结束日期，格式为 'YYYY-MM-DD'
-        count (int): 获取的期数，如果为None则获取所有可用的季度数据
+        count (int): 获取的期数，如果为None则获取所有可用的年度数据
     """
-    # 使用统一的字段配置
-    fields = get_fields('balance_annual')
-    
-    try:        
-        # 如果没有指定count，计算从2005年到end_date的年度数
-        if count is None:
-            count = get_annual_count(end_date)
-        
-        # 使用get_history_fundamentals获取历史数据
-        df = get_history_fundamentals(
-            security=code, 
-            fields=fields, 
-            watch_date=end_date, 
-            count=count, 
-            interval='1y', 
-            stat_by_year=True
-        )
-        
-        if not df.empty:
-            print(f"成功获取{code}的资产负债表数据，共{len(df)}期")
-            
-            # 保存数据
-            balance_dir = os.path.join(get_path('financial_data'), 'balance_sheet_annual')
-            os.makedirs(balance_dir, exist_ok=True)
-            file_path = os.path.join(balance_dir, f"{code}.csv")
-            df.to_csv(file_path, index=False, encoding='utf-8-sig')
-            print(f"资产负债表数据已保存至: {file_path}")
-            
-            return df
-        else:
-            print(f"{code} 无资产负债表数据")
-            return pd.DataFrame()
-            
-    except Exception as e:
-        print(f"获取{code}资产负债表数据失败: {e}")
-        return pd.DataFrame()
+    return fetch_statements(['balance_annual'], [code], end_date, count)['balance_annual']
 
 def _get_income_statement_annual(code, end_date, count=None):
     """
     获取截至end_date的利润表，整合多个统计日期为一张表
     """
-    # 使用统一的字段配置
-    fields = get_fields('income_annual')
-    
-    try:
-        print(f"开始获取{code}的利润表数据")
-        
-        # 如果没有指定count，计算从2005年到end_date的年度数
-        if count is None:
-            count = get_annual_count(end_date)
-        
-        # 使用get_history_fundamentals获取历史数据
-        df = get_history_fundamentals(
-            security=code, 
-            fields=fields, 
-            watch_date=end_date, 
-            count=count, 
-            interval='1y', 
-            stat_by_year=True
-        )
-        
-        if not df.empty:
-            print(f"成功获取{code}的利润表数据，共{len(df)}期")
-            
-            # 保存数据
-            income_dir = os.path.join(get_path('financial_data'), 'income_statement_annual')
-            os.makedirs(income_dir, exist_ok=True)
-            file_path = os.path.join(income_dir, f"{code}.csv")
-            df.to_csv(file_path, index=False, encoding='utf-8-sig')
-            print(f"利润表数据已保存至: {file_path}")
-            
-            return df
-        else:
-            print(f"{code} 无利润表数据")
-            return pd.DataFrame()
-            
-    except Exception as e:
-        print(f"获取{code}利润表数据失败: {e}")
-        return pd.DataFrame()
+    return fetch_statements(['income_annual'], [code], end_date, count)['income_annual']
 
 def _get_cash_flow_annual(code, end_date, count=None):
     """
     获取截至end_date的现金流量表，整合多个统计日期为一张表
     """
-    # 使用统一的字段配置
-    fields = get_fields('cash_flow_annual')
-    
-    try:
-        print(f"开始获取{code}的现金流量表数据")
-        
-        # 如果没有指定count，计算从2005年到end_date的年度数
-        if count is None:
-            count = get_annual_count(end_date)
-        
-        # 使用get_history_fundamentals获取历史数据
-        df = get_history_fundamentals(
-            security=code, 
-            fields=fields, 
-            watch_date=end_date, 
-            count=count, 
-            interval='1y', 
-            stat_by_year=True
-        )
-        
-        if not df.empty:
-            print(f"成功获取{code}的现金流量表数据，共{len(df)}期")
-            
-            # 保存数据
-            cash_flow_dir = os.path.join(get_path('financial_data'), 'cash_flow_annual')
-            os.makedirs(cash_flow_dir, exist_ok=True)
-            file_path = os.path.join(cash_flow_dir, f"{code}.csv")
-            df.to_csv(file_path, index=False, encoding='utf-8-sig')
-            print(f"现金流量表数据已保存至: {file_path}")
-            
-            return df
-        else:
-            print(f"{code} 无现金流量表数据")
-            return pd.DataFrame()
-            
-    except Exception as e:
-        print(f"获取{code}现金流量表数据失败: {e}")
-        return pd.DataFrame()
+    return fetch_statements(['cash_flow_annual'], [code], end_date, count)['cash_flow_annual']
 
 def _get_indicator_annual(code, end_date, count=None):
     """
     获取截至end_date的财务指标数据，整合多个统计日期为一张表
     """
-    # 使用统一的字段配置
-    fields = get_fields('indicator_annual')
-    
-    try:
-        print(f"开始获取{code}的财务指标数据")
-        
-        # 如果没有指定count，计算从2005年到end_date的年度数
-        if count is None:
-            count = get_annual_count(end_date)
-        
-        # 使用get_history_fundamentals获取历史数据
-        df = get_history_fundamentals(
-            security=code, 
-            fields=fields, 
-            watch_date=end_date, 
-            count=count, 
-            interval='1y', 
-            stat_by_year=True
-        )
-        
-        if not df.empty:
-            print(f"成功获取{code}的财务指标数据，共{len(df)}期")
-            
-            # 保存数据
-            indicator_dir = os.path.join(get_path('financial_data'), 'indicator_annual')
-            os.makedirs(indicator_dir, exist_ok=True)
-            file_path = os.path.join(indicator_dir, f"{code}.csv")
-            df.to_csv(file_path, index=False, encoding='utf-8-sig')
-            print(f"财务指标数据已保存至: {file_path}")
-            
-            return df
-        else:
-            print(f"{code} 无财务指标数据")
-            return pd.DataFrame()
-            
-    except Exception as e:
-        print(f"获取{code}财务指标数据失败: {e}")
-        return pd.DataFrame()
+    return fetch_statements(['indicator_annual'], [code], end_date, count)['indicator_annual']
 
-def get_all_financial_data(end_date):
+def get_all_financial_data(end_date, batched=True, max_rows=HISTORY_FUNDAMENTALS_MAX_ROWS, from_quarter=True):
     """
     获取截至end_date的所有上市公司财务数据
+
+    Args:
+        end_date (str): 结束日期，格式为 'YYYY-MM-DD'
+        batched (bool): 是否批量请求，默认为 True（多只股票、多张表合并请求）；为 False 时逐只股票、逐张表请求
+        max_rows (int): 批量模式下单次请求的最大行数（股票数 × 年度数）
+        from_quarter (bool): 是否由本地季度数据生成年度数据，只通过接口获取季度数据中没有的字段
     """
     # 获取上市公司股票代码列表
     stock_list = get_stock_list(end_date)
+
+    if from_quarter:
+        results = build_annual_statements(end_date, ANNUAL_TABLES, codes=stock_list, max_rows=max_rows)
+        record_watermarks(results)
+        return
+
+    if batched:
+        results, failed = fetch_statements(ANNUAL_TABLES, stock_list, end_date, count=None, max_rows=max_rows,
+                                           return_failed=True)
+        record_watermarks(results, failed, stock_list)
+        return
     
     # for code in stock_list:
     for code in stock_list[:2]: # 测试用，只获取前2只股票
@@ -238,6 +113,27 @@ def get_all_financial_data(end_date):
         except Exception as e:
             print(f"{code} 获取财务数据失败: {e}")
 
+def update_financial_data(end_date, lookback=2, max_rows=HISTORY_FUNDAMENTALS_MAX_ROWS, from_quarter=True):
+    """
+    增量更新财务数据：只获取上次更新以来（按披露日期 pubDate）有新报告的股票，并合并进已有文件
+    需要先用 get_all_financial_data 全量获取一次
+
+    Args:
+        end_date (str): 更新截至日期，格式为 'YYYY-MM-DD'
+        lookback (int): 扫描及重新获取的最近年度数
+        max_rows (int): 单次请求的最大行数
+        from_quarter (bool): 是否由本地季度数据生成，只处理季度文件有更新的股票
+
+    Returns:
+        dict: {字段配置名: 有新报告的股票代码列表}
+    """
+    if from_quarter:
+        results = build_annual_statements(end_date, ANNUAL_TABLES, incremental=True, lookback=lookback,
+                                          max_rows=max_rows)
+        record_watermarks(results)
+        return {table: sorted(df['code'].unique()) if not df.empty else [] for table, df in results.items()}
+    return update_statements(ANNUAL_TABLES, end_date, lookback=lookback, max_rows=max_rows)
+
 def test_single_stock_financial_data(code, end_date, count=None):
     """
     测试单只股票的财务数据获取功能
@@ -324,4 +220,8 @@ if __name__ == '__main__':
     annual_count = get_annual_count(end_date)
     print(f"从2005年到{end_date}共有{annual_count}个年度")
     print("\n=== 获取所有上市公司股票财务数据 ===")
-    # get_all_financial_data(end_date)
\ No newline at end of file
+    # get_all_financial_data(end_date)
+
+    # 增量更新：只获取上次更新以来（按披露日期）有新报告的股票
+    print("\n=== 增量更新财务数据 ===")
+    # update_financial_data(end_date)
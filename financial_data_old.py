@@ -3,6 +3,8 @@ from Config.config import JQ_USERNAME, JQ_PASSWORD
 auth(JQ_USERNAME, JQ_PASSWORD)
 from Config.data_path import get_path
 from Utils.get_stock_list import get_stock_list
+from Utils.jq_cache import get_industry_stocks
+from Utils.sector_index import get_sector_stocks
 import pandas as pd
 import os
 
@@ -24,7 +26,12 @@ get_fundamentals(query_object, date=None, statDate=None) 单独一期，默认
 def _get_finance_stock_list(end_date):
     """
     获取end_date的金融领域上市公司股票代码列表
+    优先使用本地行业分类索引（Utils/sector_index.py），没有行业快照、日期晚于最后一份快照或有股票不在快照中时调用 get_industry_stocks
     """
+    sector_stocks = get_sector_stocks(end_date)
+    if sector_stocks is not None:
+        return sorted(set().union(*sector_stocks.values()))
+
     # 获取行业板块成分股
     industry_list = ['801190', '801780', '801790']  # 金融服务、银行、非银金融
     all_stocks = []
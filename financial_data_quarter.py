@@ -1,11 +1,9 @@
 from jqdatasdk import *
 from Config.config import JQ_USERNAME, JQ_PASSWORD
 auth(JQ_USERNAME, JQ_PASSWORD)
-from Config.data_path import get_path
-from Config.fields_config import get_fields
 from Utils.get_stock_list import get_stock_list
-import pandas as pd
-import os
+from Utils.statement_fetcher import fetch_statements, update_statements, record_watermarks, HISTORY_FUNDAMENTALS_MAX_ROWS
+from Utils.get_quarterly_financial_data import update_derived_tables
 
 """
 获取财务数据
@@ -18,8 +16,12 @@ import os
 - 财务指标
 
 get_history_fundamentals(security, fields, watch_date=None, stat_date=None, count=1, interval='1q', stat_by_year=False)
+security 支持股票代码列表，批量模式由 Utils/statement_fetcher.py 将四张表合并请求、多只股票一次获取，结果在本地按表、按股票拆分保存
 """
 
+# 季度财务数据表（Config/fields_config.py 中的字段配置名）
+QUARTER_TABLES = ['balance_quarter', 'income_quarter', 'cash_flow_quarter', 'indicator_quarter']
+
 def get_all_statsDate(end_date):
     """
     获取自2005年1月1日至end_date的所有季度节点日期
@@ -83,182 +85,45 @@ def _get_balance_sheet_quarter(code, end_date, count=None):
         end_date (str): 结束日期，格式为 'YYYY-MM-DD'
         count (int): 获取的期数，如果为None则获取所有可用的季度数据
     """
-    # 使用统一的字段配置
-    fields = get_fields('balance_quarter')
-    
-    try:        
-        # 如果没有指定count，计算从2005年到end_date的季度数
-        if count is None:
-            quarter_dates = get_all_statsDate(end_date)
-            count = len(quarter_dates)
-        
-        # 使用get_history_fundamentals获取历史数据
-        df = get_history_fundamentals(
-            security=code, 
-            fields=fields, 
-            watch_date=end_date, 
-            count=count, 
-            interval='1q', 
-            stat_by_year=False
-        )
-        
-        if not df.empty:
-            print(f"成功获取{code}的资产负债表数据，共{len(df)}期")
-            
-            # 保存数据
-            balance_dir = os.path.join(get_path('financial_data'), 'balance_sheet_quarter')
-            os.makedirs(balance_dir, exist_ok=True)
-            file_path = os.path.join(balance_dir, f"{code}.csv")
-            df.to_csv(file_path, index=False, encoding='utf-8-sig')
-            print(f"资产负债表数据已保存至: {file_path}")
-            
-            return df
-        else:
-            print(f"{code} 无资产负债表数据")
-            return pd.DataFrame()
-            
-    except Exception as e:
-        print(f"获取{code}资产负债表数据失败: {e}")
-        return pd.DataFrame()
+    return fetch_statements(['balance_quarter'], [code], end_date, count)['balance_quarter']
 
 def _get_income_statement_quarter(code, end_date, count=None):
     """
     获取截至end_date的利润表，整合多个统计日期为一张表
     """
-    # 使用统一的字段配置
-    fields = get_fields('income_quarter')
-    
-    try:
-        print(f"开始获取{code}的利润表数据")
-        
-        # 如果没有指定count，计算从2005年到end_date的季度数
-        if count is None:
-            quarter_dates = get_all_statsDate(end_date)
-            count = len(quarter_dates)
-        
-        # 使用get_history_fundamentals获取历史数据
-        df = get_history_fundamentals(
-            security=code, 
-            fields=fields, 
-            watch_date=end_date, 
-            count=count, 
-            interval='1q', 
-            stat_by_year=False
-        )
-        
-        if not df.empty:
-            print(f"成功获取{code}的利润表数据，共{len(df)}期")
-            
-            # 保存数据
-            income_dir = os.path.join(get_path('financial_data'), 'income_statement_quarter')
-            os.makedirs(income_dir, exist_ok=True)
-            file_path = os.path.join(income_dir, f"{code}.csv")
-            df.to_csv(file_path, index=False, encoding='utf-8-sig')
-            print(f"利润表数据已保存至: {file_path}")
-            
-            return df
-        else:
-            print(f"{code} 无利润表数据")
-            return pd.DataFrame()
-            
-    except Exception as e:
-        print(f"获取{code}利润表数据失败: {e}")
-        return pd.DataFrame()
+    return fetch_statements(['income_quarter'], [code], end_date, count)['income_quarter']
 
 def _get_cash_flow_quarter(code, end_date, count=None):
     """
     获取截至end_date的现金流量表，整合多个统计日期为一张表
     """
-    # 使用统一的字段配置
-    fields = get_fields('cash_flow_quarter')
-    
-    try:
-        print(f"开始获取{code}的现金流量表数据")
-        
-        # 如果没有指定count，计算从2005年到end_date的季度数
-        if count is None:
-            quarter_dates = get_all_statsDate(end_date)
-            count = len(quarter_dates)
-        
-        # 使用get_history_fundamentals获取历史数据
-        df = get_history_fundamentals(
-            security=code, 
-            fields=fields, 
-            watch_date=end_date, 
-            count=count, 
-            interval='1q', 
-            stat_by_year=False
-        )
-        
-        if not df.empty:
-            print(f"成功获取{code}的现金流量表数据，共{len(df)}期")
-            
-            # 保存数据
-            cash_flow_dir = os.path.join(get_path('financial_data'), 'cash_flow_quarter')
-            os.makedirs(cash_flow_dir, exist_ok=True)
-            file_path = os.path.join(cash_flow_dir, f"{code}.csv")
-            df.to_csv(file_path, index=False, encoding='utf-8-sig')
-            print(f"现金流量表数据已保存至: {file_path}")
-            
-            return df
-        else:
-            print(f"{code} 无现金流量表数据")
-            return pd.DataFrame()
-            
-    except Exception as e:
-        print(f"获取{code}现金流量表数据失败: {e}")
-        return pd.DataFrame()
+    return fetch_statements(['cash_flow_quarter'], [code], end_date, count)['cash_flow_quarter']
 
 def _get_indicator_quarter(code, end_date, count=None):
     """
     获取截至end_date的财务指标数据，整合多个统计日期为一张表
     """
-    # 使用统一的字段配置
-    fields = get_fields('indicator_quarter')
-    
-    try:
-        print(f"开始获取{code}的财务指标数据")
-        
-        # 如果没有指定count，计算从2005年到end_date的季度数
-        if count is None:
-            quarter_dates = get_all_statsDate(end_date)
-            count = len(quarter_dates)
-        
-        # 使用get_history_fundamentals获取历史数据
-        df = get_history_fundamentals(
-            security=code, 
-            fields=fields, 
-            watch_date=end_date, 
-            count=count, 
-            interval='1q', 
-            stat_by_year=False
-        )
-        
-        if not df.empty:
-            print(f"成功获取{code}的财务指标数据，共{len(df)}期")
-            
-            # 保存数据
-            indicator_dir = os.path.join(get_path('financial_data'), 'indicator_quarter')
-            os.makedirs(indicator_dir, exist_ok=True)
-            file_path = os.path.join(indicator_dir, f"{code}.csv")
-            df.to_csv(file_path, index=False, encoding='utf-8-sig')
-            print(f"财务指标数据已保存至: {file_path}")
-            
-            return df
-        else:
-            print(f"{code} 无财务指标数据")
-            return pd.DataFrame()
-            
-    except Exception as e:
-        print(f"获取{code}财务指标数据失败: {e}")
-        return pd.DataFrame()
+    return fetch_statements(['indicator_quarter'], [code], end_date, count)['indicator_quarter']
 
-def get_all_financial_data(end_date):
+def get_all_financial_data(end_date, batched=True, max_rows=HISTORY_FUNDAMENTALS_MAX_ROWS, stock_list=None):
     """
     获取截至end_date的所有上市公司财务数据
+
+    Args:
+        end_date (str): 结束日期，格式为 'YYYY-MM-DD'
+        batched (bool): 是否批量请求，默认为 True（多只股票、多张表合并请求）；为 False 时逐只股票、逐张表请求
+        max_rows (int): 批量模式下单次请求的最大行数（股票数 × 季度数）
+        stock_list (list, optional): 股票代码列表，默认为end_date上市的全部股票（全市场全部历史，消耗大量额度）
     """
     # 获取上市公司股票代码列表
-    stock_list = get_stock_list(end_date)
+    if stock_list is None:
+        stock_list = get_stock_list(end_date)
+
+    if batched:
+        results, failed = fetch_statements(QUARTER_TABLES, stock_list, end_date, count=None, max_rows=max_rows,
+                                           return_failed=True)
+        record_watermarks(results, failed, stock_list)
+        return
     
     # 获取非金融上市公司财务数据
     # for code in stock_list:
@@ -273,6 +138,25 @@ def get_all_financial_data(end_date):
         except Exception as e:
             print(f"{code} 获取财务数据失败: {e}")
 
+def update_financial_data(end_date, lookback=4, max_rows=HISTORY_FUNDAMENTALS_MAX_ROWS, derive=True):
+    """
+    增量更新财务数据：只获取上次更新以来（按披露日期 pubDate）有新报告的股票，并合并进已有文件
+    需要先用 get_all_financial_data 全量获取一次
+
+    Args:
+        end_date (str): 更新截至日期，格式为 'YYYY-MM-DD'
+        lookback (int): 扫描及重新获取的最近季度数
+        max_rows (int): 单次请求的最大行数
+        derive (bool): 是否同时更新单季度、TTM、同比、环比衍生表（只重新计算有新报告的股票）
+
+    Returns:
+        dict: {字段配置名: 有新报告的股票代码列表}
+    """
+    updated = update_statements(QUARTER_TABLES, end_date, lookback=lookback, max_rows=max_rows)
+    if derive:
+        update_derived_tables()
+    return updated
+
 def test_single_stock_financial_data(code, end_date, count=None):
     """
     测试单只股票的财务数据获取功能
@@ -340,7 +224,7 @@ if __name__ == '__main__':
     # 测试单只股票的财务数据获取功能
     test_end_date = '2025-08-27'
     test_code = '002371.XSHE'
-    get_all_financial_data(test_end_date)
+    get_all_financial_data(test_end_date, stock_list=[test_code])
 
     # 测试获取最近20个季度的数据
     print("\n" + "="*50)
@@ -359,4 +243,8 @@ if __name__ == '__main__':
     quarter_dates = get_all_statsDate(end_date)
     count = len(quarter_dates)
     print("\n=== 获取所有上市公司股票财务数据 ===")
-    get_all_financial_data(end_date)
\ No newline at end of file
+    # get_all_financial_data(end_date)
+
+    # 增量更新：只获取上次更新以来（按披露日期）有新报告的股票
+    print("\n=== 增量更新财务数据 ===")
+    # update_financial_data(end_date)
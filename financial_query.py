@@ -3,6 +3,10 @@ from Config.config import JQ_USERNAME, JQ_PASSWORD
 auth(JQ_USERNAME, JQ_PASSWORD)
 from Config.data_path import get_path
 from Utils.get_stock_list import get_stock_list
+from Utils.jq_cache import get_industry_stocks
+from Utils.sector_index import get_sector_stocks
+from Utils.bulk_query import iter_query_pages, save_pages_by_code
+from Utils.fetch_executor import iter_map
 import pandas as pd
 import os
 
@@ -16,97 +20,79 @@ import os
 用finance.run_query的方法获取非金融领域上市公司财务数据(按报告期)
 测试结果: 权限未明确
 
-实际使用时，需要替换代码中的测试代码， 目前获取的是列表前10个公司的财务数据
+每张表对全部股票批量查询，见 Utils/bulk_query.py；各表相互独立，并发查询（见 Utils/fetch_executor.py）
 """
 
+# 金融领域上市公司报表: {键: (finance 表, 保存目录, 中文名称)}
+FINANCE_COMPANY_TABLES = {
+    'balance_sheet': (finance.FINANCE_BALANCE_SHEET_PARENT, 'finance_balance_sheet', '资产负债表'),
+    'income_statement': (finance.STK_INCOME_STATEMENT, 'finance_income_statement', '利润表'),
+    'cash_flow': (finance.FINANCE_CASHFLOW_STATEMENT, 'finance_cash_flow', '现金流量表'),
+}
+
+# 非金融上市公司报表: {键: (表, 保存目录, 中文名称)}
+TABLES = {
+    'balance_sheet': (balance, 'balance_sheet', '资产负债表'),
+    'income_statement': (income, 'income_statement', '利润表'),
+    'cash_flow': (cash_flow, 'cash_flow', '现金流量表'),
+    'indicator': (indicator, 'indicator', '指标数据'),
+}
+
+def _fetch_finance_company_table(key, codes, end_date):
+    """
+    批量获取金融领域上市公司截至end_date的各报告期报表，按股票保存
+
+    Args:
+        key (str): FINANCE_COMPANY_TABLES 的键
+        codes (list): 股票代码列表
+        end_date (str): 发布日期上限，格式为 'YYYY-MM-DD'
+
+    Returns:
+        int: 保存的股票数
+    """
+    table, dir_name, name = FINANCE_COMPANY_TABLES[key]
+    print(f"获取{len(codes)}只股票截至{end_date}的{name}")
+    failed = []
+    pages = iter_query_pages(table, codes, filters=[
+        table.pub_date <= end_date,  # 指定发布日期<=end_date
+        table.report_type == 0,      # 指定为本期
+    ], date_column='pub_date', failed=failed)
+    # 每只股票按 pub_date、end_date 倒序保存（同一天可能发布多个季度的数据）
+    saved = save_pages_by_code(pages, os.path.join(get_path('financial_data'), dir_name),
+                               sort_by=['pub_date', 'end_date'], ascending=False)
+    if failed:
+        print(f"{name}: {len(failed)} 只股票查询失败，未保存")
+    elif saved == 0:
+        print(f"无{name}数据")
+    return saved
+
 def _get_finance_company_balance_sheet(code, end_date):
     """
     获取截至end_date的金融领域上市公司各报告期资产负债表
     """
-    q=query(finance.FINANCE_BALANCE_SHEET_PARENT).filter(
-        finance.FINANCE_BALANCE_SHEET_PARENT.code==code,
-        finance.FINANCE_BALANCE_SHEET_PARENT.pub_date<=end_date,  #指定发布日期<=2019-04-27
-        finance.FINANCE_BALANCE_SHEET_PARENT.report_type==0  #指定为本期
-            ).order_by(
-        finance.FINANCE_BALANCE_SHEET_PARENT.pub_date.desc(),  #先用pub_date排序
-        finance.FINANCE_BALANCE_SHEET_PARENT.end_date.desc()   #再也end_date排序(同一天可能发布多个季度的数据)
-            )
-    df=finance.run_query(q)
-    print(f"获取{code}截至{end_date}的资产负债表")
-    
-    # 保存数据
-    if not df.empty:
-        # 创建资产负债表目录
-        balance_dir = os.path.join(get_path('financial_data'), 'finance_balance_sheet')
-        os.makedirs(balance_dir, exist_ok=True)
-        
-        # 按股票代码保存
-        file_path = os.path.join(balance_dir, f"{code}.csv")
-        df.to_csv(file_path, index=False, encoding='utf-8-sig')
-        print(f"资产负债表数据已保存至: {file_path}")
-    else:
-        print(f"{code} 无资产负债表数据")
-    
+    return _fetch_finance_company_table('balance_sheet', [code], end_date)
+
 def _get_finance_company_income_statement(code, end_date):
     """
     获取截至end_date的金融领域上市公司各报告期利润表
     """
-    q=query(finance.STK_INCOME_STATEMENT).filter(
-        finance.STK_INCOME_STATEMENT.code==code,
-        finance.STK_INCOME_STATEMENT.pub_date<=end_date,  #指定发布日期<=2019-04-27
-        finance.STK_INCOME_STATEMENT.report_type==0  #指定为本期
-            ).order_by(
-        finance.STK_INCOME_STATEMENT.pub_date.desc(),  #先用pub_date排序
-        finance.STK_INCOME_STATEMENT.end_date.desc()   #再也end_date排序(同一天可能发布多个季度的数据)
-            )
-    df=finance.run_query(q)
-    print(f"获取{code}截至{end_date}的利润表")
-    
-    # 保存数据
-    if not df.empty:
-        # 创建利润表目录
-        income_dir = os.path.join(get_path('financial_data'), 'finance_income_statement')
-        os.makedirs(income_dir, exist_ok=True)
-        
-        # 按股票代码保存
-        file_path = os.path.join(income_dir, f"{code}.csv")
-        df.to_csv(file_path, index=False, encoding='utf-8-sig')
-        print(f"利润表数据已保存至: {file_path}")
-    else:
-        print(f"{code} 无利润表数据")
+    return _fetch_finance_company_table('income_statement', [code], end_date)
 
 def _get_finance_company_cash_flow(code, end_date):
     """
     获取截至end_date的金融领域上市公司各报告期现金流量表
     """
-    q=query(finance.FINANCE_CASHFLOW_STATEMENT).filter(
-        finance.FINANCE_CASHFLOW_STATEMENT.code==code,
-        finance.FINANCE_CASHFLOW_STATEMENT.pub_date<=end_date,  #指定发布日期<=2019-04-27
-        finance.FINANCE_CASHFLOW_STATEMENT.report_type==0  #指定为本期
-            ).order_by(
-        finance.FINANCE_CASHFLOW_STATEMENT.pub_date.desc(),  #先用pub_date排序
-        finance.FINANCE_CASHFLOW_STATEMENT.end_date.desc()   #再也end_date排序(同一天可能发布多个季度的数据)
-            )
-    df=finance.run_query(q)
-    print(f"获取{code}截至{end_date}的现金流量表")
-    
-    # 保存数据
-    if not df.empty:
-        # 创建现金流量表目录
-        cash_flow_dir = os.path.join(get_path('financial_data'), 'finance_cash_flow')
-        os.makedirs(cash_flow_dir, exist_ok=True)
-        
-        # 按股票代码保存
-        file_path = os.path.join(cash_flow_dir, f"{code}.csv")
-        df.to_csv(file_path, index=False, encoding='utf-8-sig')
-        print(f"现金流量表数据已保存至: {file_path}")
-    else:
-        print(f"{code} 无现金流量表数据")
+    return _fetch_finance_company_table('cash_flow', [code], end_date)
 
 def _get_finance_stock_list(end_date):
     """
     获取end_date的金融领域上市公司股票代码列表
+    优先使用本地行业分类索引（Utils/sector_index.py），没有行业快照、日期晚于最后一份快照或有股票不在快照中时调用 get_industry_stocks
     """
+    sector_stocks = get_sector_stocks(end_date)
+    if sector_stocks is not None:
+        return sorted(set().union(*sector_stocks.values()))
+
     # 获取行业板块成分股
     industry_list = ['801190', '801780', '801790']  # 金融服务、银行、非银金融
     all_stocks = []
@@ -122,135 +108,70 @@ def _get_finance_stock_list(end_date):
 def get_all_finance_company_data(end_date):
     """
     获取截至end_date的金融领域上市公司各报告期财务数据
+    每张表对全部股票批量查询（code.in_ 分批、超过单次行数上限时自动翻页）
     """
     stock_list = _get_finance_stock_list(end_date)
     print(f"获取到 {len(stock_list)} 只股票")
-    
-    # for code in stock_list:
-    for code in stock_list[:10]: # 测试用，只获取前10只股票
-        print(f"\n=== 获取{code}截至{end_date}的财务数据 ===")
-        try:
-            _get_finance_company_balance_sheet(code, end_date)
-            _get_finance_company_income_statement(code, end_date)
-            _get_finance_company_cash_flow(code, end_date)
 
-        except Exception as e:
-            print(f"获取{code}财务数据时出错: {e}")
-            continue
+    for key, _, error in iter_map(lambda key: _fetch_finance_company_table(key, stock_list, end_date),
+                                  FINANCE_COMPANY_TABLES):
+        if error is not None:
+            print(f"获取{FINANCE_COMPANY_TABLES[key][2]}时出错: {error}")
     
     print(f"\n获取金融领域所有股票截至{end_date}的财务数据完成")
 
+def _fetch_table(key, codes, end_date):
+    """
+    批量获取非金融上市公司截至end_date的各报告期报表，按股票保存
+
+    Args:
+        key (str): TABLES 的键
+        codes (list): 股票代码列表
+        end_date (str): 发布日期上限，格式为 'YYYY-MM-DD'
+
+    Returns:
+        int: 保存的股票数
+    """
+    table, dir_name, name = TABLES[key]
+    print(f"获取{len(codes)}只股票截至{end_date}的{name}")
+    failed = []
+    pages = iter_query_pages(table, codes, filters=[table.pubDate <= end_date], date_column='pubDate', failed=failed)
+    saved = save_pages_by_code(pages, os.path.join(get_path('financial_data'), dir_name),
+                               sort_by=['pubDate', 'statDate'], ascending=False)
+    if failed:
+        print(f"{name}: {len(failed)} 只股票查询失败，未保存")
+    elif saved == 0:
+        print(f"无{name}数据")
+    return saved
+
 def _get_balance_sheet(code, end_date):
     """
     获取截至end_date的资产负债表
     """
-    q = query(balance).filter(
-        balance.code == code,
-        balance.pubDate <= end_date,
-    ).order_by(
-        balance.pubDate.desc(),
-        balance.statDate.desc()
-    )
-    df = finance.run_query(q)
-    print(f"获取{code}截至{end_date}的资产负债表")
-    
-    # 保存数据
-    if not df.empty:
-        # 创建资产负债表目录
-        balance_dir = os.path.join(get_path('financial_data'), 'balance_sheet')
-        os.makedirs(balance_dir, exist_ok=True)
-        
-        # 按股票代码保存
-        file_path = os.path.join(balance_dir, f"{code}.csv")
-        df.to_csv(file_path, index=False, encoding='utf-8-sig')
-        print(f"资产负债表数据已保存至: {file_path}")
-    else:
-        print(f"{code} 无资产负债表数据")
+    return _fetch_table('balance_sheet', [code], end_date)
 
 def _get_income_statement(code, end_date):
     """
     获取截至end_date的利润表
     """
-    q = query(income).filter(
-        income.code == code,
-        income.pubDate <= end_date,
-    ).order_by(
-        income.pubDate.desc(),
-        income.statDate.desc()
-    )
-    df = finance.run_query(q)
-    print(f"获取{code}截至{end_date}的利润表")
-    
-    # 保存数据
-    if not df.empty:
-        # 创建利润表目录
-        income_dir = os.path.join(get_path('financial_data'), 'income_statement')
-        os.makedirs(income_dir, exist_ok=True)
-        
-        # 按股票代码保存
-        file_path = os.path.join(income_dir, f"{code}.csv")
-        df.to_csv(file_path, index=False, encoding='utf-8-sig')
-        print(f"利润表数据已保存至: {file_path}")
-    else:
-        print(f"{code} 无利润表数据")
+    return _fetch_table('income_statement', [code], end_date)
 
 def _get_cash_flow(code, end_date):
     """
     获取截至end_date的现金流量表
     """
-    q = query(cash_flow).filter(
-        cash_flow.code == code,
-        cash_flow.pubDate <= end_date,
-    ).order_by(
-        cash_flow.pubDate.desc(),
-        cash_flow.statDate.desc()
-    )
-    df = finance.run_query(q)
-    print(f"获取{code}截至{end_date}的现金流量表")
-    
-    # 保存数据
-    if not df.empty:
-        # 创建现金流量表目录
-        cash_flow_dir = os.path.join(get_path('financial_data'), 'cash_flow')
-        os.makedirs(cash_flow_dir, exist_ok=True)
-        
-        # 按股票代码保存
-        file_path = os.path.join(cash_flow_dir, f"{code}.csv")
-        df.to_csv(file_path, index=False, encoding='utf-8-sig')
-        print(f"现金流量表数据已保存至: {file_path}")
-    else:
-        print(f"{code} 无现金流量表数据")
+    return _fetch_table('cash_flow', [code], end_date)
 
 def _get_indicator(code, end_date):
     """
     获取截至end_date的指标数据
     """
-    q = query(indicator).filter(
-        indicator.code == code,
-        indicator.pubDate <= end_date,
-    ).order_by(
-        indicator.pubDate.desc(),
-        indicator.statDate.desc()
-    )
-    df = finance.run_query(q)
-    print(f"获取{code}截至{end_date}的指标数据")
-    
-    # 保存数据
-    if not df.empty:
-        # 创建指标数据目录
-        indicator_dir = os.path.join(get_path('financial_data'), 'indicator')
-        os.makedirs(indicator_dir, exist_ok=True)
-        
-        # 按股票代码保存
-        file_path = os.path.join(indicator_dir, f"{code}.csv")
-        df.to_csv(file_path, index=False, encoding='utf-8-sig')
-        print(f"指标数据已保存至: {file_path}")
-    else:
-        print(f"{code} 无指标数据")
+    return _fetch_table('indicator', [code], end_date)
 
 def get_all_financial_data(end_date):
     """
     获取截至end_date的所有非金融上市公司财务数据
+    每张表对全部股票批量查询（code.in_ 分批、超过单次行数上限时自动翻页）
     """
     # 获取上市公司股票代码列表
     stock_list = get_stock_list(end_date)
@@ -260,17 +181,9 @@ def get_all_financial_data(end_date):
     non_finance_stock_list = list(set(stock_list) - set(finance_stock_list))
     
     # 获取非金融上市公司财务数据
-    # for code in non_finance_stock_list:
-    for code in non_finance_stock_list[:10]: # 测试用，只获取前10只股票
-        print(f"获取{code}截至{end_date}的财务数据")
-        try:
-            _get_balance_sheet(code, end_date)
-            _get_income_statement(code, end_date)
-            _get_cash_flow(code, end_date)
-            _get_indicator(code, end_date)
-            print(f"{code} 获取财务数据成功")
-        except Exception as e:
-            print(f"{code} 获取财务数据失败: {e}")
+    for key, _, error in iter_map(lambda key: _fetch_table(key, non_finance_stock_list, end_date), TABLES):
+        if error is not None:
+            print(f"获取{TABLES[key][2]}失败: {error}")
 
 def example_query(code, statDate):
     """
@@ -1,10 +1,13 @@
-import jqdatasdk as jq
+from Utils import jq_cache as jq
 import pandas as pd
 import os
 from Utils.get_stock_list import get_stock_list
 from Utils.get_trading_date import get_trading_dates
 from Config.config import JQ_USERNAME, JQ_PASSWORD
 from Config.data_path import get_path
+from Utils.data_store import save_partition, load
+from Utils.fetch_executor import iter_map, call
+from Utils.partition_manifest import pending_dates
 
 jq.auth(JQ_USERNAME, JQ_PASSWORD)
 
@@ -31,16 +34,23 @@ def get_factor_list():
     
     return factors
 
-def get_jq_factors(factors, start_date=None, end_date=None, count=None):
+def get_jq_factors(factors, start_date=None, end_date=None, count=None, resume=True):
     """
     获取质量因子、基础因子、情绪因子、成长因子、风险因子、每股因子等数百个因子数据
     每个交易日使用对应的股票列表，自动处理已退市股票
+    各交易日的请求并发执行（见 Utils/fetch_executor.py），按交易日顺序处理，每个交易日获取后立即保存，获取过程中不在内存中累积；
+    全部完成后从分区文件读取整个区间的结果返回（含 resume 跳过的交易日）
 
     参数
     factors: 因子名称，单个因子（字符串）或一个因子列表
     start_date:开始日期，字符串或 datetime 对象，与 count参数二选一
     end_date: 结束日期， 字符串或 datetime 对象，可以与 start_date 或 count 配合使用
     count: 截止 end_date 之前交易日的数量（含 end_date 当日），与 start_date 参数二选一
+    resume: 是否跳过完成清单中已保存且包含全部所需因子的交易日（见 Utils/partition_manifest.py），默认为 True；
+        中断后重新运行时从第一个缺失的交易日继续
+
+    返回
+    DataFrame: 区间内各交易日的因子数据（date, code 及各因子），没有数据时为空 DataFrame
     """
     
     # 获取交易日列表
@@ -54,26 +64,32 @@ def get_jq_factors(factors, start_date=None, end_date=None, count=None):
     if not trading_dates:
         print("未找到交易日")
         return pd.DataFrame()
+    start, end = trading_dates[0], trading_dates[-1]
     
+    if resume:
+        trading_dates = pending_dates('factor_data', trading_dates, factors)
+
     print(f"计划获取 {len(trading_dates)} 个交易日的因子数据")
     
-    # 创建保存目录
-    save_dir = get_path('factor_data')
-    
     # 按日期处理，每个交易日使用对应的股票列表
-    all_results = []
+    saved_dates = []
     
-    for i, trading_date in enumerate(trading_dates):
-        print(f"\n=== 处理交易日 {i+1}/{len(trading_dates)}: {trading_date} ===")
-        
+    def fetch(trading_date):
         # 获取该交易日的股票列表
         securities = get_stock_list(trading_date)
-        print(f"  获取到 {len(securities)} 只股票")
-        
+
+        # 获取该日期的因子数据
+        return len(securities), call(jq.get_factor_values, securities, factors, trading_date, trading_date, count=None)
+
+    for i, (trading_date, result, error) in enumerate(iter_map(fetch, trading_dates)):
+        print(f"\n=== 处理交易日 {i+1}/{len(trading_dates)}: {trading_date} ===")
+
         try:
-            # 获取该日期的因子数据
-            date_results = jq.get_factor_values(securities, factors, trading_date, trading_date, count=None)
-            
+            if error is not None:
+                raise error
+            n_stocks, date_results = result
+            print(f"  获取到 {n_stocks} 只股票")
+
             if date_results is not None and not date_results.empty:
                 # 处理数据格式
                 if isinstance(date_results, pd.DataFrame):
@@ -88,12 +104,15 @@ def get_jq_factors(factors, start_date=None, end_date=None, count=None):
                     # 确保date列为字符串格式（用于文件名）
                     date_results['date'] = pd.to_datetime(date_results['date']).dt.strftime('%Y-%m-%d')
                     
-                    all_results.append(date_results)
-                    
                     day_records = len(date_results)
                     day_stocks = date_results['code'].nunique() if 'code' in date_results.columns else 0
                     
                     print(f"  成功获取 {trading_date} 因子数据: {day_records} 条记录，{day_stocks} 只股票")
+
+                    # 立即保存该日期的数据（不包含索引），写入完成清单
+                    save_path = save_partition(date_results, 'factor_data', trading_date)
+                    saved_dates.append(trading_date)
+                    print(f"  {trading_date} 因子数据已保存至: {save_path}")
                 else:
                     print(f"  {trading_date} 数据格式异常: {type(date_results)}")
             else:
@@ -103,25 +122,12 @@ def get_jq_factors(factors, start_date=None, end_date=None, count=None):
             print(f"  获取 {trading_date} 因子数据时出错: {e}")
             continue
     
-    if not all_results:
-        print("未获取到任何因子数据")
-        return pd.DataFrame()
-    
-    # 合并所有结果
-    results = pd.concat(all_results, ignore_index=True)
-    
-    # 按日期分组，分别保存
-    for date_value, group in results.groupby('date'):
-        # 生成文件名：2024-08-21.csv
-        filename = f"{date_value}.csv"
-        save_path = os.path.join(save_dir, filename)
-        
-        # 保存该日期的数据（不包含索引）
-        group.to_csv(save_path, index=False, encoding='utf-8-sig')
-        print(f"{date_value} 因子数据已保存至: {save_path} (共 {len(group)} 行)")
-    
-    print(f"所有因子数据已按日期分组保存，共 {results['date'].nunique()} 个文件")
+    if saved_dates:
+        print(f"所有因子数据已按日期保存，共 {len(saved_dates)} 个文件")
     
+    results = load('factor_data', start, end, fields=[factors] if isinstance(factors, str) else list(factors))
+    if results.empty:
+        print("未获取到任何因子数据")
     return results
 
 
@@ -1,5 +1,5 @@
 import pandas as pd
-import jqdatasdk as jq
+from Utils import jq_cache as jq
 import datetime
 import os
 from Config.config import JQ_USERNAME, JQ_PASSWORD
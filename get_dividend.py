@@ -1,10 +1,11 @@
-import jqdatasdk as jq
+from Utils import jq_cache as jq
 from jqdatasdk import finance
 import pandas as pd
 import os
 from Config.config import JQ_USERNAME, JQ_PASSWORD
 jq.auth(JQ_USERNAME, JQ_PASSWORD)
 from Config.data_path import get_path
+from Utils.bulk_query import iter_query_pages, save_pages_by_code
 import datetime
 
 def _prepare_dividend_dir():
@@ -80,80 +81,80 @@ def _deduplicate_dividend(new_df, existing_df):
         return new_df
     
 def get_dividend(end_date):
-    """获取截至end_date的历史分红信息"""
+    """
+    获取截至end_date的历史分红信息，全部股票批量查询（code.in_ 分批、超过单次行数上限时自动翻页）
+    有股票查询失败时不写入 dividend.log（复权因子以日志日期判断分红数据的覆盖范围），返回失败的股票供重新获取
+    """
     save_dir, stock_list = _prepare_dividend_dir()
 
-    # for code in stock_list:
-    for code in stock_list[:2]: # 测试用，只获取前1只股票
-        try:
-            q = jq.query(finance.STK_XR_XD).filter(
-                finance.STK_XR_XD.code == code,
-                finance.STK_XR_XD.report_date <= end_date
-            ).order_by(finance.STK_XR_XD.report_date)
-            df = jq.finance.run_query(q)
-            
-            if df.empty:
-                print(f"{code} 无分红数据")
-                continue
-                
-            file_path = os.path.join(save_dir, f"{code}.csv")
-            df.to_csv(file_path, index=False, encoding='utf-8-sig')
-            print(f"{code} 分红数据已保存")
-            
-        except Exception as e:
-            print(f"处理 {code} 失败: {e}")
-            continue
+    table = finance.STK_XR_XD
+    failed = []
+    pages = iter_query_pages(table, stock_list, filters=[table.report_date <= end_date], date_column='report_date',
+                             failed=failed)
+    saved = save_pages_by_code(pages, save_dir)
+    print(f"{saved} 只股票分红数据已保存，{len(stock_list) - saved - len(failed)} 只股票无分红数据"
+          + (f"，{len(failed)} 只股票查询失败" if failed else ""))
     
+    if failed:
+        print("有股票查询失败，未更新 dividend.log，请重新运行")
+        return failed
     _log_dividend_operation(save_dir, "全量更新", f"截至 {end_date}")
+    return failed
+
+def _merge_dividend(code, new_df, save_dir):
+    """将单只股票的增量分红数据去重后追加到已有文件，返回新增行数"""
+    file_path = os.path.join(save_dir, f"{code}.csv")
+    
+    if os.path.exists(file_path):
+        existing_df = pd.read_csv(file_path)
+        # 使用更健壮的去重逻辑
+        new_df = _deduplicate_dividend(new_df, existing_df)
+        
+        if new_df.empty:
+            print(f"{code} 无真正新增数据")
+            return 0
+            
+        combined_df = pd.concat([existing_df, new_df], ignore_index=True)
+    else:
+        combined_df = new_df
+    
+    combined_df.to_csv(file_path, index=False, encoding='utf-8-sig')
+    print(f"{code} 新增 {len(new_df)} 条数据")
+    return len(new_df)
 
-# 修复后的get_dividend_delta函数
 def get_dividend_delta(last_date):
-    """从last_date之后获取增量分红数据"""
+    """
+    从last_date之后获取增量分红数据，全部股票批量查询，只处理有新增记录的股票
+    有股票查询失败时不写入 dividend.log，返回失败的股票，下次以同一 last_date 重新运行即可补齐
+    """
     save_dir, stock_list = _prepare_dividend_dir()
     print(f"开始增量更新，从 {last_date} 之后的数据")
-    print(f"将检查 {len(stock_list[:2])} 只股票的增量数据")
+    print(f"将检查 {len(stock_list)} 只股票的增量数据")
     
     # 确认last_date是字符串
     last_date = pd.to_datetime(last_date).strftime('%Y-%m-%d')
     
-    # for code in stock_list:
-    for code in stock_list[:2]: # 测试用，只获取前2只股票
-        try:
-            # 使用 > 而不是 >=
-            q = jq.query(finance.STK_XR_XD).filter(
-                finance.STK_XR_XD.code == code,
-                finance.STK_XR_XD.report_date > last_date
-            ).order_by(finance.STK_XR_XD.report_date)
-            new_df = jq.finance.run_query(q)
-            
-            if new_df.empty:
-                print(f"{code} 无新增分红数据（查询条件：report_date > {last_date}）")
-                continue  # 无新增数据，跳过
-                
-            file_path = os.path.join(save_dir, f"{code}.csv")
-            
-            if os.path.exists(file_path):
-                existing_df = pd.read_csv(file_path)
-                # 使用更健壮的去重逻辑
-                new_df = _deduplicate_dividend(new_df, existing_df)
-                
-                if new_df.empty:
-                    print(f"{code} 无真正新增数据")
-                    continue
-                    
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-            else:
-                combined_df = new_df
-            
-            combined_df.to_csv(file_path, index=False, encoding='utf-8-sig')
-            print(f"{code} 新增 {len(new_df)} 条数据")
-            
-        except Exception as e:
-            print(f"处理 {code} 失败: {e}")
-            continue
+    # 使用 > 而不是 >=
+    table = finance.STK_XR_XD
+    updated = 0
+    failed = []
+    for df in iter_query_pages(table, stock_list, filters=[table.report_date > last_date], date_column='report_date',
+                               failed=failed):
+        for code, new_df in df.groupby('code', sort=False):
+            try:
+                if _merge_dividend(code, new_df.reset_index(drop=True), save_dir):
+                    updated += 1
+            except Exception as e:
+                print(f"处理 {code} 失败: {e}")
+                continue
+    print(f"{updated} 只股票有新增分红数据（查询条件：report_date > {last_date}）")
+    if failed:
+        print(f"{len(failed)} 只股票查询失败，未更新 dividend.log，请以 {last_date} 重新运行")
+        return failed
     
     current_date = datetime.datetime.now().strftime('%Y-%m-%d')
     _log_dividend_operation(save_dir, "增量更新", f"{last_date} -> {current_date}")
+    return failed
 
 if __name__ == '__main__':
     # 全量更新，输入结束日期
@@ -1,9 +1,9 @@
 import pandas as pd
-import jqdatasdk as jq
-import os
+from Utils import jq_cache as jq
 from Utils.get_stock_list import get_stock_list
 from Config.config import JQ_USERNAME, JQ_PASSWORD
-from Config.data_path import get_path
+from Utils.data_store import save_partition
+from Utils.fetch_executor import iter_map, call
 
 jq.auth(JQ_USERNAME, JQ_PASSWORD)
 
@@ -13,6 +13,7 @@ def get_is_st(field, start_date, end_date):
     存储方式: 按日期存储
     数据来源: jqdatasdk
     每个交易日使用对应的股票列表，自动处理已退市股票
+    各交易日的请求并发执行（见 Utils/fetch_executor.py），按交易日顺序处理
 
     参数：
     field: 字段名称
@@ -32,17 +33,22 @@ def get_is_st(field, start_date, end_date):
     # 按日期处理，每个交易日使用对应的股票列表
     all_results = []
     
-    for i, trading_date in enumerate(trading_dates):
-        print(f"\n=== 处理交易日 {i+1}/{len(trading_dates)}: {trading_date} ===")
-        
+    def fetch(trading_date):
         # 获取该交易日的股票列表
         stock_list = get_stock_list(trading_date)
-        print(f"  获取到 {len(stock_list)} 只股票")
-        
+
+        # 获取该日期的数据（格式：date为索引，stock_code为列）
+        return len(stock_list), call(jq.get_extras, field, stock_list, trading_date, trading_date)
+
+    for i, (trading_date, result, error) in enumerate(iter_map(fetch, trading_dates)):
+        print(f"\n=== 处理交易日 {i+1}/{len(trading_dates)}: {trading_date} ===")
+
         try:
-            # 获取该日期的数据（格式：date为索引，stock_code为列）
-            date_results = jq.get_extras(field, stock_list, trading_date, trading_date)
-            
+            if error is not None:
+                raise error
+            n_stocks, date_results = result
+            print(f"  获取到 {n_stocks} 只股票")
+
             if date_results is not None and not date_results.empty:
                 # 命名索引
                 date_results.index.name = 'date'
@@ -76,16 +82,10 @@ def get_is_st(field, start_date, end_date):
     # 合并所有结果
     results_stacked = pd.concat(all_results, ignore_index=True)
     
-    # 创建保存目录
-    save_dir = get_path('is_st')
-    
     # 6. 按日期分组，分别保存
     for date_value, group in results_stacked.groupby('date'):
-        filename = f"{date_value}.csv"
-        save_path = os.path.join(save_dir, filename)
-        
         # 保存该日期的数据
-        group.to_csv(save_path, index=False, encoding='utf-8-sig')
+        save_path = save_partition(group, 'is_st', date_value)
         print(f"{date_value} 数据已保存至: {save_path}")
     
     print(f"\n 所有数据已按日期分组保存，共 {results_stacked['date'].nunique()} 个文件")
@@ -1,5 +1,5 @@
 import pandas as pd
-import jqdatasdk as jq
+from Utils import jq_cache as jq
 import os
 from Config.config import JQ_USERNAME, JQ_PASSWORD
 from Config.index_config import INDEX_SYMBOL_LIST, INDUSTRY_INDEX_SYMBOL_LIST, CONCEPT_INDEX_SYMBOL_LIST
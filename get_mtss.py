@@ -1,9 +1,9 @@
 import pandas as pd
-import jqdatasdk as jq
-import os
+from Utils import jq_cache as jq
 from Utils.get_stock_list import get_stock_list
 from Config.config import JQ_USERNAME, JQ_PASSWORD
-from Config.data_path import get_path
+from Utils.data_store import save_partition
+from Utils.fetch_executor import iter_map, call
 
 jq.auth(JQ_USERNAME, JQ_PASSWORD)
 
@@ -12,6 +12,7 @@ def get_mtss_info(start_date, end_date, fields):
     获取多只股票在一个时间段内的融资融券信息，并按日期分别存储
     数据来源: jqdatasdk
     每个交易日使用对应的股票列表，自动处理已退市股票
+    各交易日的请求并发执行（见 Utils/fetch_executor.py），按交易日顺序处理
 
     参数：
     start_date: 开始日期
@@ -28,23 +29,25 @@ def get_mtss_info(start_date, end_date, fields):
     
     print(f"计划获取 {len(trading_dates)} 个交易日的数据")
     
-    # 创建保存目录
-    save_dir = get_path('mtss_info')
-    
     # 按日期处理，每个交易日使用对应的股票列表
     all_results = []
     
-    for i, trading_date in enumerate(trading_dates):
-        print(f"\n=== 处理交易日 {i+1}/{len(trading_dates)}: {trading_date} ===")
-        
+    def fetch(trading_date):
         # 获取该交易日的股票列表
         stock_list = get_stock_list(trading_date)
-        print(f"  获取到 {len(stock_list)} 只股票")
-        
+
+        # 获取该日期的数据
+        return len(stock_list), call(jq.get_mtss, stock_list, trading_date, trading_date, fields)
+
+    for i, (trading_date, result, error) in enumerate(iter_map(fetch, trading_dates)):
+        print(f"\n=== 处理交易日 {i+1}/{len(trading_dates)}: {trading_date} ===")
+
         try:
-            # 获取该日期的数据
-            date_results = jq.get_mtss(stock_list, trading_date, trading_date, fields)
-            
+            if error is not None:
+                raise error
+            n_stocks, date_results = result
+            print(f"  获取到 {n_stocks} 只股票")
+
             if date_results is not None and not date_results.empty:
                 # 确保date列存在且格式正确
                 if 'date' not in date_results.columns:
@@ -72,12 +75,8 @@ def get_mtss_info(start_date, end_date, fields):
     
     # 按日期分组，分别保存
     for date_value, group in results.groupby('date'):
-        # 生成文件名：2024-08-21.csv
-        filename = f"{date_value}.csv"
-        save_path = os.path.join(save_dir, filename)
-        
         # 保存该日期的数据（不包含索引）
-        group.to_csv(save_path, index=False, encoding='utf-8-sig')
+        save_path = save_partition(group, 'mtss_info', date_value)
         print(f"{date_value} 数据已保存至: {save_path} (共 {len(group)} 行)")
     
     print(f"所有数据已按日期分组保存，共 {results['date'].nunique()} 个文件")
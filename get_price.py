@@ -1,16 +1,186 @@
-import jqdatasdk as jq
+from Utils import jq_cache as jq
+import pandas as pd
+import glob
 import os
-from Utils.get_stock_list import get_stock_list
-from Utils.get_trading_date import get_trading_dates
+import re
+from Utils.get_stock_list import get_stock_list, get_stock_universe
+from Utils.get_trading_date import get_trading_dates, get_previous_trading_date, get_next_trading_date
 from Config.config import JQ_USERNAME, JQ_PASSWORD
 from Config.data_path import get_path
+from Utils.data_store import save_partition, read_partition, list_partition_dates
+from Utils.fetch_executor import call
+from Utils.fetch_pipeline import run_pipeline
+from Utils.partition_manifest import pending_dates
 
 jq.auth(JQ_USERNAME, JQ_PASSWORD)
 
-def get_daily_price(start_date, end_date, frequency, fields, skip_paused, fq, panel, fill_paused):
+# 批量模式下单次 get_price 请求的最大行数（股票数 × 交易日数）
+# 请求超限报错时会自动拆分为两半并重试
+GET_PRICE_MAX_ROWS = 200000
+
+def _normalize_price_df(df, panel):
+    """
+    统一 get_price 返回数据的格式：Panel转DataFrame，确保有date列，删除多余的index列
+    """
+    # 处理Panel格式
+    if panel:
+        df = df.to_frame()
+
+    # 确保有日期列
+    if 'date' not in df.columns:
+        df = df.reset_index()
+        if 'time' in df.columns:
+            df = df.rename(columns={'time': 'date'})
+        elif 'index' in df.columns:
+            df = df.rename(columns={'index': 'date'})
+
+    # 删除多余的index列
+    if 'index' in df.columns:
+        df = df.drop('index', axis=1)
+
+    return df
+
+def _save_daily_partition(df, data_type, trading_date, params=None):
+    """
+    保存单个交易日的数据文件
+    params: 记录到完成清单的请求参数，如 {'fq': 'post'}
+    """
+    save_path = save_partition(df, data_type, trading_date, params=params)
+    print(f"价格数据已保存至: {save_path}")
+
+def _get_price_by_day(data_type, trading_dates, frequency, fields, skip_paused, fq, panel, fill_paused,
+                      on_partition=None):
+    """
+    逐日请求 get_price，每个交易日一次网络请求
+    请求、格式整理与保存以流水线方式重叠执行（见 Utils/fetch_pipeline.py），按交易日顺序保存
+    on_partition: 每个交易日保存后的回调 on_partition(df, trading_date)
+
+    返回：
+    流水线各阶段的统计
+    """
+    def fetch(trading_date):
+        # 获取当前交易日的股票列表
+        stock_list = get_stock_list(trading_date)
+
+        # 获取当前交易日的价格数据
+        return call(jq.get_price, stock_list, start_date=trading_date, end_date=trading_date,
+                    frequency=frequency, fields=fields, skip_paused=skip_paused,
+                    fq=fq, panel=panel, fill_paused=fill_paused)
+
+    def transform(trading_date, df):
+        if df is None or df.empty:
+            print(f"{trading_date} 无价格数据，跳过保存")
+            return None
+        df = _normalize_price_df(df, panel)
+        print(f"获取到 {trading_date} 的价格数据: {len(df)} 条记录")
+        print(df.head(5))
+        return df
+
+    def write(trading_date, df):
+        _save_daily_partition(df, data_type, trading_date, params={'fq': fq})
+        if on_partition is not None:
+            on_partition(df, trading_date)
+
+    return run_pipeline(trading_dates, fetch, transform, write)
+
+def _plan_price_windows(universe, trading_dates, max_rows):
+    """
+    将交易日划分为批量请求的时间窗口
+    窗口长度 = max_rows // 股票数，以窗口首日的股票数估算，再按区间股票池并集收缩
+
+    Returns:
+        list: [(窗口交易日列表, 股票代码列表), ...]
+    """
+    windows = []
+    i = 0
+    while i < len(trading_dates):
+        n_days = max(1, max_rows // max(len(universe.get_list(trading_dates[i])), 1))
+        window = trading_dates[i:i + n_days]
+        stock_list = universe.get_window_list(window[0], window[-1])
+        while len(window) > 1 and len(stock_list) * len(window) > max_rows:
+            window = window[:max(1, max_rows // len(stock_list))]
+            stock_list = universe.get_window_list(window[0], window[-1])
+        windows.append((window, stock_list))
+        i += len(window)
+    return windows
+
+def _fetch_price_window(universe, window, stock_list, frequency, fields, skip_paused, fq, fill_paused):
+    """
+    请求一个时间窗口的 get_price，请求报错时将窗口拆成两半分别重试，单个交易日仍失败则跳过
+
+    Returns:
+        list: 各次成功请求的 DataFrame
+    """
+    print(f"请求 {window[0]} ~ {window[-1]} ({len(window)} 个交易日, {len(stock_list)} 只股票)")
+    try:
+        df = call(jq.get_price, stock_list, start_date=window[0], end_date=window[-1],
+                  frequency=frequency, fields=fields, skip_paused=skip_paused,
+                  fq=fq, panel=False, fill_paused=fill_paused)
+    except Exception as e:
+        if len(window) == 1:
+            print(f"获取 {window[0]} 价格数据时出错: {e}")
+            return []
+        half = len(window) // 2
+        print(f"请求失败({e})，拆分为 {half} 和 {len(window) - half} 个交易日后重试")
+        frames = []
+        for part in (window[:half], window[half:]):
+            frames += _fetch_price_window(universe, part, universe.get_window_list(part[0], part[-1]),
+                                          frequency, fields, skip_paused, fq, fill_paused)
+        return frames
+    return [df] if df is not None and not df.empty else []
+
+def _get_price_batched(data_type, trading_dates, frequency, fields, skip_paused, fq, fill_paused, max_rows,
+                       on_partition=None):
+    """
+    按时间窗口批量请求 get_price
+    每个窗口使用区间内股票池的并集一次性请求，再在本地剔除不在上市区间内的行，按交易日拆分保存
+    窗口长度 = max_rows // 股票数，请求报错时将窗口拆成两半后重试
+    请求、拆分与保存以流水线方式重叠执行（见 Utils/fetch_pipeline.py），按交易日顺序保存
+    on_partition: 每个交易日保存后的回调 on_partition(df, trading_date)
+
+    返回：
+    流水线各阶段的统计
+    """
+    universe = get_stock_universe()
+    windows = _plan_price_windows(universe, trading_dates, max_rows)
+
+    def fetch(plan):
+        return _fetch_price_window(universe, plan[0], plan[1], frequency, fields, skip_paused, fq, fill_paused)
+
+    def transform(plan, frames):
+        """按交易日拆分窗口数据，返回 [(交易日, DataFrame)]"""
+        window = plan[0]
+        groups = {}
+        if frames:
+            df = pd.concat([_normalize_price_df(frame, panel=False) for frame in frames], ignore_index=True)
+            # 剔除窗口内尚未上市或已退市的行
+            df = df[universe.is_listed(df['code'].to_numpy(), df['date'].to_numpy())]
+            day_keys = df['date'].dt.strftime('%Y-%m-%d')
+            groups = dict(tuple(df.groupby(day_keys, sort=False)))
+
+        days = []
+        for trading_date in window:
+            day_df = groups.get(trading_date)
+            if day_df is not None and not day_df.empty:
+                print(f"获取到 {trading_date} 的价格数据: {len(day_df)} 条记录")
+                days.append((trading_date, day_df))
+            else:
+                print(f"{trading_date} 无价格数据，跳过保存")
+        return days
+
+    def write(plan, days):
+        for trading_date, day_df in days:
+            _save_daily_partition(day_df, data_type, trading_date, params={'fq': fq})
+            if on_partition is not None:
+                on_partition(day_df, trading_date)
+
+    return run_pipeline(windows, fetch, transform, write)
+
+def get_daily_price(start_date, end_date, frequency, fields, skip_paused, fq, panel, fill_paused,
+                    batched=False, max_rows=GET_PRICE_MAX_ROWS, emit_post_factor=False, resume=True):
     """
     按日期范围获取价格数据，确保每个交易日的数据完整性
-    
+
     参数：
     start_date: 开始日期 (格式: '2025-08-20')
     end_date: 结束日期 (格式: '2025-08-27')
@@ -18,111 +188,219 @@ def get_daily_price(start_date, end_date, frequency, fields, skip_paused, fq, pa
     fields: 查询字段，默认为 ['open', 'close', 'high', 'low', 'volume', 'money']
     skip_paused: 是否跳过停牌，默认为 False
     fq: 复权方式，默认为 'post' (后复权)
-    panel: 是否返回 Panel 对象，默认为 False (返回 DataFrame)
+    panel: 是否返回 Panel 对象，默认为 False (返回 DataFrame)，批量模式下忽略
     fill_paused: 是否填充停牌数据，默认为 True
-    
+    batched: 是否按时间窗口批量请求，默认为 False (逐日请求)
+    max_rows: 批量模式下单次请求的最大行数（股票数 × 交易日数）
+    emit_post_factor: 是否同时生成 stock_post_factor 后复权因子文件，默认为 False
+        fq='post' 且 fields 含 factor 时直接取本次返回的 factor；
+        否则按除权除息事件增量更新（见 update_post_factor）
+    resume: 是否跳过完成清单中已保存、包含 fields 各列且复权方式与 fq 相同的交易日（见 Utils/partition_manifest.py），
+        默认为 True
+
     返回：
-    所有日期的价格数据字典 {date: DataFrame}
+    流水线各阶段的统计（获取、整理、保存的项数、行数、耗时与吞吐）
     """
     # 获取交易日列表
     trading_dates = get_trading_dates(start_date, end_date)
     print(f"交易日范围: {len(trading_dates)} 个交易日")
-        
-    for trading_date in trading_dates:
-        # 获取当前交易日的股票列表
-        stock_list = get_stock_list(trading_date)
-        # print(stock_list[:10])
+    if resume:
+        trading_dates = pending_dates('stock_price', trading_dates, fields, params={'fq': fq})
 
-        # 获取当前交易日的价格数据
-        df = jq.get_price(stock_list, start_date=trading_date, end_date=trading_date,
-                        frequency=frequency, fields=fields, skip_paused=skip_paused,
-                        fq=fq, panel=panel, fill_paused=fill_paused)
-        
+    on_partition = None
+    if emit_post_factor:
+        on_partition = lambda df, trading_date: _emit_post_factor(df, trading_date, fq)
+
+    if batched:
+        return _get_price_batched('stock_price', trading_dates, frequency, fields, skip_paused, fq, fill_paused,
+                                  max_rows, on_partition=on_partition)
+    return _get_price_by_day('stock_price', trading_dates, frequency, fields, skip_paused, fq, panel, fill_paused,
+                             on_partition=on_partition)
+
+def _emit_post_factor(df, trading_date, fq):
+    """
+    由当日价格数据生成后复权因子文件
+    后复权(fq='post')请求返回的 factor 即后复权因子，直接保存；
+    不复权(fq=None)时返回的 factor 不是后复权因子，改为按除权除息事件增量更新
+    """
+    if fq == 'post' and 'factor' in df.columns:
+        _save_daily_partition(df[['date', 'code', 'factor']], 'stock_post_factor', trading_date)
+    else:
+        update_post_factor(trading_date)
+
+# 除权除息日索引 {code: set(a_xr_date)}，首次使用时从分红数据目录加载，目录或 dividend.log 修改后重新加载
+_XR_DATES = None
+_XR_DATES_VERSION = None
+# 分红数据覆盖到的日期（dividend.log 中最近一次更新的日期与记录中最新公告日期的较大者）
+_DIVIDEND_COVERAGE = None
+
+def _dividend_version():
+    """
+    分红数据的版本标识：目录与 dividend.log 的修改时间
+    get_dividend / get_dividend_delta 每次运行都会追加 dividend.log；改写已有 csv 不改变目录的修改时间，因此同时检查日志
+    """
+    save_dir = get_path('dividend')
+    log_path = os.path.join(save_dir, 'dividend.log')
+    return tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in (save_dir, log_path))
+
+def _read_dividend_log_date():
+    """dividend.log 最后一条更新记录中的日期（'截至 end_date' 或 'last_date -> 当天'），没有日志时返回 None"""
+    log_path = os.path.join(get_path('dividend'), 'dividend.log')
+    if not os.path.exists(log_path):
+        return None
+    with open(log_path) as f:
+        lines = [line for line in f if line.strip()]
+    dates = re.findall(r'\d{4}-\d{2}-\d{2}', lines[-1]) if lines else []
+    return dates[-1] if dates else None
+
+def _load_xr_dates():
+    """
+    从 get_dividend.py 保存的 STK_XR_XD 数据中读取各股票的A股除权除息日，同时计算分红数据覆盖到的日期
+
+    Returns:
+        dict: {code: set('YYYY-MM-DD', ...)}
+    """
+    global _XR_DATES, _XR_DATES_VERSION, _DIVIDEND_COVERAGE
+    version = _dividend_version()
+    if _XR_DATES is None or version != _XR_DATES_VERSION:
+        xr_dates = {}
+        coverage = _read_dividend_log_date()
+        for file_path in glob.glob(os.path.join(get_path('dividend'), '*.csv')):
+            try:
+                df = pd.read_csv(file_path, usecols=lambda c: c in ('code', 'a_xr_date') or c.endswith('pub_date'))
+            except (ValueError, pd.errors.EmptyDataError):
+                continue
+            for column in df.columns:
+                if column.endswith('pub_date'):
+                    newest = pd.to_datetime(df[column], errors='coerce').max()
+                    if pd.notna(newest) and (coverage is None or newest.strftime('%Y-%m-%d') > coverage):
+                        coverage = newest.strftime('%Y-%m-%d')
+            if 'a_xr_date' not in df.columns:
+                continue
+            df = df.dropna(subset=['a_xr_date'])
+            dates = pd.to_datetime(df['a_xr_date']).dt.strftime('%Y-%m-%d')
+            for code, xr_date in zip(df['code'], dates):
+                xr_dates.setdefault(code, set()).add(xr_date)
+        _XR_DATES, _XR_DATES_VERSION, _DIVIDEND_COVERAGE = xr_dates, version, coverage
+    return _XR_DATES
+
+def _dividend_coverage_date():
+    """分红数据覆盖到的日期，没有分红数据时返回 None"""
+    _load_xr_dates()
+    return _DIVIDEND_COVERAGE
+
+def _get_xr_codes(trading_date):
+    """获取trading_date当天除权除息的股票代码集合"""
+    return {code for code, dates in _load_xr_dates().items() if trading_date in dates}
+
+def update_post_factor(trading_date):
+    """
+    增量更新单个交易日的后复权因子
+    后复权因子以上市首日为基准，只在除权除息日变化：
+    - 前一交易日因子文件中已有、当天无除权除息事件的股票，沿用前一交易日的因子
+    - 当天除权除息、新上市或前一交易日因子缺失的股票，才请求 get_price(fq='post')
+    前一交易日因子文件不存在时，当天全部股票都通过接口获取；
+    分红数据未覆盖到 trading_date（get_dividend_delta 未及时运行）时无法确认当天的除权除息事件，不沿用因子，全部通过接口获取
+    """
+    stock_list = get_stock_list(trading_date)
+    if not stock_list:
+        print(f"{trading_date} 无股票列表，跳过后复权因子更新")
+        return
+
+    prev_date = get_previous_trading_date(trading_date, 1)
+    prev_df = read_partition('stock_post_factor', prev_date, columns=['code', 'factor']) if prev_date else None
+    if prev_df is not None:
+        prev_df = prev_df.dropna(subset=['factor'])
+        prev_factor = dict(zip(prev_df['code'], prev_df['factor']))
+    else:
+        prev_factor = {}
+
+    xr_codes = _get_xr_codes(trading_date)
+    coverage = _dividend_coverage_date()
+    if prev_factor and (coverage is None or coverage < trading_date):
+        print(f"分红数据仅覆盖至 {coverage}，早于 {trading_date}，无法确认当日除权除息事件，"
+              f"全部股票通过接口获取（请先运行 get_dividend_delta）")
+        prev_factor = {}
+    fetch_list = [code for code in stock_list if code in xr_codes or code not in prev_factor]
+    print(f"{trading_date} 后复权因子: 沿用 {len(stock_list) - len(fetch_list)} 只，接口获取 {len(fetch_list)} 只"
+          f"（除权除息 {len(xr_codes & set(stock_list))} 只）")
+
+    frames = []
+    carried = [code for code in stock_list if code not in xr_codes and code in prev_factor]
+    if carried:
+        frames.append(pd.DataFrame({
+            'date': pd.Timestamp(trading_date),
+            'code': carried,
+            'factor': [prev_factor[code] for code in carried],
+        }))
+    if fetch_list:
+        df = call(jq.get_price, fetch_list, start_date=trading_date, end_date=trading_date,
+                  frequency='daily', fields=['factor'], skip_paused=False,
+                  fq='post', panel=False, fill_paused=True)
         if df is not None and not df.empty:
-            # 处理Panel格式
-            if panel:
-                df = df.to_frame()
-            
-            # 确保有日期列
-            if 'date' not in df.columns:
-                df = df.reset_index()
-                if 'time' in df.columns:
-                    df = df.rename(columns={'time': 'date'})
-                elif 'index' in df.columns:
-                    df = df.rename(columns={'index': 'date'})
-            
-            print(f"获取到 {trading_date} 的价格数据: {len(df)} 条记录")
-            if not df.empty:
-                print(df.head(5))
-            
-            # 删除多余的index列
-            if 'index' in df.columns:
-                df = df.drop('index', axis=1)
-            
-            # 保存数据
-            save_dir = get_path('stock_price')
-            filename = f"{trading_date}.csv"
-            save_path = os.path.join(save_dir, filename)
-            df.to_csv(save_path, index=False, encoding='utf-8-sig')
-            print(f"价格数据已保存至: {save_path}")
-        else:
-            print(f"{trading_date} 无价格数据，跳过保存")
+            frames.append(_normalize_price_df(df, panel=False)[['date', 'code', 'factor']])
 
-def get_post_factor(end_date):
+    if not frames:
+        print(f"{trading_date} 无后复权因子数据，跳过保存")
+        return
+
+    # 按当日股票列表顺序输出
+    result = pd.concat(frames, ignore_index=True)
+    order = pd.Index(stock_list).get_indexer(result['code'])
+    result = result.iloc[order.argsort(kind='stable')].reset_index(drop=True)
+    _save_daily_partition(result, 'stock_post_factor', trading_date)
+
+def _get_last_partition_date(data_type, end_date):
+    """获取数据目录中不晚于end_date的最新日期文件，不存在时返回None"""
+    dates = [date for date in list_partition_dates(data_type) if date <= end_date]
+    return dates[-1] if dates else None
+
+def get_post_factor(end_date, start_date=None, full=False, batched=False, max_rows=GET_PRICE_MAX_ROWS):
     """
     获取后复权因子
-    每天都要更新一遍全量数据
+
+    默认增量更新：从已有因子文件的最新日期之后逐日调用 update_post_factor，
+    只对除权除息、新上市的股票请求接口；没有任何已有文件时从start_date开始
+    full=True 时按原方式全量重新获取 start_date ~ end_date 的因子
+
+    参数：
+    end_date: 结束日期
+    start_date: 全量获取或无历史文件时的起始日期，默认为 '2024-08-22'
+    full: 是否全量重新获取，默认为 False
+    batched: 全量获取时是否按时间窗口批量请求
+    max_rows: 批量模式下单次请求的最大行数
     """
+    if start_date is None:
+        start_date = '2024-08-22' # 起始日期，可以根据需要调整
+
+    if not full:
+        last_date = _get_last_partition_date('stock_post_factor', end_date)
+        if last_date is not None:
+            start_date = get_next_trading_date(last_date, 1)
+            if start_date is None or start_date > end_date:
+                print(f"后复权因子已更新至 {last_date}，无需更新")
+                return
+        trading_dates = get_trading_dates(start_date, end_date)
+        print(f"交易日范围: {len(trading_dates)} 个交易日（增量更新）")
+        for trading_date in trading_dates:
+            update_post_factor(trading_date)
+        return
+
     # 获取交易日列表
-    start_date = '2024-08-22' # 起始日期，可以根据需要调整
     trading_dates = get_trading_dates(start_date, end_date)
     print(f"交易日范围: {len(trading_dates)} 个交易日")
-    
-    for trading_date in trading_dates:
-        # 获取当前交易日的股票列表
-        stock_list = get_stock_list(trading_date)
-        # print(stock_list[:10])
-        frequency='daily'
-        fields=['factor']
-        skip_paused=False
-        fq ='post'
-        panel=False
-        fill_paused=True
 
-        # 获取当前交易日的价格数据
-        df = jq.get_price(stock_list, start_date=trading_date, end_date=trading_date,
-                        frequency=frequency, fields=fields, skip_paused=skip_paused,
-                        fq=fq, panel=panel, fill_paused=fill_paused)
-        
-        if df is not None and not df.empty:
-            # 处理Panel格式
-            if panel:
-                df = df.to_frame()
-            
-            # 确保有日期列
-            if 'date' not in df.columns:
-                df = df.reset_index()
-                if 'time' in df.columns:
-                    df = df.rename(columns={'time': 'date'})
-                elif 'index' in df.columns:
-                    df = df.rename(columns={'index': 'date'})
-            
-            print(f"获取到 {trading_date} 的价格数据: {len(df)} 条记录")
-            if not df.empty:
-                print(df.head(5))
-            
-            # 删除多余的index列
-            if 'index' in df.columns:
-                df = df.drop('index', axis=1)
-            
-            # 保存数据
-            save_dir = get_path('stock_post_factor')
-            filename = f"{trading_date}.csv"
-            save_path = os.path.join(save_dir, filename)
-            df.to_csv(save_path, index=False, encoding='utf-8-sig')
-            print(f"价格数据已保存至: {save_path}")
-        else:
-            print(f"{trading_date} 无价格数据，跳过保存")
+    frequency='daily'
+    fields=['factor']
+    skip_paused=False
+    fq ='post'
+    panel=False
+    fill_paused=True
+
+    if batched:
+        _get_price_batched('stock_post_factor', trading_dates, frequency, fields, skip_paused, fq, fill_paused, max_rows)
+    else:
+        _get_price_by_day('stock_post_factor', trading_dates, frequency, fields, skip_paused, fq, panel, fill_paused)
 
 if __name__ == "__main__":
     # 参数设置
@@ -132,11 +410,15 @@ if __name__ == "__main__":
     fq = None # 不复权，回测时需要根据复权因子计算后复权
     panel = False # 不返回Panel对象
     fill_paused = True # 填充停牌数据
-    
+    batched = True # 按时间窗口批量请求，减少网络请求次数
+    emit_post_factor = True # 同时按除权除息事件增量更新后复权因子，无需再单独全量获取
+
     print("=== 按时间区间获取价格数据===")
     start_date = '2025-08-28'
     end_date = '2025-08-28'
     result1 = get_daily_price(start_date=start_date, end_date=end_date,
                                 frequency=frequency, fields=fields, skip_paused=skip_paused,
-                                fq=fq, panel=panel, fill_paused=fill_paused)
-    factor = get_post_factor(end_date)
\ No newline at end of file
+                                fq=fq, panel=panel, fill_paused=fill_paused, batched=batched,
+                                emit_post_factor=emit_post_factor)
+    # 全量重新获取后复权因子（一般不需要）
+    # factor = get_post_factor(end_date, full=True, batched=batched)
@@ -1,5 +1,5 @@
 import pandas as pd
-import jqdatasdk as jq
+from Utils import jq_cache as jq
 import os
 from Utils.get_stock_list import get_stock_list
 from Config.config import JQ_USERNAME, JQ_PASSWORD